@@ -4,9 +4,12 @@ import json
 from datetime import datetime
 from typing import Optional, Generator, List, Dict, Any
 from dependency_injector.wiring import Provide
+from file_processor.helpers.common.decode_helper import DecodeHelper
+from file_processor.helpers.common.shard_helper import ShardHelper
 from file_processor.model.workers_model import ProcessingContext
 from shared_layer.aws.adapters.s3_adapter import S3Adapter
 from shared_layer.logging.logger import Logger
+from shared_layer.logging.metrics import Span, count, span
 
 BATCH_SIZE = 10000  # ✅ Adjustable batch size for processing 1M+ records efficiently
 logger = Logger()  # Logger instance for logging
@@ -60,8 +63,8 @@ class CSVProcessor:
         try:
             logger.info(f"🔄 Starting {context.data_type} {context.subscription_type} batch CSV processing for {context.file_key}...")
 
-            # ✅ Retrieve file from S3 (streaming mode for efficiency)
-            file_content = self.s3_adapter.get_object(context.bucket_name, context.file_key)
+            # ✅ Retrieve file content (from the message for inline files, only this shard's range for large ones)
+            file_content = self.read_content(context)
             if not file_content:
                 logger.error(f"❌ Failed to retrieve file: s3://{context.bucket_name}/{context.file_key}")
                 raise ValueError(f"File retrieval failed for {context.file_key}")
@@ -69,8 +72,8 @@ class CSVProcessor:
             logger.info(f"✅ Successfully fetched file: {context.file_key}")
 
             # ✅ Process CSV in chunks to handle large datasets
-            decoded_content = io.StringIO(file_content.decode("utf-8"))
-            csv_reader = csv.DictReader(decoded_content)
+            hints = context.parse_hints
+            csv_reader = csv.DictReader(io.StringIO(file_content), delimiter=(hints.delimiter if hints else None) or ",")
 
             # ✅ Ensure headers exist
             if not csv_reader.fieldnames:
@@ -81,6 +84,7 @@ class CSVProcessor:
             # ✅ Read and process data in batches
             records_batch = []
             total_rows, skipped_rows = 0, 0
+            parse_span = Span("csv_parse").start()  # ✅ Paused while the consumer works on a yielded batch
 
             for row in csv_reader:
                 total_rows += 1
@@ -88,11 +92,19 @@ class CSVProcessor:
 
                 if cleaned_row:
                     records_batch.append(cleaned_row)
+                else:
+                    skipped_rows += 1
 
                 if len(records_batch) >= BATCH_SIZE:
+                    parse_span.stop()
                     yield records_batch  # ✅ Yield batch instead of keeping in memory
+                    parse_span.start()
                     records_batch = []  # ✅ Reset batch
 
+            parse_span.stop().add(rows=total_rows, bytes=len(file_content)).emit()
+            if skipped_rows:
+                count("csv_parse", "InvalidRows", skipped_rows)
+
             # ✅ Yield remaining records
             if records_batch:
                 yield records_batch
@@ -104,6 +116,51 @@ class CSVProcessor:
             logger.exception(f"❌ Error processing CSV file: {str(e)}")
             raise
 
+    def read_content(self, context) -> str:
+        """
+        Decoded CSV text for this message, using the router's preflight hints when present.
+
+        Inline files are taken from the message itself; compressed files are
+        decompressed; shards are read by byte range.
+        """
+        if context.inline_content is not None:
+            logger.info(f"✅ Using inline content for {context.file_key} (no S3 read)")
+            return context.inline_content
+
+        hints = context.parse_hints
+        # Compressed files are detected on the decompressed bytes (the preflight only saw compressed ones)
+        encoding = hints.encoding if hints and not hints.compression else None
+        if context.is_shard:
+            return self.read_shard(context, encoding)
+
+        with span("s3_fetch") as fetch_span:
+            file_content = self.s3_adapter.get_object(context.bucket_name, context.file_key)
+            fetch_span.add(bytes=len(file_content))
+        with span("decode", bytes=len(file_content)):
+            if hints and hints.compression:
+                file_content = DecodeHelper.decompress(file_content, hints.compression)
+            return DecodeHelper.decode(file_content, encoding)
+
+    def read_shard(self, context, encoding: Optional[str] = None) -> str:
+        """Lines owned by this shard, with the file's header line in front for every shard but the first."""
+        with span("s3_fetch") as fetch_span:
+            raw_content = ShardHelper.read_shard(
+                self.s3_adapter, context.bucket_name, context.file_key,
+                context.byte_start, context.byte_end, context.file_size
+            )
+            fetch_span.add(bytes=len(raw_content))
+        with span("decode", bytes=len(raw_content)):
+            content = DecodeHelper.decode(raw_content, encoding)
+        logger.info(f"✅ Read shard {context.shard_index + 1}/{context.shard_count} "
+                    f"(bytes {context.byte_start}-{context.byte_end}) of {context.file_key}")
+        if context.byte_start == 0:
+            return content
+        hints = context.parse_hints
+        if hints and hints.header is not None:
+            return hints.header + "\n" + content  # ✅ Header from the preflight, no extra ranged GET
+        header = ShardHelper.read_header(self.s3_adapter, context.bucket_name, context.file_key, context.file_size)
+        return DecodeHelper.decode(header or b"", encoding) + content
+
     @staticmethod
     def validate_and_clean(row: Dict[str, str], logger) -> Optional[Dict[str, Any]]:
         """
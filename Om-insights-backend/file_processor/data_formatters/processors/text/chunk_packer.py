@@ -0,0 +1,102 @@
+import re
+from typing import List, Optional
+
+from shared_layer.aws.utils.token_estimator import TokenEstimator, titan_token_estimator
+from shared_layer.logging.logger import Logger
+
+logger = Logger()  # Logger instance for logging
+
+# ✅ Constants
+DEFAULT_TARGET_TOKENS = 1024
+DEFAULT_OVERLAP_TOKENS = 64
+TITAN_MAX_INPUT_TOKENS = 8192
+SAFETY_MARGIN = 0.9  # headroom for estimation error against the model's hard limit
+
+SENTENCE_BOUNDARY_REGEX = re.compile(r"(?<=[.!?।])\s+|\n{2,}")
+
+
+class ChunkPacker:
+    """
+    Packs whole sentences greedily into chunks sized for the embedding model.
+
+    Sizes are measured with a `TokenEstimator` calibrated on Titan's own token
+    counts (not a proxy tokenizer), so chunks can approach `target_tokens`
+    without overrunning the model limit. Consecutive chunks share trailing
+    sentences worth up to `overlap_tokens`. A single sentence longer than the
+    target is split on word boundaries.
+    """
+
+    def __init__(self, target_tokens: int = DEFAULT_TARGET_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+                 max_tokens: int = TITAN_MAX_INPUT_TOKENS, estimator: Optional[TokenEstimator] = None):
+        self.max_tokens = max_tokens or TITAN_MAX_INPUT_TOKENS
+        self.target_tokens = min(target_tokens or DEFAULT_TARGET_TOKENS, int(self.max_tokens * SAFETY_MARGIN))
+        self.overlap_tokens = min(overlap_tokens or 0, self.target_tokens // 2)
+        self.estimator = estimator or titan_token_estimator
+        self.last_report = {}
+
+    @staticmethod
+    def split_sentences(text: str) -> List[str]:
+        return [sentence.strip() for sentence in SENTENCE_BOUNDARY_REGEX.split(text) if sentence and sentence.strip()]
+
+    def _split_long_sentence(self, sentence: str) -> List[str]:
+        pieces, current, current_tokens = [], [], 0
+        for word in sentence.split():
+            word_tokens = self.estimator.estimate(word) + 1
+            if current and current_tokens + word_tokens > self.target_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += word_tokens
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+    def pack(self, text: str) -> List[str]:
+        """
+        Returns the packed chunks; `last_report` holds the resulting call count and sizes.
+        """
+        units = []
+        for sentence in self.split_sentences(text):
+            if self.estimator.estimate(sentence) > self.target_tokens:
+                units.extend(self._split_long_sentence(sentence))
+            else:
+                units.append(sentence)
+
+        chunks, current, current_tokens = [], [], 0
+        for unit in units:
+            unit_tokens = self.estimator.estimate(unit) + 1  # +1 for the joining space
+            if current and current_tokens + unit_tokens > self.target_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = self._overlap_tail(current)
+                if current_tokens + unit_tokens > self.target_tokens:
+                    current, current_tokens = [], 0  # Overlap would push the chunk over budget
+            current.append(unit)
+            current_tokens += unit_tokens
+        if current:
+            chunks.append(" ".join(current))
+
+        estimated = [self.estimator.estimate(chunk) for chunk in chunks]
+        self.last_report = {
+            "embedding_calls": len(chunks),
+            "target_tokens": self.target_tokens,
+            "overlap_tokens": self.overlap_tokens,
+            "estimated_tokens_total": sum(estimated),
+            "estimated_tokens_max": max(estimated, default=0),
+            "chars_per_token": round(self.estimator.chars_per_token, 3),
+            "calibration_samples": self.estimator.observations
+        }
+        logger.info({"message": "📦 Packed text into embedding chunks", **self.last_report})
+        return chunks
+
+    def _overlap_tail(self, sentences: List[str]):
+        """Trailing sentences of the finished chunk that fit into the overlap budget."""
+        if not self.overlap_tokens:
+            return [], 0
+        tail, tokens = [], 0
+        for sentence in reversed(sentences):
+            sentence_tokens = self.estimator.estimate(sentence) + 1
+            if tokens + sentence_tokens > self.overlap_tokens:
+                break
+            tail.insert(0, sentence)
+            tokens += sentence_tokens
+        return tail, tokens
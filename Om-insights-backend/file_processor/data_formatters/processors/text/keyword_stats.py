@@ -0,0 +1,178 @@
+import gzip
+import json
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.logging.logger import Logger
+
+logger = Logger()  # Logger instance for logging
+
+# ✅ Constants
+DEFAULT_STATS_BUCKET = "noiseprofiles"
+DEFAULT_MAX_TERMS = 50000
+STATS_FORMAT_VERSION = 1
+MAX_WRITE_ATTEMPTS = 5
+WRITE_BACKOFF_SECONDS = 0.2
+
+
+class KeywordStatistics:
+    """
+    Document-frequency statistics for one business corpus.
+
+    Every processed chunk counts as one document, so `n_docs` and `df` can be
+    updated incrementally with the chunks of a new upload without touching
+    the historical corpus.
+    """
+
+    def __init__(self, n_docs: int = 0, df: Optional[Dict[str, int]] = None):
+        self.n_docs = n_docs
+        self.df = Counter(df or {})
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency (same form as scikit-learn's `smooth_idf`)."""
+        return math.log((1 + self.n_docs) / (1 + self.df.get(term, 0))) + 1.0
+
+    def add_documents(self, documents: Iterable[Set[str]]) -> None:
+        for terms in documents:
+            self.n_docs += 1
+            self.df.update(terms)
+
+    def merge(self, other: "KeywordStatistics") -> None:
+        self.n_docs += other.n_docs
+        self.df.update(other.df)
+
+    def copy(self) -> "KeywordStatistics":
+        return KeywordStatistics(self.n_docs, self.df)
+
+    def prune(self, max_terms: int) -> None:
+        """
+        Keeps only the `max_terms` most frequent terms. Dropped terms are rare by
+        construction, and an unknown term already gets the highest IDF.
+        """
+        if len(self.df) > max_terms:
+            self.df = Counter(dict(self.df.most_common(max_terms)))
+
+    def to_bytes(self) -> bytes:
+        """Serializes to gzip-compressed JSON with parallel term/count arrays."""
+        terms, counts = zip(*self.df.items()) if self.df else ((), ())
+        payload = {
+            "version": STATS_FORMAT_VERSION,
+            "last_updated": datetime.now().isoformat(),
+            "n_docs": self.n_docs,
+            "terms": list(terms),
+            "df": list(counts)
+        }
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KeywordStatistics":
+        payload = json.loads(gzip.decompress(data).decode("utf-8"))
+        return cls(payload.get("n_docs", 0), dict(zip(payload.get("terms", []), payload.get("df", []))))
+
+
+class KeywordStatsStore:
+    """
+    Persists per-business `KeywordStatistics` in S3 as one compact object per business.
+    Updates are conditional on the object's ETag, so concurrent writers merge instead of overwriting.
+    """
+
+    def __init__(self, s3_adapter: S3Adapter, bucket: str = DEFAULT_STATS_BUCKET,
+                 max_terms: int = DEFAULT_MAX_TERMS):
+        self.s3_adapter = s3_adapter
+        self.bucket = bucket or DEFAULT_STATS_BUCKET
+        self.max_terms = max_terms or DEFAULT_MAX_TERMS
+
+    @staticmethod
+    def _key(business_id: str) -> str:
+        return f"{business_id}/keyword_stats.json.gz"
+
+    def load(self, business_id: str) -> KeywordStatistics:
+        """Loads the statistics for a business, or empty statistics if none exist yet."""
+        return self.load_versioned(business_id)[0]
+
+    def load_versioned(self, business_id: str) -> Tuple[KeywordStatistics, Optional[str]]:
+        """Loads the statistics plus the ETag they were read at (None if none exist yet)."""
+        body, etag = self.s3_adapter.get_object_version(self.bucket, self._key(business_id))
+        if body is None:
+            logger.info(f"ℹ️ No keyword stats yet for {business_id}. Starting a new corpus.")
+            return KeywordStatistics(), None
+        stats = KeywordStatistics.from_bytes(body)
+        logger.info(f"✅ Loaded keyword stats for {business_id}: {stats.n_docs} docs, {len(stats.df)} terms")
+        return stats, etag
+
+    def update(self, business_id: str, delta: KeywordStatistics, base: Optional[KeywordStatistics] = None,
+               etag: Optional[str] = None) -> KeywordStatistics:
+        """
+        Merges `delta` into the stored statistics with a conditional write.
+
+        Pass the `base` statistics and `etag` from `load_versioned()` to skip
+        the re-read. The write only succeeds if nobody changed the object since
+        it was read; otherwise the latest version is re-read and the merge
+        retried, so concurrent files never overwrite each other's counts.
+        """
+        self.s3_adapter.ensure_bucket_exists(self.bucket)
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            if base is None:
+                base, etag = self.load_versioned(business_id)
+            stats = base.copy()
+            stats.merge(delta)
+            stats.prune(self.max_terms)
+            if self.s3_adapter.put_object_if_unchanged(self.bucket, self._key(business_id), stats.to_bytes(), etag):
+                logger.info(f"✅ Updated keyword stats for {business_id}: +{delta.n_docs} docs")
+                return stats
+            logger.info(f"🔁 Keyword stats for {business_id} changed concurrently, retrying "
+                        f"({attempt}/{MAX_WRITE_ATTEMPTS})")
+            base = None
+            time.sleep(random.uniform(0, WRITE_BACKOFF_SECONDS * attempt))
+        raise Exception(f"Keyword stats for {business_id} kept changing; gave up after {MAX_WRITE_ATTEMPTS} attempts.")
+
+
+class TfidfKeywordExtractor:
+    """Ranks per-chunk keyword candidates by TF-IDF against the business corpus statistics."""
+
+    def __init__(self, stats_store: KeywordStatsStore, top_k: int = 25):
+        self.stats_store = stats_store
+        self.top_k = top_k or 25
+
+    def rank(self, business_id: Optional[str], chunk_terms: List[Counter]) -> List[Dict[str, float]]:
+        """
+        Scores the candidate terms of every chunk and records the chunks in the corpus statistics.
+
+        Args:
+            business_id: Corpus owner. Without it, only the current file is used as corpus.
+            chunk_terms: One Counter of normalized candidate terms per chunk.
+
+        Returns:
+            One {term: score} dict per chunk holding its `top_k` terms, scores normalized to (0, 1].
+        """
+        # ✅ One read per file: the same version is the base of the conditional update below
+        stats, etag = self.stats_store.load_versioned(business_id) if business_id else (KeywordStatistics(), None)
+
+        delta = KeywordStatistics()
+        delta.add_documents(set(counts) for counts in chunk_terms)
+
+        # The current file is part of the corpus it is ranked against.
+        corpus = stats.copy()
+        corpus.merge(delta)
+
+        ranked = []
+        for counts in chunk_terms:
+            total = sum(counts.values()) or 1
+            scores = {term: (count / total) * corpus.idf(term) for term, count in counts.items()}
+            top = sorted(scores.items(), key=lambda item: -item[1])[:self.top_k]
+            best = top[0][1] if top else 1.0
+            ranked.append({term: round(score / best, 4) for term, score in top})
+
+        if business_id and delta.n_docs:
+            try:
+                self.stats_store.update(business_id, delta, base=stats, etag=etag)
+            except Exception as e:
+                # Ranking already succeeded; a missed update only delays the statistics.
+                logger.error(f"❌ Failed to persist keyword stats for {business_id}: {e}")
+
+        return ranked
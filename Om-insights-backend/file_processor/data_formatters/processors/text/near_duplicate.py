@@ -0,0 +1,260 @@
+import base64
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.cache.ttl_cache import TTLCache
+from shared_layer.logging.logger import Logger
+
+logger = Logger()  # Logger instance for logging
+
+# ✅ Constants
+DEFAULT_FINGERPRINT_BUCKET = "noiseprofiles"
+DEFAULT_HAMMING_THRESHOLD = 3
+DEFAULT_MAX_FINGERPRINTS = 100000
+DEFAULT_MIN_TOKENS = 8
+DEFAULT_CACHE_TTL_SECONDS = 900
+SHINGLE_SIZE = 3
+FINGERPRINT_BITS = 64
+FINGERPRINT_FORMAT_VERSION = 1
+MAX_WRITE_ATTEMPTS = 5
+WRITE_BACKOFF_SECONDS = 0.2
+
+WORD_REGEX = re.compile(r"\w+", re.UNICODE)
+
+# ✅ Process-wide fingerprint cache (kept across warm invocations)
+fingerprint_cache = TTLCache(ttl_seconds=DEFAULT_CACHE_TTL_SECONDS, max_size=64)
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Tuple[int, int]:
+    """
+    64-bit SimHash over word shingles.
+
+    Returns:
+        (fingerprint, token_count). Texts that differ in a few words get
+        fingerprints a few bits apart.
+    """
+    tokens = WORD_REGEX.findall(text.lower())
+    if not tokens:
+        return 0, 0
+    size = min(shingle_size, len(tokens))
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode("utf-8"), digest_size=8).digest(), "little")
+         for i in range(len(tokens) - size + 1)),
+        dtype=np.uint64
+    )
+    # Majority vote per bit across all shingle hashes
+    bit_counts = ((hashes[:, None] >> np.arange(FINGERPRINT_BITS, dtype=np.uint64)) & np.uint64(1)).sum(axis=0)
+    fingerprint = 0
+    for bit in np.flatnonzero(bit_counts * 2 > len(hashes)):
+        fingerprint |= 1 << int(bit)
+    return fingerprint, len(tokens)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    Near-neighbour lookup for 64-bit fingerprints within a Hamming threshold.
+
+    Fingerprints are split into `threshold + 1` bands; by the pigeonhole
+    principle two fingerprints within the threshold share at least one band
+    exactly, so only that band's bucket has to be compared.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_HAMMING_THRESHOLD):
+        self.threshold = threshold
+        self.bands = threshold + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._size = 0
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (band * self.band_bits)) & mask for band in range(self.bands)]
+
+    def add(self, fingerprint: int) -> None:
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            self._buckets[band][key].append(fingerprint)
+        self._size += 1
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """Returns an indexed fingerprint within the threshold, or None."""
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for candidate in self._buckets[band].get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.threshold:
+                    return candidate
+        return None
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class FingerprintStore:
+    """
+    Per-business chunk fingerprints in S3, cached in-process.
+
+    Follows the same merge-on-write pattern as the noise profiles: new
+    fingerprints are buffered and written by `flush()`, which reads the
+    stored list, appends, keeps the newest `max_fingerprints` and writes it
+    back conditionally on the ETag it read. When another writer got in
+    between, the write is rejected and the append retried on the latest
+    version, so concurrent flushes do not drop each other's fingerprints.
+    Call `flush()` only after the chunks were indexed, so a failed run does
+    not suppress its own retry; `discard()` drops the buffer otherwise.
+    """
+
+    def __init__(self, s3_adapter: S3Adapter, bucket: str = DEFAULT_FINGERPRINT_BUCKET,
+                 max_fingerprints: int = DEFAULT_MAX_FINGERPRINTS,
+                 cache_ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS):
+        self.s3_adapter = s3_adapter
+        self.bucket = bucket or DEFAULT_FINGERPRINT_BUCKET
+        self.max_fingerprints = max_fingerprints or DEFAULT_MAX_FINGERPRINTS
+        self.cache_ttl_seconds = cache_ttl_seconds or DEFAULT_CACHE_TTL_SECONDS
+        self._pending: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(business_id: str) -> str:
+        return f"{business_id}/chunk_fingerprints.json.gz"
+
+    def _fetch(self, business_id: str) -> array:
+        return self._fetch_versioned(business_id)[0]
+
+    def _fetch_versioned(self, business_id: str) -> Tuple[array, Optional[str]]:
+        body, etag = self.s3_adapter.get_object_version(self.bucket, self._key(business_id))
+        fingerprints = array("Q")
+        if body is not None:
+            payload = json.loads(gzip.decompress(body).decode("utf-8"))
+            fingerprints.frombytes(base64.b64decode(payload["fingerprints"]))
+        return fingerprints, etag
+
+    def _write(self, business_id: str, new_fingerprints: List[int]) -> array:
+        """Appends `new_fingerprints` to the stored list with an ETag-conditional write, retrying on conflicts."""
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            fingerprints, etag = self._fetch_versioned(business_id)
+            fingerprints.extend(new_fingerprints)
+            if len(fingerprints) > self.max_fingerprints:
+                fingerprints = fingerprints[-self.max_fingerprints:]
+            payload = {
+                "version": FINGERPRINT_FORMAT_VERSION,
+                "business_id": business_id,
+                "last_updated": datetime.now().isoformat(),
+                "count": len(fingerprints),
+                "fingerprints": base64.b64encode(fingerprints.tobytes()).decode("ascii")
+            }
+            body = gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+            if self.s3_adapter.put_object_if_unchanged(self.bucket, self._key(business_id), body, etag):
+                return fingerprints
+            logger.info(f"🔁 Chunk fingerprints for {business_id} changed concurrently, retrying "
+                        f"({attempt}/{MAX_WRITE_ATTEMPTS})")
+            time.sleep(random.uniform(0, WRITE_BACKOFF_SECONDS * attempt))
+        raise Exception(f"Chunk fingerprints for {business_id} kept changing; "
+                        f"gave up after {MAX_WRITE_ATTEMPTS} attempts.")
+
+    def load(self, business_id: str) -> array:
+        """Returns the stored fingerprints (oldest first), served from the cache when fresh."""
+        return fingerprint_cache.get_or_load(
+            (self.bucket, business_id), lambda: self._fetch(business_id), self.cache_ttl_seconds
+        )
+
+    def add(self, business_id: str, fingerprints: List[int]) -> None:
+        with self._lock:
+            self._pending.setdefault(business_id, []).extend(fingerprints)
+
+    def discard(self) -> None:
+        with self._lock:
+            self._pending = {}
+
+    def flush(self) -> int:
+        """Appends all buffered fingerprints in S3 (conditional write per business). Returns the number written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        written = 0
+        for business_id, new_fingerprints in pending.items():
+            if not new_fingerprints:
+                continue
+            try:
+                self.s3_adapter.ensure_bucket_exists(self.bucket)
+                fingerprints = self._write(business_id, new_fingerprints)
+                fingerprint_cache.set((self.bucket, business_id), fingerprints, self.cache_ttl_seconds)
+                written += 1
+            except Exception as e:
+                # Losing fingerprints only means the content may be indexed again later.
+                logger.error(f"❌ Failed to flush chunk fingerprints for {business_id}: {e}")
+
+        if written:
+            logger.info(f"✅ Flushed chunk fingerprints for {written} business(es) to s3://{self.bucket}")
+        return written
+
+
+class NearDuplicateFilter:
+    """Drops chunks that are near-duplicates of earlier chunks in the file or of the business's indexed content."""
+
+    def __init__(self, fingerprint_store: Optional[FingerprintStore] = None,
+                 hamming_threshold: int = DEFAULT_HAMMING_THRESHOLD, min_tokens: int = DEFAULT_MIN_TOKENS):
+        self.fingerprint_store = fingerprint_store
+        self.hamming_threshold = DEFAULT_HAMMING_THRESHOLD if hamming_threshold is None else hamming_threshold
+        self.min_tokens = DEFAULT_MIN_TOKENS if min_tokens is None else min_tokens
+
+    def filter(self, business_id: Optional[str], chunks: List[str]) -> List[str]:
+        """
+        Returns the chunks to process, in their original order.
+
+        Chunks shorter than `min_tokens` words are always kept: their
+        fingerprints are too coarse to compare reliably.
+        """
+        index = SimHashIndex(self.hamming_threshold)
+        known = 0
+        if business_id and self.fingerprint_store:
+            try:
+                for fingerprint in self.fingerprint_store.load(business_id):
+                    index.add(fingerprint)
+                known = len(index)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load chunk fingerprints for {business_id}: {e}")
+
+        unique_chunks, new_fingerprints, seen_in_file = [], [], set()
+        in_file_duplicates = stored_duplicates = 0
+        for chunk in chunks:
+            fingerprint, token_count = simhash(chunk)
+            if token_count < self.min_tokens:
+                unique_chunks.append(chunk)
+                continue
+            match = index.find(fingerprint)
+            if match is None:
+                index.add(fingerprint)
+                new_fingerprints.append(fingerprint)
+                seen_in_file.add(fingerprint)
+                unique_chunks.append(chunk)
+            elif match in seen_in_file:
+                in_file_duplicates += 1
+            else:
+                stored_duplicates += 1
+
+        if business_id and self.fingerprint_store and new_fingerprints:
+            self.fingerprint_store.add(business_id, new_fingerprints)
+
+        logger.info({
+            "message": "🧬 Near-duplicate filtering complete",
+            "chunks_in": len(chunks),
+            "chunks_out": len(unique_chunks),
+            "in_file_duplicates": in_file_duplicates,
+            "previously_indexed_duplicates": stored_duplicates,
+            "known_fingerprints": known
+        })
+        return unique_chunks
@@ -0,0 +1,294 @@
+import base64
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.cache.ttl_cache import TTLCache
+from shared_layer.logging.logger import Logger
+
+logger = Logger()  # Logger instance for logging
+
+# ✅ Constants
+DEFAULT_PROFILE_BUCKET = "noiseprofiles"
+DEFAULT_SKETCH_WIDTH = 2048
+DEFAULT_SKETCH_DEPTH = 4
+DEFAULT_TOP_K = 200
+DEFAULT_MAX_ENTITY_SHARE = 0.1  # a token tagged as an entity in more than 10% of its occurrences is not noise
+DEFAULT_CACHE_TTL_SECONDS = 900
+PROFILE_FORMAT_VERSION = 1
+MAX_WRITE_ATTEMPTS = 5
+WRITE_BACKOFF_SECONDS = 0.2
+
+# ✅ Process-wide profile cache (kept across warm invocations)
+profile_cache = TTLCache(ttl_seconds=DEFAULT_CACHE_TTL_SECONDS, max_size=256)
+
+
+class FrequencySketch:
+    """
+    Count-min sketch with a bounded top-k heavy-hitter list.
+
+    Two sketches with the same width/depth merge by adding their tables, so
+    per-file sketches can be folded into a long-lived business profile.
+    Counts are over-estimated, never under-estimated.
+    """
+
+    def __init__(self, width: int = DEFAULT_SKETCH_WIDTH, depth: int = DEFAULT_SKETCH_DEPTH,
+                 top_k: int = DEFAULT_TOP_K, table: Optional[array] = None,
+                 heavy_hitters: Optional[Dict[str, int]] = None, total: int = 0):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = table if table is not None else array("Q", [0]) * (width * depth)
+        self.heavy_hitters = dict(heavy_hitters or {})
+        self.total = total
+
+    def _cells(self, item: str) -> List[int]:
+        # Stable across processes (unlike hash()); double hashing derives `depth` columns.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def estimate(self, item: str) -> int:
+        return min(self.table[cell] for cell in self._cells(item))
+
+    def add(self, item: str, count: int = 1) -> None:
+        cells = self._cells(item)
+        for cell in cells:
+            self.table[cell] += count
+        self.total += count
+        self._offer(item, min(self.table[cell] for cell in cells))
+
+    def update(self, counts: Mapping[str, int]) -> None:
+        for item, count in counts.items():
+            self.add(item, count)
+
+    def _offer(self, item: str, estimate: int) -> None:
+        if item in self.heavy_hitters or len(self.heavy_hitters) < self.top_k:
+            self.heavy_hitters[item] = estimate
+            return
+        weakest = min(self.heavy_hitters, key=self.heavy_hitters.get)
+        if estimate > self.heavy_hitters[weakest]:
+            del self.heavy_hitters[weakest]
+            self.heavy_hitters[item] = estimate
+
+    def merge(self, other: "FrequencySketch") -> None:
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge sketches with different dimensions.")
+        for i, value in enumerate(other.table):
+            if value:
+                self.table[i] += value
+        self.total += other.total
+
+        candidates = set(self.heavy_hitters) | set(other.heavy_hitters)
+        ranked = sorted(((self.estimate(item), item) for item in candidates), reverse=True)
+        self.heavy_hitters = {item: estimate for estimate, item in ranked[:self.top_k]}
+
+    def most_common(self, n: Optional[int] = None) -> List[tuple]:
+        ranked = sorted(self.heavy_hitters.items(), key=lambda kv: -kv[1])
+        return ranked if n is None else ranked[:n]
+
+    def to_dict(self) -> dict:
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "top_k": self.top_k,
+            "total": self.total,
+            "table": base64.b64encode(self.table.tobytes()).decode("ascii"),
+            "heavy_hitters": self.heavy_hitters
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FrequencySketch":
+        table = array("Q")
+        table.frombytes(base64.b64decode(data["table"]))
+        return cls(
+            width=data["width"],
+            depth=data["depth"],
+            top_k=data.get("top_k", DEFAULT_TOP_K),
+            table=table,
+            heavy_hitters=data.get("heavy_hitters"),
+            total=data.get("total", 0)
+        )
+
+
+class NoiseProfile:
+    """Per-business token and named-entity frequencies used to derive noise words."""
+
+    def __init__(self, tokens: Optional[FrequencySketch] = None, entities: Optional[FrequencySketch] = None,
+                 files: int = 0, width: int = DEFAULT_SKETCH_WIDTH, depth: int = DEFAULT_SKETCH_DEPTH,
+                 top_k: int = DEFAULT_TOP_K):
+        self.tokens = tokens or FrequencySketch(width, depth, top_k)
+        self.entities = entities or FrequencySketch(width, depth, top_k)
+        self.files = files
+
+    def record(self, token_counts: Mapping[str, int], entity_terms: Iterable[str]) -> None:
+        self.tokens.update(token_counts)
+        entity_words = set()
+        for term in entity_terms:
+            if term:
+                entity_words.add(term)
+                entity_words.update(term.split())
+        # Entity counts are token occurrences in files where the word was tagged, comparable to `tokens`
+        self.entities.update({word: token_counts.get(word, 1) for word in entity_words})
+        self.files += 1
+
+    def merge(self, other: "NoiseProfile") -> None:
+        self.tokens.merge(other.tokens)
+        self.entities.merge(other.entities)
+        self.files += other.files
+
+    def entity_share(self, word: str, token_count: int) -> float:
+        """
+        Estimated share of `word`'s occurrences that were tagged as (part of) a named entity.
+
+        Every count-min cell carries about `total / width` of other items' counts, so that
+        collision floor is subtracted first; otherwise a sketch full of entities would make
+        every word look like one.
+        """
+        collisions = self.entities.total / self.entities.width
+        return max(self.entities.estimate(word) - collisions, 0) / max(token_count, 1)
+
+    def noise_words(self, limit: int = 50, max_entity_share: float = DEFAULT_MAX_ENTITY_SHARE) -> Set[str]:
+        """Most frequent tokens that are (almost) never seen as part of a named entity."""
+        noise = set()
+        for word, count in self.tokens.most_common():
+            if self.entity_share(word, count) <= max_entity_share:
+                noise.add(word)
+                if len(noise) >= limit:
+                    break
+        return noise
+
+    def to_bytes(self, business_id: str) -> bytes:
+        payload = {
+            "version": PROFILE_FORMAT_VERSION,
+            "business_id": business_id,
+            "last_updated": datetime.now().isoformat(),
+            "files": self.files,
+            "noise_words": sorted(self.noise_words()),
+            "tokens": self.tokens.to_dict(),
+            "entities": self.entities.to_dict()
+        }
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "NoiseProfile":
+        payload = json.loads(gzip.decompress(data).decode("utf-8"))
+        return cls(
+            tokens=FrequencySketch.from_dict(payload["tokens"]),
+            entities=FrequencySketch.from_dict(payload["entities"]),
+            files=payload.get("files", 0)
+        )
+
+
+class NoiseProfileStore:
+    """
+    Cached, merge-on-write store of per-business noise profiles in S3.
+
+    Reads are served from the process-wide TTL cache. Recorded files are kept
+    as pending deltas and written by `flush()`, which the handler calls once per
+    invocation: each flush reads the stored profile, merges the delta and
+    writes it back conditionally on the ETag it read. When another writer got
+    in between, the write is rejected and the merge retried on the latest
+    version, so concurrent writers accumulate instead of overwriting.
+    """
+
+    def __init__(self, s3_adapter: S3Adapter, bucket: str = DEFAULT_PROFILE_BUCKET,
+                 width: int = DEFAULT_SKETCH_WIDTH, depth: int = DEFAULT_SKETCH_DEPTH,
+                 top_k: int = DEFAULT_TOP_K, cache_ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+                 max_entity_share: float = DEFAULT_MAX_ENTITY_SHARE):
+        self.s3_adapter = s3_adapter
+        self.bucket = bucket or DEFAULT_PROFILE_BUCKET
+        self.width = width or DEFAULT_SKETCH_WIDTH
+        self.depth = depth or DEFAULT_SKETCH_DEPTH
+        self.top_k = top_k or DEFAULT_TOP_K
+        self.cache_ttl_seconds = cache_ttl_seconds or DEFAULT_CACHE_TTL_SECONDS
+        self.max_entity_share = max_entity_share if max_entity_share is not None else DEFAULT_MAX_ENTITY_SHARE
+        self._pending: Dict[str, NoiseProfile] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(business_id: str) -> str:
+        return f"{business_id}/noise_profile.json.gz"
+
+    def _new_profile(self) -> NoiseProfile:
+        return NoiseProfile(width=self.width, depth=self.depth, top_k=self.top_k)
+
+    def _fetch(self, business_id: str) -> NoiseProfile:
+        return self._fetch_versioned(business_id)[0]
+
+    def _fetch_versioned(self, business_id: str) -> Tuple[NoiseProfile, Optional[str]]:
+        body, etag = self.s3_adapter.get_object_version(self.bucket, self._key(business_id))
+        return (NoiseProfile.from_bytes(body) if body is not None else self._new_profile()), etag
+
+    def _write(self, business_id: str, delta: NoiseProfile) -> NoiseProfile:
+        """Merges `delta` into the stored profile with an ETag-conditional write, retrying on conflicts."""
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            profile, etag = self._fetch_versioned(business_id)
+            profile.merge(delta)
+            if self.s3_adapter.put_object_if_unchanged(self.bucket, self._key(business_id),
+                                                       profile.to_bytes(business_id), etag):
+                return profile
+            logger.info(f"🔁 Noise profile for {business_id} changed concurrently, retrying "
+                        f"({attempt}/{MAX_WRITE_ATTEMPTS})")
+            time.sleep(random.uniform(0, WRITE_BACKOFF_SECONDS * attempt))
+        raise Exception(f"Noise profile for {business_id} kept changing; gave up after {MAX_WRITE_ATTEMPTS} attempts.")
+
+    def get_profile(self, business_id: str) -> NoiseProfile:
+        """Returns the stored profile including this process's unflushed deltas."""
+        profile = profile_cache.get_or_load(
+            (self.bucket, business_id), lambda: self._fetch(business_id), self.cache_ttl_seconds
+        )
+        with self._lock:
+            pending = self._pending.get(business_id)
+        if pending is None:
+            return profile
+        combined = self._new_profile()
+        combined.merge(profile)
+        combined.merge(pending)
+        return combined
+
+    def noise_words(self, business_id: Optional[str], limit: int = 50) -> Set[str]:
+        if not business_id:
+            return set()
+        try:
+            return self.get_profile(business_id).noise_words(limit, self.max_entity_share)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load noise profile for {business_id}: {e}")
+            return set()
+
+    def record(self, business_id: str, token_counts: Mapping[str, int], entity_terms: Iterable[str]) -> None:
+        """Adds one file's token and entity counts to the pending delta (no S3 call)."""
+        with self._lock:
+            delta = self._pending.setdefault(business_id, self._new_profile())
+            delta.record(token_counts, entity_terms)
+
+    def flush(self) -> int:
+        """Merges all pending deltas into S3. Returns the number of profiles written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        written = 0
+        for business_id, delta in pending.items():
+            try:
+                self.s3_adapter.ensure_bucket_exists(self.bucket)
+                profile = self._write(business_id, delta)
+                profile_cache.set((self.bucket, business_id), profile, self.cache_ttl_seconds)
+                written += 1
+            except Exception as e:
+                logger.error(f"❌ Failed to flush noise profile for {business_id}: {e}")
+                with self._lock:
+                    # Keep the delta for the next flush instead of losing it.
+                    retained = self._pending.setdefault(business_id, self._new_profile())
+                    retained.merge(delta)
+
+        if written:
+            logger.info(f"✅ Flushed {written} noise profile(s) to s3://{self.bucket}")
+        return written
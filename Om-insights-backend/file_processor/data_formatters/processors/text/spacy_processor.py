@@ -1,18 +1,18 @@
 import os
 import re
 import threading
-import tarfile
 from datetime import datetime
 
-import boto3
 import spacy
 from typing import List, Dict, Any, Optional, Set
-from botocore.exceptions import ClientError
 from collections import Counter
 
+from file_processor.data_formatters.processors.text.keyword_stats import TfidfKeywordExtractor
+from file_processor.data_formatters.processors.text.noise_profile import NoiseProfileStore
 from file_processor.data_formatters.processors.text.sentiment_processor import SentimentProcessor
 from file_processor.model.workers_model import ProcessingContext
 from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.aws.utils.model_provisioner import ModelProvisioner
 from shared_layer.logging.logger import Logger
 # ✅ Keyword Metadata Extraction
 from spacy.lang.en.stop_words import STOP_WORDS as SPACY_STOPWORDS
@@ -21,74 +21,40 @@ logger = Logger()  # Logger instance for logging
 # ✅ Constants
 S3_BUCKET_NAME = "om-insights-model-uploads"
 S3_KEY = "spacy_model/en_core_web_sm.tar.gz"
-EFS_MODEL_DIR = "/mnt/efs/models/spacy/en_core_web_sm"
-TMP_TAR_PATH = "/tmp/en_core_web_sm.tar.gz"
+S3_MANIFEST_KEY = "spacy_model/en_core_web_sm.manifest.json"
+EFS_RELEASES_DIR = "/mnt/efs/models/spacy/releases"
+MODEL_NAME = "en_core_web_sm"
 from dependency_injector.wiring import inject, Provide
 
 # ✅ Thread-safe model cache
 model_cache = {}
 cache_lock = threading.Lock()
 
-s3 = boto3.client("s3")
+# ✅ Versioned, lock-protected model provisioning on EFS
+model_provisioner = ModelProvisioner(
+    bucket=S3_BUCKET_NAME,
+    key=S3_KEY,
+    base_dir=EFS_RELEASES_DIR,
+    model_name=MODEL_NAME,
+    manifest_key=S3_MANIFEST_KEY
+)
+
+KEYWORD_POS_TAGS = {"NOUN", "PROPN"}
 
 class SpacyProcessor:
-    def __init__(self, s3_adapter: S3Adapter= Provide['s3_adapter']):
+    def __init__(self, s3_adapter: S3Adapter= Provide['s3_adapter'],
+                 keyword_extractor: Optional[TfidfKeywordExtractor] = None,
+                 noise_profile_store: Optional[NoiseProfileStore] = None):
         self.s3_adapter = s3_adapter
+        self.keyword_extractor = keyword_extractor
+        self.noise_profile_store = noise_profile_store
     @staticmethod
-    def ensure_model_downloaded():
-        """
-        Ensures the spaCy model is in EFS. If missing, downloads from S3 and extracts it.
-        """
-        if os.path.exists(EFS_MODEL_DIR) and os.path.exists(os.path.join(EFS_MODEL_DIR, "config.cfg")):
-            logger.info(f"✅ Model already exists in EFS: {EFS_MODEL_DIR}")
-            return True
-
-        logger.warning(f"⚠️ Model missing in EFS: {EFS_MODEL_DIR}. Downloading from S3...")
-
-        try:
-            os.makedirs(EFS_MODEL_DIR, exist_ok=True)
-        except Exception as e:
-            logger.error(f"❌ Error creating EFS directory: {e}")
-            return False
-
-        # ✅ Download from S3
-        if SpacyProcessor.download_from_s3():
-            logger.info(f"✅ Model successfully extracted to EFS: {EFS_MODEL_DIR}")
-            return True
-        else:
-            raise FileNotFoundError(f"❌ Model download failed from S3.")
-
-    @staticmethod
-    def download_from_s3():
+    def ensure_model_downloaded() -> str:
         """
-        Downloads and extracts the SpaCy model from S3 to EFS.
+        Ensures the spaCy model is provisioned in EFS and returns its versioned path.
+        Only one cold start downloads a new version; concurrent ones wait on the EFS lock.
         """
-        try:
-            logger.info(f"⬇️ Downloading model from s3://{S3_BUCKET_NAME}/{S3_KEY}")
-            s3.download_file(S3_BUCKET_NAME, S3_KEY, TMP_TAR_PATH)
-            logger.info("✅ Download complete")
-
-            logger.info("📦 Extracting model to EFS...")
-            with tarfile.open(TMP_TAR_PATH, "r:gz") as tar:
-                tar.extractall(path="/mnt/efs/models/spacy")
-
-            logger.info(f"✅ Model extracted successfully to: {EFS_MODEL_DIR}")
-
-        except ClientError as e:
-            logger.error(f"❌ S3 download error: {e}")
-            return False
-        except tarfile.TarError as e:
-            logger.error(f"❌ TAR extraction error: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"❌ Unexpected error during model download: {e}")
-            return False
-        finally:
-            if os.path.exists(TMP_TAR_PATH):
-                os.remove(TMP_TAR_PATH)
-                logger.info("🧹 Cleaned up temporary tar.gz file")
-
-        return True
+        return model_provisioner.ensure_ready()
 
     @staticmethod
     def get_spacy_model(
@@ -126,9 +92,8 @@ class SpacyProcessor:
             # ✅ Check if running in AWS Lambda
             if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
                 logger.info("🟢 Running in AWS Lambda - Using EFS for model storage.")
-                SpacyProcessor.ensure_model_downloaded()
-                # For advanced multi-lingual, you could decide model_path dynamically (not just EFS_MODEL_DIR)
-                model_path = EFS_MODEL_DIR
+                # For advanced multi-lingual, you could provision other models with their own ModelProvisioner
+                model_path = SpacyProcessor.ensure_model_downloaded()
             else:
                 logger.info("🖥️ Running locally - Using installed SpaCy model.")
                 # If you want multi-lingual expansions, you could do:
@@ -231,7 +196,13 @@ class SpacyProcessor:
         batch_results = []
         token_freq_global = Counter()
         named_entities_global = set()
+        chunk_terms = []
         batch_id = 0
+        # Business-specific noise words learned from earlier uploads (cached in process)
+        noise_words = (
+            self.noise_profile_store.noise_words(context.business_id)
+            if self.noise_profile_store else set()
+        )
 
         for doc in nlp.pipe(text_batches, batch_size=batch_size, n_process=n_process):
             batch_id += 1
@@ -246,36 +217,36 @@ class SpacyProcessor:
             token_freq_global.update(
                 token.text.lower() for token in doc if not token.is_punct and len(token.text) > 2
             )
-
-            indexed_metadata = SpacyProcessor._extract_batch_metadata(
-                pos_tags=pos_tags,
-                named_entities=named_ents,
-                global_named_entities=named_entities_global
-            )
+            # Keyword candidates for TF-IDF ranking (collected in the same pass)
+            chunk_terms.append(SpacyProcessor.extract_keyword_terms(pos_tags, named_ents, noise_words))
 
             batch_results.append({
                 "batch_id": batch_id,
                 "sentences": sentences,
-                "indexed_metadata": indexed_metadata,
+                "pos_tags": pos_tags,
+                "named_entities": named_ents,
                 "sentiment_analysis":sentiment_analysis
             })
 
-        # 🔁 Save global noise profile once (for use in embedding or filtering downstream)
-        if context.business_id:
-            auto_noise_words = {
-                word for word, _ in token_freq_global.most_common(50)
-                if word not in named_entities_global
-            }
-            payload = {
-                "business_id": context.business_id,
-                "last_updated": datetime.now().isoformat(),
-                "noise_words": sorted(auto_noise_words)
-            }
-            self.s3_adapter.save_json(
-                bucket="noiseprofiles",
-                key=f"{context.business_id}/noise_words.json",
-                data=payload
+        # 📊 Rank keywords against the business corpus (updates its statistics incrementally)
+        keyword_scores = [None] * len(batch_results)
+        if self.keyword_extractor and batch_results:
+            try:
+                keyword_scores = self.keyword_extractor.rank(context.business_id, chunk_terms)
+            except Exception as e:
+                logger.error(f"❌ TF-IDF keyword ranking failed, using POS-based scores: {e}")
+
+        for batch, scores in zip(batch_results, keyword_scores):
+            batch["indexed_metadata"] = SpacyProcessor._extract_batch_metadata(
+                pos_tags=batch.pop("pos_tags"),
+                named_entities=batch.pop("named_entities"),
+                global_named_entities=named_entities_global,
+                keyword_scores=scores
             )
+
+        # 🔁 Record this file in the business noise profile (written once per invocation on flush)
+        if context.business_id and self.noise_profile_store:
+            self.noise_profile_store.record(context.business_id, token_freq_global, named_entities_global)
         return batch_results
 
     @staticmethod
@@ -296,6 +267,43 @@ class SpacyProcessor:
         """
         return [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
 
+    @staticmethod
+    def normalize_term(text: str) -> str:
+        """Normalizes a keyword the same way for ranking, statistics and metadata."""
+        return re.sub(r"[^\w\s]", "", text).strip().lower()
+
+    @staticmethod
+    def extract_keyword_terms(pos_tags: List[Dict[str, str]], named_entities: List[Dict[str, str]],
+                              noise_words: Optional[Set[str]] = None) -> Counter:
+        """
+        Counts the keyword candidates of one chunk (named entities, nouns and proper nouns).
+        Nouns found in the business `noise_words` are skipped; named entities are always kept.
+
+        Returns:
+            Counter of normalized term -> occurrences in the chunk.
+        """
+        terms = Counter()
+        for ent in named_entities:
+            norm = SpacyProcessor.normalize_term(ent.get("text", ""))
+            if norm and not SpacyProcessor._is_noise_term(norm):
+                terms[norm] += 1
+        for token in pos_tags:
+            if token.get("pos", "").upper() not in KEYWORD_POS_TAGS:
+                continue
+            norm = SpacyProcessor.normalize_term(token.get("word", ""))
+            if norm and not SpacyProcessor._is_noise_term(norm) and norm not in (noise_words or ()):
+                terms[norm] += 1
+        return terms
+
+    @staticmethod
+    def _is_noise_term(term: str) -> bool:
+        return bool(
+            term in SPACY_STOPWORDS or
+            len(term) < 3 or
+            re.search(r"(.)\1{2,}", term) or
+            re.fullmatch(r"\d+", term)
+        )
+
     @staticmethod
     def extract_pos_tags(doc) -> List[Dict[str, str]]:
         """
@@ -409,10 +417,14 @@ class SpacyProcessor:
             pos_tags: List[Dict[str, str]],
             named_entities: List[Dict[str, str]],
             global_named_entities: Set[str],
-            max_noise_words: int = 50
+            max_noise_words: int = 50,
+            keyword_scores: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """
         Extracts indexed metadata for a single batch.
+
+        When `keyword_scores` (TF-IDF scores by normalized term) are given, they rank
+        the keywords; otherwise the fixed NER/POS scores are used.
         """
         BASE_NOISE = SPACY_STOPWORDS
 
@@ -460,6 +472,8 @@ class SpacyProcessor:
             if not text or is_noise(norm) or norm in seen:
                 continue
             group, score = useful_ner_labels.get(label, ("entities", 0.5))
+            if keyword_scores is not None:
+                score = keyword_scores.get(norm, 0.0)
             merged[group].add(text)
             ranked_keywords.append({"keyword": text, "score": score})
             all_keywords.add(text)
@@ -473,6 +487,10 @@ class SpacyProcessor:
             if not word or pos not in useful_pos_tags or norm in seen or is_noise(norm):
                 continue
             group, score = useful_pos_tags[pos]
+            if keyword_scores is not None:
+                if group == "keywords" and norm not in keyword_scores:
+                    continue  # Not among the chunk's top TF-IDF terms
+                score = keyword_scores.get(norm, 0.0)
             merged[group].add(word)
             ranked_keywords.append({"keyword": word, "score": score})
             all_keywords.add(word)
@@ -487,12 +505,3 @@ class SpacyProcessor:
             "all": sorted(all_keywords),
             "ranked_keywords": sorted(ranked_keywords, key=lambda x: -x["score"])
         }
-
-# ✅ Preload models in AWS Lambda environment to reduce cold start time (optional)
-if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
-    try:
-        # Example: preload with the default pipeline (parser-based)
-        SpacyProcessor.get_spacy_model()
-        logger.info("✅ Preloaded spaCy model in Lambda environment.")
-    except Exception as e:
-        logger.error(f"❌ Failed to preload spaCy model: {e}")
\ No newline at end of file
@@ -2,6 +2,7 @@ import decimal
 import html
 import os
 import re
+import threading
 import unicodedata
 from typing import List
 from bs4 import BeautifulSoup
@@ -105,9 +106,22 @@ FONT_HEADER_REGEX = re.compile(r"^(Helvetica;[\s;]*)", re.IGNORECASE)
 DUPLICATE_CURRENCY_REGEX = re.compile(r"\b(\d{5,})(?:[\s,]+)(?:\d{1,3},\d{2,3},\d{3})\s*₹?")
 PERMANENT_NUMBER_NOISE_REGEX = re.compile(r"permanent account number\s+Number", re.IGNORECASE)
 COLON_SPACING_REGEX = re.compile(r"\s*:\s*")
-sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
-sym_spell.load_dictionary(os.path.join(resources_dir, "frequency_dictionary_en_82_765.txt"), term_index=0, count_index=1)
-sym_spell.load_dictionary(os.path.join(resources_dir, "custom_indian_business_dict.txt"), term_index=0, count_index=1)
+# ✅ SymSpell dictionaries are loaded on first use (or by the Lambda warm-start phase)
+_sym_spell = None
+_sym_spell_lock = threading.Lock()
+
+
+def get_sym_spell() -> SymSpell:
+    """Returns the process-wide SymSpell instance, loading its dictionaries once."""
+    global _sym_spell
+    if _sym_spell is None:
+        with _sym_spell_lock:
+            if _sym_spell is None:
+                sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+                sym_spell.load_dictionary(os.path.join(resources_dir, "frequency_dictionary_en_82_765.txt"), term_index=0, count_index=1)
+                sym_spell.load_dictionary(os.path.join(resources_dir, "custom_indian_business_dict.txt"), term_index=0, count_index=1)
+                _sym_spell = sym_spell
+    return _sym_spell
 
 class TextPreprocessor:
     """
@@ -418,7 +432,7 @@ class TextPreprocessor:
                 corrected_tokens.append(token)
                 continue
             # ✅ Lookup spelling correction
-            suggestions = sym_spell.lookup(token, Verbosity.TOP, max_edit_distance=2)
+            suggestions = get_sym_spell().lookup(token, Verbosity.TOP, max_edit_distance=2)
             if suggestions and suggestions[0].term.lower() != token.lower():
                 corrected_tokens.append(suggestions[0].term)
             else:
@@ -1,17 +1,37 @@
+import threading
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from dependency_injector.wiring import Provide
 from shared_layer.aws.adapters.bedrock_adapter import BedrockEmbeddingAdapter
 # Import your existing modules
+from file_processor.data_formatters.processors.text.chunk_packer import ChunkPacker
+from file_processor.data_formatters.processors.text.near_duplicate import NearDuplicateFilter
 from file_processor.data_formatters.processors.text.spacy_processor import SpacyProcessor
 from file_processor.data_formatters.processors.text.txt_preprocessor import TextPreprocessor
+from file_processor.helpers.common.decode_helper import DecodeHelper
+from file_processor.helpers.common.shard_helper import ShardHelper
 from file_processor.model.workers_model import ProcessingContext
 from transformers import AutoTokenizer
 from shared_layer.aws.adapters.s3_adapter import S3Adapter
 from shared_layer.logging.logger import Logger
+from shared_layer.logging.metrics import span
 
 logger = Logger()  # Logger instance for logging
+
+# ✅ Tokenizers are loaded once per execution environment (TXTProcessor is built per invocation)
+_tokenizer_cache = {}
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer(hf_model_name: str = "bert-base-uncased"):
+    """Returns the cached Hugging Face tokenizer for `hf_model_name`, loading it on first use."""
+    if hf_model_name not in _tokenizer_cache:
+        with _tokenizer_lock:
+            if hf_model_name not in _tokenizer_cache:
+                _tokenizer_cache[hf_model_name] = AutoTokenizer.from_pretrained(hf_model_name)
+    return _tokenizer_cache[hf_model_name]
+
 # -----------------------------
 # NEW: Embedding Processor
 # -----------------------------
@@ -22,7 +42,9 @@ class TXTProcessor:
     def __init__(
             self,bedrock_repository : BedrockEmbeddingAdapter,spacy_processor: SpacyProcessor,s3_adapter: S3Adapter= Provide['s3_adapter'],
             use_custom_ner: bool = False,
-            hf_model_name: str = "bert-base-uncased"
+            hf_model_name: str = "bert-base-uncased",
+            near_duplicate_filter: Optional[NearDuplicateFilter] = None,
+            chunk_packer: Optional[ChunkPacker] = None
     ):
         """
         Initializes the TXTProcessor.
@@ -31,13 +53,22 @@ class TXTProcessor:
             use_custom_ner (bool): Flag to enable/disable custom NER models.
             hf_model_name (str): Hugging Face model name whose tokenizer we'll use for chunking.
                                  E.g., 'bert-base-uncased' or 'gpt2', etc.
+            near_duplicate_filter (NearDuplicateFilter): Drops near-duplicate chunks before NLP and embedding.
+            chunk_packer (ChunkPacker): If set, packs whole sentences up to Titan's token budget
+                                        instead of fixed tokenizer windows (the tokenizer is then never loaded).
         """
         self.bedrock_repository = bedrock_repository
         self.spacy_processor = spacy_processor
         self.s3_adapter = s3_adapter
         self.use_custom_ner = use_custom_ner
-        # Load a tokenizer to approximate Amazon Titan's tokenization approach
-        self.tokenizer = AutoTokenizer.from_pretrained(hf_model_name)
+        self.near_duplicate_filter = near_duplicate_filter
+        self.chunk_packer = chunk_packer
+        self.hf_model_name = hf_model_name
+
+    @property
+    def tokenizer(self):
+        # Tokenizer approximating Amazon Titan's tokenization (only needed by `chunk_text`)
+        return get_tokenizer(self.hf_model_name)
 
     def process(self, context: ProcessingContext) -> Dict[str, Any]:
         """
@@ -55,23 +86,58 @@ class TXTProcessor:
             logger.info(
                 f"Processing {context.file_key} from {context.bucket_name} with subscription: {context.subscription_type}")
 
-            # 1. Read text from S3
-            text_content = self.s3_adapter.get_file_content(context.bucket_name, context.file_key)
+            # 1. Read text (from the message for inline files, only this shard's lines for large files)
+            hints = context.parse_hints
+            encoding = hints.encoding if hints and not hints.compression else None  # None: detect after decompressing
+            if context.inline_content is not None:
+                text_content = context.inline_content
+            elif context.is_shard or context.parse_hints:
+                with span("s3_fetch") as fetch_span:
+                    if context.is_shard:
+                        raw_content = ShardHelper.read_shard(
+                            self.s3_adapter, context.bucket_name, context.file_key,
+                            context.byte_start, context.byte_end, context.file_size
+                        )
+                    else:
+                        raw_content = self.s3_adapter.get_object(context.bucket_name, context.file_key)
+                    fetch_span.add(bytes=len(raw_content))
+                # ✅ Encoding and compression already detected by the router's preflight
+                with span("decode", bytes=len(raw_content)):
+                    if hints and hints.compression:
+                        raw_content = DecodeHelper.decompress(raw_content, hints.compression)
+                    text_content = DecodeHelper.decode(raw_content, encoding)
+            else:
+                with span("s3_fetch") as fetch_span:  # Includes encoding detection and decoding
+                    text_content = self.s3_adapter.get_file_content(context.bucket_name, context.file_key)
+                    fetch_span.add(bytes=len(text_content))
 
             # 2. Clean the text
-            cleaned_text = TextPreprocessor.preprocess(text_content)
-
-            # 3. Chunk the text using token-based splitting
-            text_batches = self.chunk_text(cleaned_text)
+            with span("text_preprocess", bytes=len(text_content)):
+                cleaned_text = TextPreprocessor.preprocess(text_content)
+
+            # 3. Chunk the text: sentence packing against Titan's budget, or fixed tokenizer windows
+            if self.chunk_packer:
+                text_batches = self.chunk_packer.pack(cleaned_text)
+            else:
+                text_batches = self.chunk_text(cleaned_text)
             logger.info(f"Splitting text into {len(text_batches)} chunk(s) for processing...")
 
+            # 3.1 Drop near-duplicate chunks (within the file and against the business's indexed content)
+            if self.near_duplicate_filter:
+                text_batches = self.near_duplicate_filter.filter(context.business_id, text_batches)
+                if not text_batches:
+                    logger.info("ℹ️ All chunks are near-duplicates of indexed content. Nothing to process.")
+                    return []
+
             # 4. Apply Spacy NLP Processing (returns list of batches with sentences + metadata)
-            spacy_batches = self.spacy_processor.process(
-                text_batches=text_batches,
-                context=context
-            )
+            with span("spacy", rows=len(text_batches)):
+                spacy_batches = self.spacy_processor.process(
+                    text_batches=text_batches,
+                    context=context
+                )
             # 5. Add embeddings to each batch
-            embedding_spacy_batches = self.bedrock_repository.enrich_with_embeddings(spacy_batches)
+            with span("embedding", rows=len(spacy_batches)):
+                embedding_spacy_batches = self.bedrock_repository.enrich_with_embeddings(spacy_batches)
             # Add context to each batch
             for batch in embedding_spacy_batches:
                 batch["business_region"] = context.business_region
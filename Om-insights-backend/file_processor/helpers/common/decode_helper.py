@@ -0,0 +1,52 @@
+import bz2
+import gzip
+import io
+import zipfile
+from typing import Optional
+
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.logging.logger import Logger
+from shared_layer.logging.metrics import count
+
+logger = Logger()
+
+# ✅ Constants
+REDETECT_SAMPLE_BYTES = 64 * 1024   # bytes from the first undecodable one used to re-detect the encoding
+
+
+class DecodeHelper:
+    """Turns the raw bytes of an upload into text, shared by the CSV and TXT processors."""
+
+    @staticmethod
+    def decompress(file_content: bytes, compression: str) -> bytes:
+        """Decompresses a gzip, bz2 or (single-member) zip upload."""
+        if compression == "gzip":
+            return gzip.decompress(file_content)
+        if compression == "bz2":
+            return bz2.decompress(file_content)
+        if compression == "zip":
+            with zipfile.ZipFile(io.BytesIO(file_content)) as archive:
+                return archive.read(archive.namelist()[0])
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    @staticmethod
+    def decode(raw_content: bytes, encoding: Optional[str] = None) -> str:
+        """
+        Decodes `raw_content` strictly with `encoding` (UTF-8 when None, e.g. for compressed files).
+
+        The preflight guesses the encoding from the first 64 KB only. When a byte
+        further in does not decode, the encoding is re-detected from that byte on
+        and the content decoded with replacement characters, which are counted.
+        """
+        try:
+            return raw_content.decode(encoding or "utf-8-sig")
+        except UnicodeDecodeError as e:
+            fallback = S3Adapter.detect_encoding(raw_content[e.start:e.start + REDETECT_SAMPLE_BYTES])
+            logger.warning(f"⚠️ Content is not valid {encoding or 'utf-8'} at byte {e.start}; decoding as {fallback}")
+
+        text = raw_content.decode(fallback, errors="replace")
+        replaced = text.count("\ufffd")
+        if replaced:
+            count("decode", "ReplacedCharacters", replaced)
+            logger.warning(f"⚠️ {replaced} undecodable character(s) replaced")
+        return text
@@ -5,7 +5,8 @@ import json
 from pydantic import ValidationError
 from datetime import datetime
 from shared_layer.exceptions.error_handler import MetadataExtractionException
-from file_processor.model.routing_model import SQSEvent, S3Event
+from typing import List
+from file_processor.model.routing_model import SQSEvent, SQSMessageRecord, S3Event, S3Record
 from shared_layer.exceptions.error_handler import InvalidS3EventException
 from shared_layer.logging.logger import Logger
 
@@ -13,12 +14,25 @@ logger = Logger()  # Module-level logger
 
 class EventSourceHelper:
     @staticmethod
-    def parse_sqs_event(event: dict) -> S3Event:
-        """Parses and validates incoming SQS event to extract the embedded S3 event."""
+    def parse_sqs_records(event: dict) -> List[SQSMessageRecord]:
+        """Validates the SQS envelope and returns every record of the batch."""
         try:
-            sqs_event = SQSEvent.parse_obj(event)
-            s3_body_str = sqs_event.Records[0].body
-            s3_event_data = json.loads(s3_body_str)
+            return SQSEvent.parse_obj(event).Records
+        except ValidationError as e:
+            logger.error(f"❌ Validation failed while parsing SQS event: {str(e)}", exc_info=True)
+            raise InvalidS3EventException(
+                f"Event validation failed: {str(e)}",
+                error_code="S3_EVENT_VALIDATION_ERROR"
+            )
+
+    @staticmethod
+    def parse_s3_body(record: SQSMessageRecord) -> S3Event:
+        """Parses the S3 event carried in one SQS record. S3's `s3:TestEvent` yields no records."""
+        try:
+            s3_event_data = json.loads(record.body)
+            if isinstance(s3_event_data, dict) and s3_event_data.get("Event") == "s3:TestEvent":
+                logger.info(f"ℹ️ Skipping S3 test event in message {record.messageId}")
+                return S3Event(Records=[])
 
             return S3Event.parse_obj(s3_event_data)
 
@@ -36,10 +50,20 @@ class EventSourceHelper:
                 error_code="S3_JSON_DECODE_ERROR"
             )
 
+    @staticmethod
+    def parse_sqs_event(event: dict) -> S3Event:
+        """Parses and validates incoming SQS event to extract the embedded S3 event (first record only)."""
+        return EventSourceHelper.parse_s3_body(EventSourceHelper.parse_sqs_records(event)[0])
+
+    @staticmethod
     def extract_s3_metadata(s3_event: S3Event) -> dict:
-        """Extracts metadata from a validated S3Event."""
+        """Extracts metadata from the first record of a validated S3Event."""
+        return EventSourceHelper.extract_record_metadata(s3_event.Records[0])
+
+    @staticmethod
+    def extract_record_metadata(record: S3Record) -> dict:
+        """Extracts metadata from one S3 event record."""
         try:
-            record = s3_event.Records[0]
             bucket = record.s3.bucket.name
             s3_key = record.s3.object.key
             file_size = record.s3.object.size
@@ -73,7 +97,9 @@ class EventSourceHelper:
                 "file_size": file_size,
                 "event_time": event_time,
                 "file_format": file_format,
-                "status": "Received"
+                "status": "Received",
+                "etag": record.s3.object.eTag,
+                "sequencer": record.s3.object.sequencer
             }
 
         except Exception as e:
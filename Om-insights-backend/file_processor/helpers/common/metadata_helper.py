@@ -1,5 +1,7 @@
 # file_processor/helpers/common/metadata_helper.py
 
+from typing import Optional
+
 from shared_layer.logging.logger import Logger
 from shared_layer.repository.dynamo_repository import DynamoRepository
 from file_processor.model.file_metadata_dto import FileMetadataDTO
@@ -48,3 +50,38 @@ class MetadataHelper:
 
         except Exception as e:
             logger.error(f"❌ Failed to update routing-metadata status for {business_id}: {str(e)}", exc_info=True)
+
+    def start_shard_tracking(self, metadata: FileMetadataDTO, shard_count: int):
+        """Marks the file as Sharded and stores how many shard results to wait for."""
+        self.dynamo_client.start_shard_tracking(
+            business_id=metadata.company,
+            event_time=metadata.event_time,
+            shard_count=shard_count,
+            table_name=self.table_name
+        )
+
+    def record_shard_result(self, business_id: str, event_time: str, shard_index: int,
+                            succeeded: bool) -> Optional[str]:
+        """
+        Counts one finished shard. The worker whose shard completes the set moves
+        the file to Processed (or Partially Processed if any shard had failures)
+        and gets that status back; every other caller gets None.
+        """
+        progress = self.dynamo_client.record_shard_result(
+            business_id=business_id,
+            event_time=event_time,
+            shard_index=shard_index,
+            succeeded=succeeded,
+            table_name=self.table_name
+        )
+        if not progress:
+            return None
+        logger.info(f"🧩 Shard {shard_index} done for {business_id}: "
+                    f"{progress['completed_shards']}/{progress['shards_total']} complete")
+        if progress["completed_shards"] < progress["shards_total"]:
+            return None
+
+        final_status = "Processed" if progress["failed_shards"] == 0 else "Partially Processed"
+        if self.dynamo_client.complete_sharded_file(business_id, event_time, final_status, self.table_name):
+            return final_status
+        return None
@@ -0,0 +1,138 @@
+import codecs
+import csv
+import json
+from typing import Optional, Tuple
+
+from file_processor.model.file_metadata_dto import FileMetadataDTO
+from file_processor.model.workers_model import ParseHints
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.aws.adapters.sqs_adapter import MAX_MESSAGE_BYTES
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_SAMPLE_BYTES = 64 * 1024
+DEFAULT_INLINE_MAX_BYTES = 128 * 1024   # raw-size cap; the serialized message must also fit MAX_MESSAGE_BYTES
+
+INLINE = "inline"      # whole file travels in the worker message
+SINGLE = "single"      # one worker reads the file from S3
+SHARDED = "sharded"    # byte-range shards across workers
+
+MAGIC_NUMBERS = ((b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"PK\x03\x04", "zip"))
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+DELIMITERS = ",;\t|"
+
+
+def worker_message_body(file_metadata: FileMetadataDTO, hints: Optional[ParseHints],
+                        inline_content: Optional[str]) -> dict:
+    """The worker message for a routed file (sent as JSON by `SQSAdapter.send_batch_to_worker_queue`)."""
+    return {**file_metadata.dict(), "parse_hints": hints.dict() if hints else None, "inline_content": inline_content}
+
+
+class PreflightHelper:
+    """
+    Looks at the first few KB of an upload (one ranged GET) before routing it.
+
+    Detects compression, encoding, CSV delimiter and header, estimates the
+    row count from the average line width, and picks a processing tier:
+    `inline` when the sample already holds the whole (small, uncompressed)
+    file and the serialized worker message fits SQS, `sharded` when it is over the size threshold and can be split on
+    byte ranges, `single` otherwise. The result rides in the worker message
+    as `ParseHints`.
+    """
+
+    def __init__(self, s3_adapter: S3Adapter, config: dict):
+        self.s3_adapter = s3_adapter
+        preflight_config = (config.get("file_processing", {}) or {}).get("preflight", {}) or {}
+        self.sample_bytes = preflight_config.get("sample_bytes", DEFAULT_SAMPLE_BYTES)
+        self.inline_max_bytes = min(preflight_config.get("inline_max_bytes", DEFAULT_INLINE_MAX_BYTES),
+                                    DEFAULT_INLINE_MAX_BYTES)
+
+    def inspect(self, file_metadata: FileMetadataDTO, size_threshold: int) -> Tuple[ParseHints, Optional[str]]:
+        """Returns (hints, inline content or None)."""
+        file_size = file_metadata.file_size
+        if file_size <= 0:
+            return ParseHints(tier=SINGLE), None
+        sample = self.s3_adapter.get_object_range(
+            file_metadata.bucket, file_metadata.s3_key, 0, min(self.sample_bytes, file_size) - 1
+        )
+        complete = len(sample) >= file_size
+
+        compression = next((name for magic, name in MAGIC_NUMBERS if sample.startswith(magic)), None)
+        if compression:
+            # Compressed bytes can neither be sharded nor inlined; the worker decompresses the whole file
+            return ParseHints(tier=SINGLE, compression=compression), None
+
+        encoding = self._detect_encoding(sample, complete)
+        text = sample.decode(encoding, errors="ignore")
+        lines = text.splitlines(keepends=True)
+        if lines and not complete and not lines[-1].endswith(("\n", "\r")):
+            lines = lines[:-1]  # Drop the line cut off by the sample
+
+        hints = ParseHints(tier=SINGLE, encoding=encoding)
+        if lines:
+            sampled_bytes = sum(len(line.encode(encoding, errors="ignore")) for line in lines)
+            hints.avg_row_bytes = round(sampled_bytes / len(lines), 1)
+            hints.estimated_rows = len(lines) if complete else round(file_size / hints.avg_row_bytes)
+        if file_metadata.file_format == "csv" and lines:
+            self._detect_csv_layout(hints, lines)
+
+        inline_content = None
+        if complete and file_size <= self.inline_max_bytes:
+            inline_content = self._inline_content(file_metadata, hints, sample.decode(encoding, errors="replace"))
+        if inline_content is not None:
+            hints.tier = INLINE
+        elif file_size > size_threshold and not encoding.startswith("utf-16"):
+            hints.tier = SHARDED  # Byte-range shards split on b"\n", which UTF-16 text cannot use
+
+        logger.info({
+            "message": f"🔎 Preflight for {file_metadata.s3_key}",
+            "file_size": file_size,
+            **hints.dict(exclude={"header"})
+        })
+        return hints, inline_content
+
+    @staticmethod
+    def _inline_content(file_metadata: FileMetadataDTO, hints: ParseHints, content: str) -> Optional[str]:
+        """
+        `content` if the worker message carrying it fits in one SQS message, else None.
+        Measured on the JSON body as sent: escaping (non-ASCII, quotes, control
+        characters) can make it several times larger than the raw file.
+        """
+        body = worker_message_body(file_metadata, hints.copy(update={"tier": INLINE}), content)
+        message_bytes = len(json.dumps(body, default=str).encode("utf-8"))
+        if message_bytes > MAX_MESSAGE_BYTES:
+            logger.info(f"ℹ️ {file_metadata.s3_key} is too large to inline once serialized ({message_bytes} bytes)")
+            return None
+        return content
+
+    @staticmethod
+    def _detect_encoding(sample: bytes, complete: bool) -> str:
+        for bom, encoding in BOMS:
+            if sample.startswith(bom):
+                return encoding
+        try:
+            # Incremental decoding tolerates a sample cut inside a multi-byte character
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+            return "utf-8"
+        except UnicodeDecodeError:
+            pass
+        return S3Adapter.detect_encoding(sample)
+
+    @staticmethod
+    def _detect_csv_layout(hints: ParseHints, lines: list) -> None:
+        text = "".join(lines[:50])
+        try:
+            dialect = csv.Sniffer().sniff(text, delimiters=DELIMITERS)
+            hints.delimiter = dialect.delimiter
+        except csv.Error:
+            hints.delimiter = ","
+        try:
+            hints.has_header = csv.Sniffer().has_header(text)
+        except csv.Error:
+            hints.has_header = True  # The CSV processor expects a header row
+        # The CSV processor always reads the first line as the header; shards reuse it from here
+        hints.header = lines[0].rstrip("\r\n")
+        if hints.has_header and hints.estimated_rows:
+            hints.estimated_rows = max(hints.estimated_rows - 1, 0)
@@ -0,0 +1,67 @@
+from typing import List, Optional, Tuple
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_SHARD_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_SHARDS = 1000
+DEFAULT_TAIL_BYTES = 64 * 1024   # read past the range end in steps of this size to finish the last line
+
+
+class ShardHelper:
+    """
+    Byte-range shards of one large S3 object.
+
+    The router only does arithmetic: `plan()` cuts the object into equal
+    ranges without reading it. Workers align their own range: a shard owns
+    every line whose first byte falls inside [byte_start, byte_end), so it
+    skips the partial line it starts in (the previous shard finishes it) and
+    reads past its end until its last line is complete. Together the shards
+    cover every line exactly once. Quoted CSV fields spanning lines are not
+    supported in sharded files.
+    """
+
+    @staticmethod
+    def plan(file_size: int, shard_bytes: int = DEFAULT_SHARD_BYTES,
+             max_shards: int = DEFAULT_MAX_SHARDS) -> List[Tuple[int, int]]:
+        """Returns the [start, end) byte ranges; shards grow past `shard_bytes` to stay under `max_shards`."""
+        shard_bytes = max(shard_bytes, -(-file_size // max_shards))
+        return [(start, min(start + shard_bytes, file_size)) for start in range(0, file_size, shard_bytes)]
+
+    @staticmethod
+    def read_shard(s3_adapter, bucket: str, key: str, byte_start: int, byte_end: int, file_size: int,
+                   tail_bytes: int = DEFAULT_TAIL_BYTES) -> bytes:
+        """Returns the complete lines owned by the [byte_start, byte_end) shard."""
+        read_from = byte_start - 1 if byte_start > 0 else 0   # one byte back: is byte_start a line start?
+        read_to = min(byte_end + tail_bytes, file_size)
+        data = s3_adapter.get_object_range(bucket, key, read_from, read_to - 1)
+
+        def find_newline(offset: int) -> int:
+            """Finds the next newline at or after `offset`, reading further ahead as needed."""
+            nonlocal data, read_to
+            position = data.find(b"\n", offset)
+            while position == -1 and read_to < file_size:
+                next_to = min(read_to + tail_bytes, file_size)
+                data += s3_adapter.get_object_range(bucket, key, read_to, next_to - 1)
+                read_to = next_to
+                position = data.find(b"\n", offset)
+            return position
+
+        first = 0
+        if byte_start > 0:
+            first = find_newline(0) + 1
+            if first == 0 or read_from + first >= byte_end:
+                return b""  # No line starts inside this shard
+
+        # The last owned line is the one holding byte_end - 1
+        last_newline = find_newline(byte_end - 1 - read_from)
+        return data[first:] if last_newline == -1 else data[first:last_newline + 1]
+
+    @staticmethod
+    def read_header(s3_adapter, bucket: str, key: str, file_size: int,
+                    tail_bytes: int = DEFAULT_TAIL_BYTES) -> Optional[bytes]:
+        """First line of the object (the CSV header), including its newline."""
+        header = ShardHelper.read_shard(s3_adapter, bucket, key, 0, 1, file_size, tail_bytes)
+        return header or None
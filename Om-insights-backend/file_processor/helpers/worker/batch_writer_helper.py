@@ -1,3 +1,4 @@
+from shared_layer.logging.metrics import Span, count
 from shared_layer.repository.dynamo_repository import DynamoRepository
 
 
@@ -22,22 +23,31 @@ class BatchWriterHelper:
         """
         total_records = 0
         failed_records = 0
+        # ✅ Marshalling and writes interleave; each span only accumulates its own time
+        marshal_span, write_span = Span("item_marshalling"), Span("dynamo_write")
 
         self.dynamo_client.ensure_table_exists(table_name)
         for batch in structured_data:
             batch_items = []
 
             for record in batch:
-                item = record_to_item_fn(record)
+                with marshal_span:
+                    item = record_to_item_fn(record)
                 batch_items.append({"PutRequest": {"Item": item}})
 
                 if len(batch_items) >= batch_size:
-                    failed_records += self.dynamo_client.batch_write_items(table_name, batch_items)
+                    with write_span:
+                        failed_records += self.dynamo_client.batch_write_items(table_name, batch_items)
                     total_records += len(batch_items)
                     batch_items = []
 
             if batch_items:
-                failed_records += self.dynamo_client.batch_write_items(table_name, batch_items)
+                with write_span:
+                    failed_records += self.dynamo_client.batch_write_items(table_name, batch_items)
                 total_records += len(batch_items)
 
+        marshal_span.add(rows=total_records).emit()
+        write_span.add(rows=total_records).emit()
+        if failed_records:
+            count("dynamo_write", "FailedItems", failed_records)
         return total_records, failed_records
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+
+class SQSBatchHelper:
+    """
+    Runs a worker handler over every record of an SQS batch.
+
+    `handle_record(record)` returns True when the record is done (processed,
+    skipped, or permanently invalid) and False when SQS should redeliver it;
+    an exception counts as False. The result is the Lambda partial batch
+    response, so only the failed messages are redriven.
+    """
+
+    @staticmethod
+    def process(records: List[dict], handle_record: Callable[[dict], bool], max_workers: int = 1) -> Dict:
+        if max_workers > 1 and len(records) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(records)),
+                                    thread_name_prefix="sqs-record") as executor:
+                outcomes = list(executor.map(lambda record: SQSBatchHelper._run(handle_record, record), records))
+        else:
+            outcomes = [SQSBatchHelper._run(handle_record, record) for record in records]
+
+        failed = [record.get("messageId") for record, succeeded in zip(records, outcomes) if not succeeded]
+        logger.info(f"📬 Processed {len(records)} SQS record(s): {len(records) - len(failed)} done, {len(failed)} to retry")
+        return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]}
+
+    @staticmethod
+    def _run(handle_record: Callable[[dict], bool], record: dict) -> bool:
+        try:
+            return bool(handle_record(record))
+        except Exception:
+            logger.exception(f"❌ SQS record {record.get('messageId')} failed")
+            return False
@@ -90,12 +90,26 @@ class BaseInfrastructureStack(Stack):
             self.tables[table_name] = table
             # Output the table name for use in other stacks
             CfnOutput(self, f"{table_name.capitalize()}TableName", value=table.table_name)
+
+        # Key-value tables (on-demand, TTL-expired) for caches and processing state
+        self.embedding_cache_table = self._create_key_value_table(
+            "EmbeddingCacheTable", self.config["embedding_cache_table"], partition_key="cache_key"
+        )
+        self.idempotency_table = self._create_key_value_table(
+            "IdempotencyTable", self.config["idempotency_table"], partition_key="idempotency_key"
+        )
+        self.tenant_placement_table = self._create_key_value_table(
+            "TenantPlacementTable", self.config["tenant_placement_table"], partition_key="tenant_key"
+        )
         # --------------------------------------------------------------------------------
         # 8) OUTPUTS
         # --------------------------------------------------------------------------------
         CfnOutput(self, "BucketName", value=self.file_bucket.bucket_name)
         CfnOutput(self, "LambdaRoleArn", value=self.lambda_role.role_arn)
         CfnOutput(self, "FileMetadataTableName", value=self.file_metadata_table.table_name)
+        CfnOutput(self, "EmbeddingCacheTableName", value=self.embedding_cache_table.table_name)
+        CfnOutput(self, "IdempotencyTableName", value=self.idempotency_table.table_name)
+        CfnOutput(self, "TenantPlacementTableName", value=self.tenant_placement_table.table_name)
 
     # ------------------------------------------------------------------------------------
     # HELPER METHODS FOR RESOURCE CREATION
@@ -200,7 +214,7 @@ class BaseInfrastructureStack(Stack):
                     queue_name,
                     queue_name=queue_name,
                     retention_period=Duration.days(4),
-                    visibility_timeout=Duration.seconds(75),
+                    visibility_timeout=Duration.seconds(75),  # ✅ > routing timeout + idempotency claim margin
                     dead_letter_queue=sqs.DeadLetterQueue(
                         max_receive_count=2,
                         queue=dlq
@@ -247,7 +261,7 @@ class BaseInfrastructureStack(Stack):
                 self,
                 f"{queue_id}Queue",
                 queue_name=final_queue_name,
-                visibility_timeout=Duration.seconds(300),
+                visibility_timeout=Duration.seconds(300),  # ✅ > worker timeout + idempotency claim margin
                 dead_letter_queue=sqs.DeadLetterQueue(
                     max_receive_count=2,  # ✅ Move to DLQ after 5 failures
                     queue=dlq
@@ -260,6 +274,26 @@ class BaseInfrastructureStack(Stack):
             CfnOutput(self, f"{queue_id}QueueName", value=queue.queue_name)
             CfnOutput(self, f"{queue_id}DLQName", value=dlq.queue_name)
 
+            # ✅ One queue per subscription tier, so tiers are scheduled (and capped) independently
+            for tier in self.config["subscription_tiers"]:
+                tier_queue_name = f"{self.project_name}-{queue_id.lower()}-{tier}-{self.env_name}"
+                tier_dlq = sqs.Queue(
+                    self,
+                    f"{queue_id}{tier.capitalize()}DLQ",
+                    queue_name=f"{tier_queue_name}-dlq",
+                    retention_period=Duration.days(14),
+                    removal_policy=RemovalPolicy.RETAIN
+                )
+                tier_queue = sqs.Queue(
+                    self,
+                    f"{queue_id}{tier.capitalize()}Queue",
+                    queue_name=tier_queue_name,
+                    visibility_timeout=Duration.seconds(300),
+                    dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=2, queue=tier_dlq)
+                )
+                worker_queues[f"{normalized_name}_{tier}"] = tier_queue
+                CfnOutput(self, f"{queue_id}{tier.capitalize()}QueueName", value=tier_queue.queue_name)
+
         return worker_queues
 
     def _create_lambda_execution_role(self) -> iam.Role:
@@ -593,4 +627,21 @@ class BaseInfrastructureStack(Stack):
             # Grant read/write permissions to Lambda function
             new_table.grant_read_write_data(self.lambda_role)
 
-            return new_table
\ No newline at end of file
+            return new_table
+
+    def _create_key_value_table(self, construct_id: str, table_name: str, partition_key: str) -> dynamodb.ITable:
+        """
+        Create an on-demand table keyed by a single string attribute, with items expiring via `ttl`.
+        Used for caches and processing state whose traffic is bursty and unpredictable.
+        """
+        table = dynamodb.Table(
+            self,
+            construct_id,
+            table_name=table_name,
+            partition_key=dynamodb.Attribute(name=partition_key, type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.RETAIN,
+            time_to_live_attribute="ttl",
+        )
+        table.grant_read_write_data(self.lambda_role)
+        return table
@@ -64,7 +64,8 @@ class FileProcessingStack(Stack):
                 "S3_BUCKET_NAME": file_bucket.bucket_name,
                 **{f"{queue_name}_queue_url".upper(): queue.queue_url for queue_name, queue in
                    worker_sqs_queues.items()},  # Uppercase keys
-                "LOG_LEVEL": "DEBUG"
+                "LOG_LEVEL": "DEBUG",
+                "LAMBDA_TIMEOUT_SECONDS": str(lambda_timeout)  # ✅ Idempotency claims outlive the Lambda just so
             },
             security_groups=[lambda_security_group],  # ✅ Attach Lambda's EFS Security Group
             filesystem=lambda_.FileSystem.from_efs_access_point(
@@ -93,7 +94,8 @@ class FileProcessingStack(Stack):
                 target=self.routing_lambda,
                 event_source_arn=queue.queue_arn,
                 batch_size=5,
-                max_batching_window=Duration.seconds(30)
+                max_batching_window=Duration.seconds(30),
+                report_batch_item_failures=True  # ✅ Redeliver only the records the router failed
             )
 
         # ✅ Outputs
@@ -10,7 +10,10 @@ from aws_cdk import (
     aws_efs as efs,  # ✅ Import EFS
     aws_ec2 as ec2,  # ✅ Required for Security Groups
     aws_opensearchserverless as aoss,
-    Duration, Size
+    aws_cloudwatch as cloudwatch,
+    aws_events as events,
+    aws_events_targets as targets,
+    Duration, Size, CfnOutput
 )
 from aws_cdk.aws_lambda_event_sources import SqsEventSource
 from constructs import Construct
@@ -42,41 +45,11 @@ class ProcessingLambdasStack(Stack):
         self.node.add_dependency(efs_file_system)
         # Create Lambda functions dynamically
         for key, lambda_config in config["lambda_functions"].items():
-            handler = lambda_config.get("handler")
-            if not handler:
-                raise ValueError(f"No handler defined for Lambda '{key}' in config")
-
-            handler_cmd = [handler]
-
-            # ✅ Create the Docker-based Lambda function with EFS
-            lambda_function = lambda_.DockerImageFunction(
-                self,
-                f"{key.capitalize()}ProcessingLambda",
-                function_name=f"{project_name}-{lambda_config['function_name_suffix']}-{environment}",
-                code=lambda_.DockerImageCode.from_ecr(
-                    repository=repository,
-                    tag_or_digest=image_tag,
-                    cmd=handler_cmd
-                ),
-                timeout=Duration.seconds(lambda_config.get("timeout", 240)),
-                memory_size=lambda_config.get("memory", 1024),
-                ephemeral_storage_size=Size.mebibytes(lambda_config.get("ephemeral_storage", 4096)),
-                # ✅ 4GB Ephemeral Storage
-                role=lambda_role,
-                log_retention=logs.RetentionDays.ONE_WEEK,
-                environment=lambda_config["env_vars"],
-                vpc=vpc,  # ✅ Ensure Lambda is inside the VPC
-                security_groups=[lambda_security_group],  # ✅ Attach Lambda's EFS Security Group
-                filesystem=lambda_.FileSystem.from_efs_access_point(
-                    efs_access_point,
-                    "/mnt/efs"  # ✅ Mount EFS inside the Lambda
-                )
+            lambda_function = self._create_function(
+                f"{key.capitalize()}ProcessingLambda", lambda_config, project_name, environment, repository,
+                image_tag, vpc, lambda_role, lambda_security_group, efs_file_system, efs_access_point
             )
 
-            # ✅ Ensure Lambda waits for EFS
-            lambda_function.node.add_dependency(efs_file_system)
-            lambda_function.node.add_dependency(efs_access_point)
-
             # If the user sets a provisioned concurrency > 0, add an alias with that concurrency
             prov_concurrency = lambda_config.get("provisioned_concurrency", 0)
             if prov_concurrency > 0:
@@ -94,7 +67,97 @@ class ProcessingLambdasStack(Stack):
                 lambda_function.add_event_source(SqsEventSource(
                     queue,
                     batch_size=5,
-                    max_batching_window=Duration.seconds(30)
+                    max_batching_window=Duration.seconds(30),
+                    report_batch_item_failures=True  # ✅ Redrive only the records the worker failed
                 ))
             else:
-                raise ValueError(f"SQS queue '{key}' not found in provided queues dict.")
\ No newline at end of file
+                raise ValueError(f"SQS queue '{key}' not found in provided queues dict.")
+
+            # ✅ Per-tier queues: each tier gets its own concurrency cap and a queue-age alarm
+            for tier, tier_config in config.get("tier_scheduling", {}).items():
+                tier_queue = sqs_queues.get(f"{queue_key}_{tier}")
+                if tier_queue is None:
+                    continue
+                tier_queue.grant_consume_messages(lambda_function)
+                lambda_function.add_event_source(SqsEventSource(
+                    tier_queue,
+                    batch_size=tier_config.get("batch_size", 5),
+                    max_batching_window=Duration.seconds(tier_config.get("max_batching_window_seconds", 30)),
+                    max_concurrency=tier_config["max_concurrency"],
+                    report_batch_item_failures=True
+                ))
+                self._add_queue_age_alarm(key, tier, tier_queue, tier_config["latency_target_seconds"])
+
+        # ✅ Scheduled jobs (same image, VPC and EFS mount, no queue), e.g. the hot-tenant snapshot export
+        for key, function_config in config.get("scheduled_functions", {}).items():
+            scheduled_function = self._create_function(
+                f"{key.title().replace('_', '')}ScheduledLambda", function_config, project_name, environment,
+                repository, image_tag, vpc, lambda_role, lambda_security_group, efs_file_system, efs_access_point
+            )
+            events.Rule(
+                self,
+                f"{key.title().replace('_', '')}Schedule",
+                schedule=events.Schedule.expression(function_config["schedule"]),
+                targets=[targets.LambdaFunction(scheduled_function)]
+            )
+
+    def _create_function(self, construct_id: str, lambda_config: dict, project_name: str, environment: str,
+                         repository, image_tag: str, vpc: ec2.Vpc, lambda_role: iam.Role,
+                         lambda_security_group: ec2.SecurityGroup, efs_file_system: efs.FileSystem,
+                         efs_access_point: efs.AccessPoint) -> lambda_.DockerImageFunction:
+        handler = lambda_config.get("handler")
+        if not handler:
+            raise ValueError(f"No handler defined for Lambda '{construct_id}' in config")
+
+        handler_cmd = [handler]
+
+        # ✅ Create the Docker-based Lambda function with EFS
+        lambda_function = lambda_.DockerImageFunction(
+            self,
+            construct_id,
+            function_name=f"{project_name}-{lambda_config['function_name_suffix']}-{environment}",
+            code=lambda_.DockerImageCode.from_ecr(
+                repository=repository,
+                tag_or_digest=image_tag,
+                cmd=handler_cmd
+            ),
+            timeout=Duration.seconds(lambda_config.get("timeout", 240)),
+            memory_size=lambda_config.get("memory", 1024),
+            ephemeral_storage_size=Size.mebibytes(lambda_config.get("ephemeral_storage", 4096)),
+            # ✅ 4GB Ephemeral Storage
+            role=lambda_role,
+            log_retention=logs.RetentionDays.ONE_WEEK,
+            environment={
+                **lambda_config["env_vars"],
+                "LAMBDA_TIMEOUT_SECONDS": str(lambda_config.get("timeout", 240))  # ✅ Sizes idempotency claims
+            },
+            vpc=vpc,  # ✅ Ensure Lambda is inside the VPC
+            security_groups=[lambda_security_group],  # ✅ Attach Lambda's EFS Security Group
+            filesystem=lambda_.FileSystem.from_efs_access_point(
+                efs_access_point,
+                "/mnt/efs"  # ✅ Mount EFS inside the Lambda
+            )
+        )
+
+        # ✅ Ensure Lambda waits for EFS
+        lambda_function.node.add_dependency(efs_file_system)
+        lambda_function.node.add_dependency(efs_access_point)
+        return lambda_function
+
+    def _add_queue_age_alarm(self, key: str, tier: str, queue, latency_target_seconds: int) -> None:
+        """Alarms when the oldest message of a tier's queue has waited longer than the tier's latency target."""
+        age_metric = queue.metric_approximate_age_of_oldest_message(
+            period=Duration.minutes(1),
+            statistic="Maximum"
+        )
+        alarm = cloudwatch.Alarm(
+            self,
+            f"{key.capitalize()}{tier.capitalize()}QueueAgeAlarm",
+            alarm_description=f"{key} {tier}-tier uploads are waiting longer than {latency_target_seconds}s",
+            metric=age_metric,
+            threshold=latency_target_seconds,
+            evaluation_periods=3,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+        )
+        CfnOutput(self, f"{key.capitalize()}{tier.capitalize()}QueueAgeAlarmName", value=alarm.alarm_name)
\ No newline at end of file
@@ -1,8 +1,9 @@
 # file_processor/model/file_metadata_dto.py
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
+from file_processor.model.workers_model import ParseHints
 from shared_layer.model.DynamoDBSerializable import DynamoDBSerializable
 
 
@@ -20,6 +21,9 @@ class FileMetadataDTO(DynamoDBSerializable):
     s3_key: str
     bucket: str
     status: str
+    # ✅ Identify one S3 object version / notification (idempotency keys)
+    etag: Optional[str] = None
+    sequencer: Optional[str] = None
 
     class Config:
         allow_population_by_field_name = True
@@ -35,6 +39,20 @@ class ProcessingContext(BaseModel):
     business_region: str
     subscription_type: str = Field(..., alias='subscription')
     status: str
+    file_size: Optional[int] = None
+    etag: Optional[str] = None
+    sequencer: Optional[str] = None
+    parse_hints: Optional[ParseHints] = None
+    inline_content: Optional[str] = None
+    # ✅ Set only when this context is one byte-range shard of a large file
+    shard_index: Optional[int] = None
+    shard_count: Optional[int] = None
+    byte_start: Optional[int] = None
+    byte_end: Optional[int] = None
+
+    @property
+    def is_shard(self) -> bool:
+        return self.shard_count is not None and self.byte_start is not None
 
     class Config:
         allow_population_by_field_name = True
\ No newline at end of file
@@ -1,10 +1,22 @@
 # ✅ Define Pydantic Model for SQS Message
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
 
+class ParseHints(BaseModel):
+    """What the router's preflight learned about a file, so workers skip re-detection."""
+    tier: str = Field(..., title="Processing tier (inline, single, sharded)")
+    compression: Optional[str] = Field(None, title="gzip, bz2 or zip; None when uncompressed")
+    encoding: str = Field("utf-8", title="Text encoding")
+    delimiter: Optional[str] = Field(None, title="CSV delimiter")
+    has_header: Optional[bool] = Field(None, title="Whether the first line is a header")
+    header: Optional[str] = Field(None, title="Header line (without the newline)")
+    avg_row_bytes: Optional[float] = Field(None, title="Average line width in the sample")
+    estimated_rows: Optional[int] = Field(None, title="File size / average line width")
+
+
 class SQSMessage(BaseModel):
     bucket: str = Field(..., title="S3 Bucket Name")
     s3_key: str = Field(..., title="S3 Object Key")
@@ -16,6 +28,16 @@ class SQSMessage(BaseModel):
     event_time: datetime = Field(..., title="Event Timestamp")
     file_format: str = Field(..., title="File Format (csv, txt, etc.)")
     status: str = Field(..., title="Processing Status")
+    etag: Optional[str] = Field(None, title="S3 Object ETag")
+    sequencer: Optional[str] = Field(None, title="S3 Event Sequencer")
+    parse_hints: Optional[ParseHints] = Field(None, title="Router preflight results")
+    inline_content: Optional[str] = Field(None, title="Whole file content, for files small enough to inline")
+
+    # ✅ Set only when this message is one byte-range shard of a large file
+    shard_index: Optional[int] = None
+    shard_count: Optional[int] = None
+    byte_start: Optional[int] = None
+    byte_end: Optional[int] = None
 
 class SQSRecords(BaseModel):
     Records: List[dict] = Field(..., title="List of SQS Records")
@@ -32,6 +54,20 @@ class ProcessingContext(BaseModel):
     business_region: str
     subscription_type: str = Field(..., alias='subscription')
     status: str
+    file_size: Optional[int] = None
+    etag: Optional[str] = None
+    sequencer: Optional[str] = None
+    parse_hints: Optional[ParseHints] = None
+    inline_content: Optional[str] = None
+    # ✅ Set only when this context is one byte-range shard of a large file
+    shard_index: Optional[int] = None
+    shard_count: Optional[int] = None
+    byte_start: Optional[int] = None
+    byte_end: Optional[int] = None
+
+    @property
+    def is_shard(self) -> bool:
+        return self.shard_count is not None and self.byte_start is not None
 
     class Config:
         allow_population_by_field_name = True
\ No newline at end of file
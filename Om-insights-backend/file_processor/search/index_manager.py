@@ -1,10 +1,19 @@
+import copy
 import os
 import json
+from functools import lru_cache
 
 class IndexTemplateManager:
+    @staticmethod
     def get_template(index_name: str) -> dict:
-        """Load the index template JSON from shared index_templates folder"""
+        """Load the index template JSON from shared index_templates folder (read once per process)"""
+        # Callers may mutate the template, so hand out a copy of the cached one
+        return copy.deepcopy(IndexTemplateManager._read_template(index_name))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _read_template(index_name: str) -> dict:
         base_path = os.path.join(os.path.dirname(__file__), "index_templates")
         path = os.path.join(base_path, f"{index_name}.json")
         with open(path, "r") as f:
-            return json.load(f)
\ No newline at end of file
+            return json.load(f)
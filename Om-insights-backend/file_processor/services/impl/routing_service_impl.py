@@ -1,76 +1,202 @@
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from file_processor.services.routing_service.routing_service import RoutingService
 from file_processor.helpers.common.event_source_helper import EventSourceHelper
 from file_processor.helpers.common.metadata_helper import MetadataHelper
+from file_processor.helpers.common.preflight_helper import SHARDED, SINGLE, PreflightHelper, worker_message_body
+from file_processor.helpers.common.shard_helper import DEFAULT_MAX_SHARDS, DEFAULT_SHARD_BYTES, ShardHelper
 from file_processor.model.file_metadata_dto import FileMetadataDTO
-from shared_layer.model.response import Response
+from file_processor.model.workers_model import ParseHints
 
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
 from shared_layer.aws.adapters.sqs_adapter import SQSAdapter
+from shared_layer.cache.idempotency_store import DUPLICATE_COMPLETED, DUPLICATE_IN_PROGRESS, IdempotencyStore
+from shared_layer.cache.parameter_cache import ParameterCache
 from shared_layer.logging.logger import Logger
+from shared_layer.logging.metrics import metric_tags, span
 from shared_layer.exceptions.exception_handler import ExceptionHandler, UnrecognizedFileTypeException
+from shared_layer.exceptions.error_handler import MetadataExtractionException
 from shared_layer.repository.dynamo_repository import DynamoRepository
 
 logger = Logger()
 
+DEFAULT_SIZE_THRESHOLD = 10 * 1024 * 1024  # 10MB, used when SSM is unavailable
+DEFAULT_TIER = "free"
+
+# Failures that a redelivery cannot fix: the file is marked Failed and its SQS record is not retried
+PERMANENT_ROUTING_ERRORS = (UnrecognizedFileTypeException, MetadataExtractionException)
+
 class RoutingServiceImpl(RoutingService):
-    def __init__(self, dynamo_repository: DynamoRepository, sqs_adapter: SQSAdapter, ssm_client, config: dict):
+    def __init__(self, dynamo_repository: DynamoRepository, sqs_adapter: SQSAdapter, parameter_cache: ParameterCache,
+                 config: dict, idempotency_store: Optional[IdempotencyStore] = None,
+                 s3_adapter: Optional[S3Adapter] = None):
         self.dynamo_repository = dynamo_repository
         self.sqs_adapter = sqs_adapter
-        self.ssm_client = ssm_client
+        self.parameter_cache = parameter_cache
         self.config = config
+        self.idempotency_store = idempotency_store or IdempotencyStore()
         self.metadata_updater = MetadataHelper(self.dynamo_repository, config)
+        self.preflight = PreflightHelper(s3_adapter, config) if s3_adapter else None
 
-    def route_file(self, event: dict) -> Dict:
-        file_metadata = None
-        try:
-            logger.info("📦 Starting file routing...")
-            s3_event = EventSourceHelper.parse_sqs_event(event)
-            file_metadata_dict = EventSourceHelper.extract_s3_metadata(s3_event)
-            file_metadata = FileMetadataDTO(**file_metadata_dict)
+    def route_batch(self, event: dict) -> Dict:
+        """
+        Routes every S3 object of every SQS record in the batch.
 
-            size_threshold = self.get_file_size_threshold()
-            self.metadata_updater.store_metadata(file_metadata)
+        Each file goes to its data type's queue for the uploader's subscription
+        tier, so a free-tier backfill queues behind its own tier's concurrency
+        cap instead of delaying pro uploads. Files bound for the same queue are
+        sent together with SendMessageBatch. Only records that hit a transient
+        failure are reported in `batchItemFailures`, so SQS redelivers just
+        those; files that can never be routed (bad path, unknown type) are
+        marked Failed and not retried. Duplicate S3 notifications (same
+        bucket/key/eTag/sequencer) are skipped after one conditional write.
+        With an S3 adapter, a ranged-GET preflight picks each file's tier
+        (inline / single / sharded) and attaches parse hints for the worker.
+        """
+        records = EventSourceHelper.parse_sqs_records(event)
+        logger.info(f"📦 Starting routing of {len(records)} SQS record(s)...")
 
-            if file_metadata.file_size > size_threshold:
-                return self._process_large_file(file_metadata)
-            else:
-                return self._route_to_worker_queue(file_metadata)
+        failed_message_ids = set()
+        outbound: Dict[str, List[Tuple[str, FileMetadataDTO, str, dict]]] = defaultdict(list)
+        size_threshold = None
+        files = sharded = duplicates = 0
 
-        except Exception as e:
-            return ExceptionHandler.handle("route_file", e, self.metadata_updater, file_metadata)
+        for record in records:
+            try:
+                s3_event = EventSourceHelper.parse_s3_body(record)
+            except Exception as e:
+                ExceptionHandler.handle("route_batch", e)
+                failed_message_ids.add(record.messageId)
+                continue
 
-    def _process_large_file(self, file_metadata: FileMetadataDTO) -> Dict:
-        try:
-            logger.info(f"File size {file_metadata.file_size} exceeds threshold. Sending to AWS Batch.")
-            result = self.submit_aws_batch_queue_job(file_metadata)
-            self.metadata_updater.update_status(file_metadata, "BatchProcessing")
-            return result
-        except Exception as e:
-            return ExceptionHandler.handle("_process_large_file", e, self.metadata_updater, file_metadata)
+            for s3_record in s3_event.Records:
+                files += 1
+                file_metadata = idempotency_key = None
+                try:
+                    file_metadata = FileMetadataDTO(**EventSourceHelper.extract_record_metadata(s3_record))
+
+                    # ✅ One conditional write decides whether this notification was already routed
+                    idempotency_key = IdempotencyStore.key("route", file_metadata.bucket, file_metadata.s3_key,
+                                                           file_metadata.etag, file_metadata.sequencer)
+                    claim = self.idempotency_store.begin(idempotency_key)
+                    if claim == DUPLICATE_COMPLETED:
+                        logger.info(f"⏭️ Skipping duplicate notification for {file_metadata.s3_key}")
+                        duplicates += 1
+                        continue
+                    if claim == DUPLICATE_IN_PROGRESS:
+                        logger.info(f"⏳ {file_metadata.s3_key} is being routed by another invocation; retrying later")
+                        failed_message_ids.add(record.messageId)
+                        continue
+
+                    self.metadata_updater.store_metadata(file_metadata)
 
-    def _route_to_worker_queue(self, file_metadata: FileMetadataDTO) -> Dict:
+                    if size_threshold is None:
+                        size_threshold = self.get_file_size_threshold()  # ✅ Once per batch
+                    data_type = file_metadata.data_type.lower()
+                    if data_type not in self.config["queues"]:
+                        raise UnrecognizedFileTypeException(file_metadata.s3_key)
+                    queue_name = self.sqs_adapter.resolve_worker_queue(data_type, self._tier(file_metadata))
+                    hints, inline_content = self._preflight(file_metadata, size_threshold)
+                    tier = hints.tier if hints else (SHARDED if file_metadata.file_size > size_threshold else SINGLE)
+                    if tier == SHARDED:
+                        self._process_large_file(queue_name, file_metadata, hints)
+                        self.idempotency_store.complete(idempotency_key)
+                        sharded += 1
+                    else:
+                        body = worker_message_body(file_metadata, hints, inline_content)
+                        outbound[queue_name].append((record.messageId, file_metadata, idempotency_key, body))
+                except PERMANENT_ROUTING_ERRORS as e:
+                    ExceptionHandler.handle("route_batch", e, self.metadata_updater, file_metadata)
+                    self.idempotency_store.complete(idempotency_key)  # Never routable: don't retry duplicates
+                except Exception as e:
+                    ExceptionHandler.handle("route_batch", e, self.metadata_updater, file_metadata)
+                    self.idempotency_store.release(idempotency_key)
+                    failed_message_ids.add(record.messageId)
+
+        routed = 0
+        for queue_name, entries in outbound.items():
+            failures = self.sqs_adapter.send_batch_to_worker_queue(
+                queue_name, [(str(i), body) for i, (_, _, _, body) in enumerate(entries)]
+            )
+            for i, (message_id, file_metadata, idempotency_key, _) in enumerate(entries):
+                if str(i) in failures:
+                    logger.error(f"❌ Failed to route {file_metadata.s3_key} to {queue_name}: {failures[str(i)]}")
+                    self.metadata_updater.update_status(file_metadata, "Failed")
+                    self.idempotency_store.release(idempotency_key)
+                    failed_message_ids.add(message_id)
+                else:
+                    self.metadata_updater.update_status(file_metadata, "Routed")
+                    self.idempotency_store.complete(idempotency_key)
+                    routed += 1
+
+        logger.info({
+            "message": "✅ Routing batch complete",
+            "sqs_records": len(records),
+            "files": files,
+            "routed": routed,
+            "sharded": sharded,
+            "duplicates": duplicates,
+            "failed_records": len(failed_message_ids)
+        })
+        return {
+            "batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failed_message_ids)],
+            "routed": routed,
+            "sharded": sharded,
+            "duplicates": duplicates
+        }
+
+    def _tier(self, file_metadata: FileMetadataDTO) -> str:
+        """Subscription tier parsed from the S3 key; unknown tiers are scheduled as the default tier."""
+        tier_config = self.config.get("subscription_tiers", {}) or {}
+        tier = (file_metadata.subscription or "").lower()
+        return tier if tier in (tier_config.get("tiers") or []) else tier_config.get("default", DEFAULT_TIER)
+
+    def _preflight(self, file_metadata: FileMetadataDTO,
+                   size_threshold: int) -> Tuple[Optional[ParseHints], Optional[str]]:
+        """Parse hints and inline content from a ranged GET; (None, None) routes by the size threshold alone."""
+        if not self.preflight:
+            return None, None
         try:
-            data_type = file_metadata.data_type.lower()
-            if data_type in self.config["queues"]:
-                result = self.sqs_adapter.send_to_worker_queue(data_type, file_metadata.dict())
-                self.metadata_updater.update_status(file_metadata, "Routed")
-                return result
-            else:
-                raise UnrecognizedFileTypeException(file_metadata.s3_key)
+            with metric_tags(data_type=file_metadata.data_type, business_id=file_metadata.company,
+                             tier=self._tier(file_metadata)), span("preflight"):
+                return self.preflight.inspect(file_metadata, size_threshold)
         except Exception as e:
-            return ExceptionHandler.handle("_route_to_worker_queue", e, self.metadata_updater, file_metadata)
+            logger.warning(f"⚠️ Preflight failed for {file_metadata.s3_key}, routing by size: {e}")
+            return None, None
 
-    def submit_aws_batch_queue_job(self, file_metadata: FileMetadataDTO) -> Dict:
-        return Response(
-            status="Sent to AWS Batch",
-            metadata=file_metadata.dict()
-        ).dict()
+    def _process_large_file(self, queue_name: str, file_metadata: FileMetadataDTO,
+                            hints: Optional[ParseHints] = None) -> int:
+        """
+        Splits a file over the size threshold into byte-range shards, one worker message each.
+
+        Shard tracking is written before any shard is sent, so the last
+        worker to finish always finds the count and marks the file Processed.
+        Raises if any shard could not be sent, so the SQS record is retried.
+        """
+        sharding_config = self.config["file_processing"].get("sharding", {}) or {}
+        shards = ShardHelper.plan(
+            file_metadata.file_size,
+            shard_bytes=sharding_config.get("shard_bytes", DEFAULT_SHARD_BYTES),
+            max_shards=sharding_config.get("max_shards", DEFAULT_MAX_SHARDS)
+        )
+        logger.info(f"📐 File size {file_metadata.file_size} exceeds threshold. "
+                    f"Splitting {file_metadata.s3_key} into {len(shards)} shard(s).")
+
+        self.metadata_updater.start_shard_tracking(file_metadata, len(shards))
+        failures = self.sqs_adapter.send_batch_to_worker_queue(queue_name, [
+            (str(index), {**file_metadata.dict(), "shard_index": index, "shard_count": len(shards),
+                          "byte_start": byte_start, "byte_end": byte_end,
+                          "parse_hints": hints.dict() if hints else None})
+            for index, (byte_start, byte_end) in enumerate(shards)
+        ])
+        if failures:
+            raise RuntimeError(f"{len(failures)} of {len(shards)} shard message(s) for {file_metadata.s3_key} "
+                               f"could not be sent: {next(iter(failures.values()))}")
+        return len(shards)
 
     def get_file_size_threshold(self):
-        try:
-            response = self.ssm_client.get_parameter(Name=self.config["file_processing"]["size_threshold_param"])
-            return int(response['Parameter']['Value'])
-        except Exception as e:
-            logger.warning(f"Failed to retrieve size threshold from SSM. Using default (10MB). Error: {str(e)}")
-            return 10 * 1024 * 1024  # 10MB default
+        # ✅ Served from memory on warm invocations; SSM is only read on expiry (in the background)
+        return self.parameter_cache.get_int(
+            self.config["file_processing"]["size_threshold_param"], default=DEFAULT_SIZE_THRESHOLD
+        )
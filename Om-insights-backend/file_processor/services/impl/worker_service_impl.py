@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from file_processor.model.file_metadata_dto import ProcessingContext
 from file_processor.model.workers_model import SQSMessage
@@ -6,9 +7,11 @@ from file_processor.data_formatters.data_formatter import DataFormatter
 from file_processor.services.worker_service.worker_service import WorkerService
 
 from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.cache.idempotency_store import DUPLICATE_COMPLETED, DUPLICATE_IN_PROGRESS, IdempotencyStore
 from shared_layer.repository.aoss_repository import AOSSRepository
 from shared_layer.repository.dynamo_repository import DynamoRepository
 from shared_layer.logging.logger import Logger
+from shared_layer.logging.metrics import metric_tags, span
 
 from file_processor.helpers.common.retry_helper import RetryHelper
 from file_processor.helpers.worker.item_builder_helper import ItemBuilderHelper
@@ -23,11 +26,13 @@ logger = Logger()
 class WorkerServiceImpl(WorkerService):
     """Service to process worker data from S3 with DLQ-friendly centralized exception handling."""
 
-    def __init__(self, s3_adapter: S3Adapter, dynamo_repository: DynamoRepository, aoss_repository: AOSSRepository, config: dict):
+    def __init__(self, s3_adapter: S3Adapter, dynamo_repository: DynamoRepository, aoss_repository: AOSSRepository, config: dict,
+                 idempotency_store: Optional[IdempotencyStore] = None):
         self.s3_adapter = s3_adapter
         self.repository = dynamo_repository
         self.aoss_repository = aoss_repository
         self.config = config
+        self.idempotency_store = idempotency_store or IdempotencyStore()
         self.metadata_helper = MetadataHelper(self.repository, config)
         self.BatchWriterHelper = BatchWriterHelper(self.repository)
         self.data_formatter = DataFormatter(s3_adapter= self.s3_adapter)
@@ -40,7 +45,36 @@ class WorkerServiceImpl(WorkerService):
             Dict: Processing result.
         """
         logger.info("🔹 **Processing Sales Data from SQS Message**")
-        logger.info(sqs_body.dict())  # Log event for debugging
+        logger.info(sqs_body.dict(exclude={"inline_content"}))  # Log event for debugging (inline file bodies left out)
+
+        # ✅ Redelivered messages / duplicate notifications cost one conditional write, not a re-run
+        idempotency_key = IdempotencyStore.key("process", sqs_body.bucket, sqs_body.s3_key, sqs_body.etag,
+                                               sqs_body.sequencer, sqs_body.shard_index)
+        claim = self.idempotency_store.begin(idempotency_key)
+        if claim == DUPLICATE_COMPLETED:
+            logger.info(f"⏭️ {sqs_body.s3_key} (shard {sqs_body.shard_index}) was already processed; skipping.")
+            if sqs_body.shard_index is not None:
+                # ✅ Re-count the shard (a set add, so a no-op if counted): a re-planned file still completes
+                self.metadata_helper.record_shard_result(sqs_body.company, sqs_body.event_time.isoformat(),
+                                                         sqs_body.shard_index, succeeded=True)
+            return Response(status="Skipped", message="Duplicate delivery; already processed.").dict()
+        if claim == DUPLICATE_IN_PROGRESS:
+            logger.info(f"⏳ {sqs_body.s3_key} (shard {sqs_body.shard_index}) is being processed elsewhere.")
+            return Response(status="InProgress", message="Another invocation is processing this file.").dict()
+
+        processing_tier = sqs_body.parse_hints.tier if sqs_body.parse_hints else (
+            "sharded" if sqs_body.shard_index is not None else "single")
+        # ✅ Every stage metric of this message carries its data type, tenant and tier
+        with metric_tags(data_type=sqs_body.data_type, business_id=sqs_body.company, tier=sqs_body.subscription,
+                         processing_tier=processing_tier), span("worker_total", bytes=sqs_body.file_size):
+            result = self._process(sqs_body)
+        if result.get("status") in ("Success", "Skipped"):
+            self.idempotency_store.complete(idempotency_key)
+        else:
+            self.idempotency_store.release(idempotency_key)  # ✅ Let the redelivery retry it
+        return result
+
+    def _process(self, sqs_body: SQSMessage):
         try:
             context = ProcessingContext(**sqs_body.dict())
 
@@ -55,11 +89,13 @@ class WorkerServiceImpl(WorkerService):
 
             if not parsed_data:
                 logger.warning("⚠️ No data returned after parsing.")
+                self.record_shard_result(context, succeeded=True)
                 return Response(
                     status="Skipped",
                     message ="No data found in file."
                 ).dict()
 
+            chunks_indexed = None  # Only text produces chunks (and near-duplicate fingerprints)
             if context.file_format == "csv":
                 # ✅ Structured → DynamoDB
                 self.process_and_store_data(
@@ -72,10 +108,15 @@ class WorkerServiceImpl(WorkerService):
                 # ✅ Unstructured → OpenSearch (AOSS)
                 logger.info("🔍 Indexing unstructured text data to AOSS...")
                 # indexed_created = self.aoss_repository.index_unstructured_data(parsed_data)
+                # ✅ Indexing is disabled above, so the chunks are not stored anywhere: their fingerprints must
+                # not be kept, or later uploads of the same text would be dropped as duplicates of nothing
+                chunks_indexed = False
+                self.record_shard_result(context, succeeded=True)
 
             return Response(
                 status="Success",
-                message="Processed and stored records."
+                message="Processed and stored records.",
+                metadata={"chunks_indexed": chunks_indexed} if chunks_indexed is not None else None
             ).dict()
 
         except Exception as e:
@@ -96,10 +137,20 @@ class WorkerServiceImpl(WorkerService):
 
         final_status = "Processed" if failed_records == 0 else "Partially Processed"
 
-        if isinstance(context.event_time, datetime):
+        if context.is_shard:
+            self.record_shard_result(context, succeeded=failed_records == 0)
+        elif isinstance(context.event_time, datetime):
             event_time = context.event_time.isoformat()
             self.metadata_helper.update_status_with_ids(context.business_id, event_time, final_status)
 
         logger.info(
             f"✅ Successfully stored {total_records - failed_records} records in {table_name}, {failed_records} failed."
-        )
\ No newline at end of file
+        )
+
+    def record_shard_result(self, context: ProcessingContext, succeeded: bool):
+        """For a shard of a large file: counts it, and the last shard marks the whole file finished."""
+        if not context.is_shard:
+            return None
+        return self.metadata_helper.record_shard_result(
+            context.business_id, context.event_time.isoformat(), context.shard_index, succeeded
+        )
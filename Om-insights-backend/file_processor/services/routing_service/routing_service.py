@@ -9,8 +9,8 @@ class RoutingService(ABC):
     """
 
     @abstractmethod
-    def route_file(self, event: dict) -> Dict:
+    def route_batch(self, event: dict) -> Dict:
         """
-        Process and route the file based on the given event.
+        Route every file in an SQS batch; returns SQS `batchItemFailures` for records to retry.
         """
         pass
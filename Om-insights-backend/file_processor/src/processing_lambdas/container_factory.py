@@ -1,17 +1,24 @@
 from file_processor.data_formatters.processor_factory import ProcessorFactory
+from shared_layer.lifecycle.container_registry import get_container
 
+PROCESSOR_MODULES = [
+    'file_processor.data_formatters.processors.csv.csv_processor',
+    'file_processor.data_formatters.processors.text.txt_processor',
+    'file_processor.data_formatters.data_formatter'
+]
 
-def create_container(container_class):
-    """Factory function to create and initialize the SalesWorkerContainer."""
-    container = container_class()
-    container.wire(modules=[
-        'file_processor.data_formatters.processors.csv.csv_processor',
-        'file_processor.data_formatters.processors.text.txt_processor',
-        'file_processor.data_formatters.data_formatter'
-    ])
+
+def _register_processors(container) -> None:
     # ✅ Now you can register the processors using the container instance
     ProcessorFactory.register_processor("csv", lambda: container.csv_formatter())
     ProcessorFactory.register_processor("txt", lambda: container.txt_processor())
 
-    container.init_resources()
-    return container
\ No newline at end of file
+
+def create_container(container_class):
+    """
+    Returns the initialized worker container (e.g. SalesWorkerContainer).
+
+    It is built, wired and registered with `ProcessorFactory` once per
+    execution environment; warm invocations get the same instance back.
+    """
+    return get_container(container_class, modules=PROCESSOR_MODULES, on_create=_register_processors)
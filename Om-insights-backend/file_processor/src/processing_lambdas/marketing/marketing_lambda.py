@@ -1,10 +1,10 @@
 import json
-import boto3
 import os
 import logging
 import requests
-from requests_aws4auth import AWS4Auth
 from dependency_injector.wiring import inject
+from shared_layer.aws.utils.auth_util import get_sigv4_auth
+from shared_layer.cache.ttl_cache import TTLCache
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -17,15 +17,10 @@ INDEX_NAME = "sales_template_v1"
 AOSS_ENDPOINT = "https://vpc-ominights-uh4xluwsmhjtpcziv7uwt472fa.us-east-1.es.amazonaws.com"
 
 HEADERS = {"Content-Type": "application/json"}
+KNOWN_INDEX_TTL_SECONDS = 3600
 
-credentials = boto3.Session().get_credentials().get_frozen_credentials()
-awsauth = AWS4Auth(
-    credentials.access_key,
-    credentials.secret_key,
-    REGION,
-    SERVICE,
-    session_token=credentials.token
-)
+# ✅ Indices known to exist in this execution environment (warm invocations skip the PUT)
+known_indices = TTLCache(ttl_seconds=KNOWN_INDEX_TTL_SECONDS, max_size=16)
 
 # ---------------------------------------------
 # Index Template
@@ -98,9 +93,12 @@ def lambda_handler(event, context):
 # Create Index with Template
 # ---------------------------------------------
 def create_index():
+    if known_indices.get((AOSS_ENDPOINT, INDEX_NAME)):
+        return
+
     url = f"{AOSS_ENDPOINT}/{INDEX_NAME}"
     logger.info(f"🔧 Creating index: {INDEX_NAME}")
-    response = requests.put(url, headers=HEADERS, auth=awsauth, data=json.dumps(INDEX_TEMPLATE))
+    response = requests.put(url, headers=HEADERS, auth=get_sigv4_auth(REGION, SERVICE), data=json.dumps(INDEX_TEMPLATE))
 
     if response.ok:
         logger.info("✅ Index created successfully.")
@@ -110,6 +108,7 @@ def create_index():
         logger.error(f"❌ Index creation failed: {response.status_code}")
         logger.error(response.text)
         raise Exception("Index creation failed.")
+    known_indices.set((AOSS_ENDPOINT, INDEX_NAME), True)
 
 
 # ---------------------------------------------
@@ -134,7 +133,7 @@ def index_sample_document():
     }
 
     url = f"{AOSS_ENDPOINT}/{INDEX_NAME}/_doc"
-    response = requests.post(url, headers=HEADERS, auth=awsauth, data=json.dumps(sample_doc))
+    response = requests.post(url, headers=HEADERS, auth=get_sigv4_auth(REGION, SERVICE), data=json.dumps(sample_doc))
 
     if response.ok:
         logger.info("✅ Document indexed successfully.")
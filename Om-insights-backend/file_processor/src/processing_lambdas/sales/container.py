@@ -4,6 +4,10 @@ from dependency_injector import providers
 
 from file_processor.data_formatters.data_formatter import DataFormatter
 from file_processor.data_formatters.processors.csv.csv_processor import CSVProcessor
+from file_processor.data_formatters.processors.text.keyword_stats import KeywordStatsStore, TfidfKeywordExtractor
+from file_processor.data_formatters.processors.text.chunk_packer import ChunkPacker
+from file_processor.data_formatters.processors.text.near_duplicate import FingerprintStore, NearDuplicateFilter
+from file_processor.data_formatters.processors.text.noise_profile import NoiseProfileStore
 from file_processor.data_formatters.processors.text.spacy_processor import SpacyProcessor
 from file_processor.data_formatters.processors.text.txt_processor import TXTProcessor
 from file_processor.services.impl.worker_service_impl import WorkerServiceImpl
@@ -11,8 +15,12 @@ from shared_layer.aws.adapters.aoss_adapter import AOSSAdapter
 from shared_layer.aws.adapters.bedrock_adapter import BedrockEmbeddingAdapter
 from shared_layer.aws.adapters.dynamodb_adapter import DynamoDBAdapter
 from shared_layer.aws.adapters.s3_adapter import S3Adapter
+from shared_layer.cache.embedding_cache import EmbeddingCache
+from shared_layer.cache.idempotency_store import IdempotencyStore
+from shared_layer.cache.tenant_placement_store import TenantPlacementStore
 from shared_layer.core_container import CoreContainer
 from shared_layer.logging.logger import Logger
+from shared_layer.search.local_vector_adapter import HotTenantVectorCache
 
 logger = Logger()  # Logger instance for logging
 
@@ -27,16 +35,49 @@ class SalesWorkerContainer(CoreContainer):
         S3Adapter,
         config=sales_config
     )
+    # ✅ Content-addressed embedding cache (memory LRU + DynamoDB)
+    embedding_cache = providers.Singleton(
+        EmbeddingCache,
+        dynamodb_client=CoreContainer.aws_clients.provided.dynamodb_client,
+        table_name=sales_config.dynamodb.embedding_cache.table_name,
+        ttl_days=sales_config.dynamodb.embedding_cache.ttl_days
+    )
     bedrock_adapter = providers.Singleton(
         BedrockEmbeddingAdapter,
         bedrock_client=CoreContainer.aws_clients.provided.bedrock_client,
         config=sales_config,
+        embedding_cache=embedding_cache
     )
     bedrock_repository = bedrock_adapter
+    # ✅ Per-business keyword statistics (TF-IDF ranking)
+    keyword_stats_store = providers.Singleton(
+        KeywordStatsStore,
+        s3_adapter=s3_adapter,
+        bucket=sales_config.text_processing.keyword_stats.bucket,
+        max_terms=sales_config.text_processing.keyword_stats.max_terms
+    )
+    keyword_extractor = providers.Singleton(
+        TfidfKeywordExtractor,
+        stats_store=keyword_stats_store,
+        top_k=sales_config.text_processing.keyword_stats.top_k
+    )
+    # ✅ Per-business noise profiles (flushed once per invocation)
+    noise_profile_store = providers.Singleton(
+        NoiseProfileStore,
+        s3_adapter=s3_adapter,
+        bucket=sales_config.text_processing.noise_profile.bucket,
+        width=sales_config.text_processing.noise_profile.sketch_width,
+        depth=sales_config.text_processing.noise_profile.sketch_depth,
+        top_k=sales_config.text_processing.noise_profile.top_k,
+        cache_ttl_seconds=sales_config.text_processing.noise_profile.cache_ttl_seconds,
+        max_entity_share=sales_config.text_processing.noise_profile.max_entity_share
+    )
     # Add SpacyProcessor provider
     spacy_processor = providers.Factory(
         SpacyProcessor,
-        s3_adapter=s3_adapter
+        s3_adapter=s3_adapter,
+        keyword_extractor=keyword_extractor,
+        noise_profile_store=noise_profile_store
     )
     data_formatter = providers.Factory(
         DataFormatter,
@@ -46,31 +87,80 @@ class SalesWorkerContainer(CoreContainer):
         CSVProcessor,
         s3_adapter=s3_adapter
     )
+    # ✅ Near-duplicate chunk suppression (fingerprints flushed after successful processing)
+    chunk_fingerprint_store = providers.Singleton(
+        FingerprintStore,
+        s3_adapter=s3_adapter,
+        bucket=sales_config.text_processing.near_duplicate.bucket,
+        max_fingerprints=sales_config.text_processing.near_duplicate.max_fingerprints,
+        cache_ttl_seconds=sales_config.text_processing.near_duplicate.cache_ttl_seconds
+    )
+    near_duplicate_filter = providers.Singleton(
+        NearDuplicateFilter,
+        fingerprint_store=chunk_fingerprint_store,
+        hamming_threshold=sales_config.text_processing.near_duplicate.hamming_threshold,
+        min_tokens=sales_config.text_processing.near_duplicate.min_tokens
+    )
+    # ✅ Chunking mode: "packed" (sentences up to Titan's token budget) or "tokenizer" (fixed windows)
+    chunk_packer = providers.Selector(
+        sales_config.text_processing.chunking.mode,
+        packed=providers.Singleton(
+            ChunkPacker,
+            target_tokens=sales_config.text_processing.chunking.target_tokens,
+            overlap_tokens=sales_config.text_processing.chunking.overlap_tokens
+        ),
+        tokenizer=providers.Object(None)
+    )
     txt_processor = providers.Factory(
         TXTProcessor,
         bedrock_repository=bedrock_repository,
         spacy_processor =spacy_processor,
-        s3_adapter=s3_adapter
+        s3_adapter=s3_adapter,
+        near_duplicate_filter=near_duplicate_filter,
+        chunk_packer=chunk_packer
     )
 
+    # ✅ Tenant placement shared by every instance (promotion fencing)
+    tenant_placement_store = providers.Singleton(
+        TenantPlacementStore,
+        dynamodb_client=CoreContainer.aws_clients.provided.dynamodb_client,
+        table_name=sales_config.dynamodb.tenant_placement.table_name
+    )
     aoss_adapter = providers.Singleton(
         AOSSAdapter,
         aoss_client=CoreContainer.aws_clients.provided.aoss_client,
         config=sales_config,
+        embedder=bedrock_adapter,  # ✅ Embeds query_text for search()
+        placement_store=tenant_placement_store
+    )
+    # Bind the abstract AOSSRepository to the concrete AOSSAdapter (behind the hot-tenant cache when enabled)
+    aoss_repository = providers.Singleton(
+        HotTenantVectorCache.from_config,
+        remote=aoss_adapter,
+        config=sales_config,
+        embedder=bedrock_adapter
     )
-    # Bind the abstract AOSSRepository to the concrete AOSSAdapter
-    aoss_repository = aoss_adapter  # 👈 This replaces the previous instantiation
     dynamo_repository = providers.Singleton(
         DynamoDBAdapter,
         dynamodb_client=CoreContainer.aws_clients.provided.dynamodb_client,
         config=sales_config
     )
 
+    # ✅ Redelivered messages are skipped after one conditional write
+    idempotency_store = providers.Singleton(
+        IdempotencyStore,
+        dynamodb_client=CoreContainer.aws_clients.provided.dynamodb_client,
+        table_name=sales_config.dynamodb.idempotency.table_name,
+        in_progress_seconds=sales_config.dynamodb.idempotency.in_progress_seconds,
+        ttl_days=sales_config.dynamodb.idempotency.ttl_days
+    )
+
     # ✅ Register the actual implementation
     worker_service = providers.Singleton(
         WorkerServiceImpl,
         s3_adapter=s3_adapter,
         dynamo_repository=dynamo_repository,
         aoss_repository=aoss_repository,
-        config=sales_config
+        config=sales_config,
+        idempotency_store=idempotency_store
     )
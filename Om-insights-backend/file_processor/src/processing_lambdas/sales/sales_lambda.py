@@ -1,73 +1,140 @@
 import json
+import os
 
 from dependency_injector.wiring import inject
+from file_processor.data_formatters.processors.text.spacy_processor import SpacyProcessor
+from file_processor.data_formatters.processors.text.txt_preprocessor import get_sym_spell
+from file_processor.data_formatters.processors.text.txt_processor import get_tokenizer
+from file_processor.helpers.worker.sqs_batch_helper import SQSBatchHelper
 from file_processor.model.workers_model import SQSMessage
+from shared_layer.aws.adapters.aoss_adapter import REGION, SERVICE
+from shared_layer.aws.utils.auth_util import get_sigv4_auth
+from shared_layer.lifecycle.container_registry import request_scope
+from shared_layer.lifecycle.warm_start import WarmStartInitializer
 from shared_layer.logging.logger import Logger
+from shared_layer.search.local_vector_adapter import HotTenantVectorCache
 
 from file_processor.src.processing_lambdas.container_factory import create_container
 from file_processor.src.processing_lambdas.sales.container import SalesWorkerContainer
 from pydantic import ValidationError
 
 
-# ✅ Factory function for initializing the container
+# ✅ Initialization phase: only what the sales handler needs, loaded in parallel
+warm_start = WarmStartInitializer("sales_lambda")
 
-# ✅ Initialize the container globally (for dependency injection wiring)
-container = create_container(SalesWorkerContainer)
+with warm_start.timed("container"):
+    # ✅ Built and wired once per execution environment; warm invocations reuse its singletons
+    container = create_container(SalesWorkerContainer)
+    # ✅ Wire the container for dependency injection
+    container.wire(modules=[__name__])
 
 # ✅ Use centralized logger
 logger = container.logger()
 
-# ✅ Wire the container for dependency injection
-container.wire(modules=[__name__])
+warm_start.register("spacy_model", SpacyProcessor.get_spacy_model)
+warm_start.register("symspell_dictionaries", get_sym_spell)
+if container.sales_config.text_processing.chunking.mode() == "tokenizer":
+    warm_start.register("tokenizer", get_tokenizer)
+warm_start.register("aoss_sigv4_auth", lambda: get_sigv4_auth(REGION, SERVICE), required=False)
+
+# ✅ Run during the Lambda init phase; locally the first invocation triggers it
+if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    try:
+        warm_start.run()
+    except Exception as e:
+        logger.error(f"❌ Warm start failed, components will load on first use: {e}")
 
 @logger.inject_lambda_context(correlation_id_path=Logger.OM_CORRELATION_ID_PATH)
 @inject
 def lambda_handler(event, context):
-    """Sales Processing Lambda Handler"""
+    """Sales Processing Lambda Handler: processes every SQS record and reports only the failed ones."""
 
-    # ✅ Initialize the container inside the handler
-    container = create_container(SalesWorkerContainer)
-
-    # ✅ Resolve the Sales Processor Service explicitly
+    # ✅ Resolve the Sales Processor Service explicitly (a singleton, reused across invocations)
     sales_processor_service = container.worker_service()
 
+    # ✅ No-op after the first run in this execution environment
+    warm_start.run()
+
+    records = event.get("Records") or []
+    logger.info(f"✅ Sales Processing Lambda Invoked with {len(records)} record(s).")
+
+    # ✅ Concurrent records share the per-invocation buffers, so fingerprints are only kept if every
+    # record's chunks were confirmed indexed
+    max_workers = container.sales_config.worker.max_concurrent_records() or 1
+    uncommitted = []
+    with request_scope(container, on_exit=(
+        container.noise_profile_store().flush,  # ✅ One noise-profile write per business per invocation
+        container.chunk_fingerprint_store().discard  # ✅ Drop fingerprints of failed or unindexed records
+    )):
+        response = SQSBatchHelper.process(
+            records,
+            lambda record: _process_record(record, sales_processor_service, flush_fingerprints=max_workers == 1,
+                                           uncommitted=uncommitted),
+            max_workers=max_workers
+        )
+        if max_workers > 1 and not response["batchItemFailures"] and not uncommitted:
+            container.chunk_fingerprint_store().flush()
+        return response
+
+
+def _process_record(record: dict, sales_processor_service, flush_fingerprints: bool, uncommitted: list) -> bool:
+    """
+    Processes one SQS record. True when it needs no redelivery.
+    Records whose chunk fingerprints must not be kept are added to `uncommitted`.
+    """
+    # ✅ Parse SQS Message
     try:
-        logger.info("✅ Sales Processing Lambda Invoked.")
-
-        # ✅ Validate SQS Event
-        if "Records" not in event or not event["Records"]:
-            raise ValueError("Invalid SQS Event: No Records found.")
-
-        # ✅ Parse SQS Message
-        try:
-            sqs_body = json.loads(event["Records"][0]["body"])
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid SQS message format: {e}")
+        sqs_body = json.loads(record["body"])
+    except (KeyError, TypeError, json.JSONDecodeError) as e:
+        logger.error(f"❌ Invalid SQS message format in {record.get('messageId')}: {e}")
+        return True  # A redelivery cannot fix it
 
-        logger.info(f"📩 Received SQS Message: {json.dumps(sqs_body, indent=2)}")
+    logger.info(f"📩 Received SQS Message: {json.dumps(sqs_body, indent=2)}")
 
-        # ✅ Validate message format using Pydantic
-        try:
-            validated_sqs_body = SQSMessage(**sqs_body)
-            logger.info(f"✅ SQS Message validated: {validated_sqs_body.dict()}")
-        except ValidationError as ve:
-            logger.error(f"❌ Invalid SQS message format: {ve.json()}")
-            return {"status": "Error", "message": "Invalid SQS message format", "details": ve.errors()}
-
-        # ✅ Process Sales Data
-        result = sales_processor_service.process_data(validated_sqs_body)
-
-        logger.info(f"✅ Processing result: {result}")
-
-        return {
-            "status": "Processed",
-            "message": "Sales data successfully processed.",
-            "details": result
-        }
-
-    except Exception as e:
-        logger.exception("❌ Sales Processing Lambda Failed.")
-        return {"status": "Error", "message": str(e)}
-
-    finally:
-        container.shutdown_resources()  # ✅ Ensures clean resource shutdown
\ No newline at end of file
+    # ✅ Validate message format using Pydantic
+    try:
+        validated_sqs_body = SQSMessage(**sqs_body)
+        logger.info(f"✅ SQS Message validated: {validated_sqs_body.dict()}")
+    except ValidationError as ve:
+        logger.error(f"❌ Invalid SQS message format: {ve.json()}")
+        return True  # A redelivery cannot fix it
+
+    # ✅ Process Sales Data
+    result = sales_processor_service.process_data(validated_sqs_body)
+    logger.info(f"✅ Processing result: {result}")
+
+    succeeded = result.get("status") in ("Success", "Skipped")
+    # ✅ Remember the processed chunks only once the index write of those chunks was confirmed
+    committable = succeeded and (result.get("metadata") or {}).get("chunks_indexed", True)
+    if not committable:
+        uncommitted.append(record.get("messageId"))
+    if flush_fingerprints:
+        if committable:
+            container.chunk_fingerprint_store().flush()
+        else:
+            container.chunk_fingerprint_store().discard()
+    return succeeded
+
+
+@logger.inject_lambda_context
+def snapshot_export_handler(event, context):
+    """Scheduled: rebuilds the hot-tenant vector snapshots on EFS from a full AOSS scan."""
+    aoss_repository = container.aoss_repository()
+    if not isinstance(aoss_repository, HotTenantVectorCache):
+        logger.info("ℹ️ Hot tenant cache is disabled, no snapshots to export.")
+        return {"exported": {}}
+    exported = aoss_repository.export_snapshots()
+    logger.info(f"✅ Exported hot-tenant snapshots: {exported}")
+    return {"exported": exported}
+
+
+@logger.inject_lambda_context
+def tenant_promotion_handler(event, context):
+    """Scheduled: advances dedicated-index promotions and starts new ones (never on the indexing path)."""
+    tenant_router = container.aoss_adapter().tenant_router
+    if not tenant_router or not tenant_router.auto_promote:
+        logger.info("ℹ️ Tenant promotion is disabled.")
+        return {"steps": 0}
+    steps = tenant_router.run_promotions()
+    logger.info(f"✅ Tenant promotion round took {steps} step(s)")
+    return {"steps": steps}
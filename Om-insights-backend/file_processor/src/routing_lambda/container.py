@@ -7,7 +7,9 @@ from shared_layer.core_container import CoreContainer
 from file_processor.services.impl.routing_service_impl import RoutingServiceImpl
 from file_processor.services.routing_service.routing_service import RoutingService
 from shared_layer.aws.adapters.dynamodb_adapter import DynamoDBAdapter
+from shared_layer.aws.adapters.s3_adapter import S3Adapter
 from shared_layer.aws.adapters.sqs_adapter import SQSAdapter
+from shared_layer.cache.idempotency_store import IdempotencyStore
 
 
 class RoutingContainer(CoreContainer):
@@ -37,6 +39,21 @@ class RoutingContainer(CoreContainer):
         config=routing_config
     )
 
+    # ✅ S3 Adapter (ranged-GET preflight of each upload)
+    s3_adapter = providers.Singleton(
+        S3Adapter,
+        config=routing_config
+    )
+
+    # ✅ Duplicate S3 notifications are skipped after one conditional write
+    idempotency_store = providers.Singleton(
+        IdempotencyStore,
+        dynamodb_client=CoreContainer.aws_clients.provided.dynamodb_client,
+        table_name=routing_config.dynamodb.idempotency.table_name,
+        in_progress_seconds=routing_config.dynamodb.idempotency.in_progress_seconds,
+        ttl_days=routing_config.dynamodb.idempotency.ttl_days
+    )
+
     # ✅ Routing Service Implementation
     # routing_service_impl = providers.Singleton(
     #     RoutingServiceImpl,
@@ -51,8 +68,10 @@ class RoutingContainer(CoreContainer):
         RoutingServiceImpl,
         dynamo_repository=dynamo_repository,
         sqs_adapter=sqs_adapter,
-        ssm_client=CoreContainer.aws_clients.provided.ssm_client,
-        config=routing_config
+        parameter_cache=CoreContainer.parameter_cache,
+        config=routing_config,
+        idempotency_store=idempotency_store,
+        s3_adapter=s3_adapter
     )
 
     #remove loggers from adapters
@@ -1,11 +1,17 @@
 from dependency_injector.wiring import inject
 from shared_layer.logging.logger import Logger
 from file_processor.src.routing_lambda.container import RoutingContainer
+from shared_layer.lifecycle.container_registry import get_container
+from shared_layer.lifecycle.warm_start import WarmStartInitializer
 from shared_layer.model.response import Response
 
 
-# ✅ Use Routing Container
-container = RoutingContainer()
+# ✅ Initialization phase (routing only needs its container; no NLP models)
+warm_start = WarmStartInitializer("routing_lambda")
+
+# ✅ Use Routing Container (built and wired once per execution environment)
+with warm_start.timed("container"):
+    container = get_container(RoutingContainer)
 
 # ✅ Use centralized logger
 logger = Logger()
@@ -14,14 +20,12 @@ logger = Logger()
 @inject
 def lambda_handler(event, context):
     """Main Lambda function to route processing based on file metadata."""
-    local_container = RoutingContainer()  # ✅ Initialize container at the start
-    local_container.init_resources()  # ✅ Ensure all resources are properly initialized
     try:
-        # ✅ Resolve the routing service explicitly
-        routing_service = local_container.routing_service()
+        # ✅ Resolve the routing service explicitly (a singleton, reused across warm invocations)
+        routing_service = container.routing_service()
 
-        # ✅ Call the service directly
-        response = routing_service.route_file(event)
+        # ✅ Route every record of the batch; failed records are reported for redelivery
+        response = routing_service.route_batch(event)
 
         return response
 
@@ -31,16 +35,20 @@ def lambda_handler(event, context):
             "message": str(e),
             "event": event  # Logs full event for debugging
         })
-        return Response(
-            status="Error",
-            message=str(e),
-            context="LambdaHandlerError"
-        ).dict()
+        # ✅ Nothing was routed reliably: ask SQS to redeliver the whole batch
+        return {
+            "batchItemFailures": [
+                {"itemIdentifier": record.get("messageId")} for record in event.get("Records", [])
+            ],
+            **Response(status="Error", message=str(e), context="LambdaHandlerError").dict()
+        }
 
 
-    finally:
-        # ✅ Clean up resources properly
-        local_container.shutdown_resources()
-        container.shutdown_resources()
 # ✅ Wire the container for dependency injection
-container.wire(modules=[__name__])
\ No newline at end of file
+with warm_start.timed("container_wiring"):
+    container.wire(modules=[__name__])
+# ✅ Load the routing threshold into the parameter cache before the first event (falls back to lazy load)
+warm_start.register("ssm_parameters", lambda: container.parameter_cache().prefetch(
+    [container.routing_config.file_processing.size_threshold_param()]
+), required=False)
+warm_start.run()
\ No newline at end of file
@@ -0,0 +1,31 @@
+import pytest
+
+
+class FakeS3Adapter:
+    """Versioned in-memory object store honouring If-Match / If-None-Match like S3."""
+
+    def __init__(self):
+        self.objects, self.gets, self.puts = {}, 0, 0
+        self.before_put = None  # simulates another writer landing between our read and write
+
+    def ensure_bucket_exists(self, bucket):
+        pass
+
+    def get_object_version(self, bucket, key):
+        self.gets += 1
+        return self.objects.get(key, (None, None))
+
+    def put_object_if_unchanged(self, bucket, key, body, etag):
+        self.puts += 1
+        if self.before_put:
+            self.before_put, hook = None, self.before_put
+            hook()
+        if self.objects.get(key, (None, None))[1] != etag:
+            return False
+        self.objects[key] = (body, f"etag-{self.puts}")
+        return True
+
+
+@pytest.fixture
+def fake_s3():
+    return FakeS3Adapter()
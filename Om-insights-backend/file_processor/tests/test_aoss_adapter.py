@@ -0,0 +1,126 @@
+import json
+
+from shared_layer.aws.adapters import aoss_adapter
+from shared_layer.aws.adapters.aoss_adapter import AOSSAdapter, known_indices, search_cache
+from shared_layer.model.search_model import SearchRequest
+from file_processor.search.index_manager import IndexTemplateManager
+
+
+class FakeResponse:
+    ok = True
+    status_code = 200
+    text = "{}"
+
+
+def test_index_is_created_once_per_environment(monkeypatch):
+    puts = []
+    monkeypatch.setattr(aoss_adapter.requests, "put", lambda url, **kwargs: puts.append(url) or FakeResponse())
+    monkeypatch.setattr(aoss_adapter, "get_sigv4_auth", lambda region, service: None)
+    known_indices.clear()
+    config = {"aoss": {"endpoint": "https://search.local", "index_name": "sales_template_v1"}}
+
+    AOSSAdapter(None, config)._ensure_index()
+    AOSSAdapter(None, config)._ensure_index()
+
+    assert puts == ["https://search.local/sales_template_v1"]
+
+
+def test_template_is_read_once_and_copied():
+    first = IndexTemplateManager.get_template("sales_template_v1")
+    first["mutated"] = True
+
+    assert "mutated" not in IndexTemplateManager.get_template("sales_template_v1")
+    assert IndexTemplateManager._read_template.cache_info().hits >= 1
+
+
+class FakeSearchSession:
+    def __init__(self):
+        self.bodies = []
+
+    def post(self, url, headers, auth, data, timeout, verify, params=None):
+        self.params = params
+        self.bodies.append(json.loads(data))
+        response = FakeResponse()
+        response.json = lambda: {"hits": {"hits": [
+            {"_id": "a1", "_score": 0.92, "_source": {"business_id": "biz-1", "sentences": ["Sales rose."],
+                                                     "sentiment_analysis": {"sentiment": "positive"}}}
+        ]}}
+        return response
+
+
+def test_search_filters_inside_knn_and_caches_by_quantized_vector(monkeypatch):
+    monkeypatch.setattr(aoss_adapter, "get_sigv4_auth", lambda region, service: None)
+    search_cache.clear()
+    adapter = AOSSAdapter(None, {"aoss": {"endpoint": "https://search.local", "index_name": "sales_template_v1"}})
+    adapter.session = FakeSearchSession()
+
+    first = adapter.search(SearchRequest(query_vector=[0.1, 0.2, 0.3], business_id="biz-1", k=5))
+    again = adapter.search(SearchRequest(query_vector=[0.1, 0.2, 0.3001], business_id="biz-1", k=5))
+
+    knn = adapter.session.bodies[0]["query"]["knn"]["embedding"]
+    assert knn["k"] == 5
+    assert knn["filter"] == {"bool": {"filter": [{"term": {"business_id": "biz-1"}}]}}
+    assert first.hits[0].id == "a1" and first.hits[0].sentiment == "positive" and not first.cached
+    assert again.cached and len(adapter.session.bodies) == 1
+
+
+def test_tenant_searches_are_routed_to_their_shard(monkeypatch):
+    monkeypatch.setattr(aoss_adapter, "get_sigv4_auth", lambda region, service: None)
+    search_cache.clear()
+    config = {"aoss": {"endpoint": "https://search.local", "index_name": "sales_template_v1",
+                       "tenancy": {"enabled": True, "create_aliases": False}}}
+    adapter = AOSSAdapter(None, config)
+    adapter.session = FakeSearchSession()
+
+    adapter.search(SearchRequest(query_vector=[0.5, 0.5], business_id="biz-7"))
+
+    assert adapter.session.params == {"routing": "biz-7"}
+
+
+class FakeScrollSession:
+    def __init__(self, pages):
+        self.pages, self.posts, self.deleted = pages, [], []
+
+    def post(self, url, headers, auth, data, timeout, verify, params=None):
+        self.posts.append((url.split("/", 3)[-1], params))
+        response = FakeResponse()
+        hits = self.pages.pop(0) if self.pages else []
+        response.json = lambda: {"_scroll_id": "s1", "hits": {"hits": hits}}
+        return response
+
+    def delete(self, url, headers, auth, data, timeout, verify):
+        self.deleted.append(json.loads(data))
+
+
+def test_scan_documents_pages_through_a_tenant_and_clears_the_scroll(monkeypatch):
+    monkeypatch.setattr(aoss_adapter, "get_sigv4_auth", lambda region, service: None)
+    adapter = AOSSAdapter(None, {"aoss": {"endpoint": "https://search.local", "index_name": "sales_template_v1"}})
+    adapter.session = FakeScrollSession([
+        [{"_id": "a", "_source": {"business_id": "biz-1", "embedding": [0.1]}}],
+        [{"_id": "b", "_source": {"business_id": "biz-1", "embedding": [0.2], "text_hash": "b"}}]
+    ])
+
+    documents = list(adapter.scan_documents("biz-1", page_size=1))
+
+    assert [document["text_hash"] for document in documents] == ["a", "b"]
+    assert adapter.session.posts[0] == ("sales_template_v1/_search", {"scroll": "2m"})
+    assert [path for path, _ in adapter.session.posts[1:]] == ["_search/scroll", "_search/scroll"]
+    assert adapter.session.deleted == [{"scroll_id": ["s1"]}]
+
+
+def test_chunks_are_indexed_under_their_text_hash(monkeypatch):
+    """A redelivered batch overwrites the same documents instead of adding duplicates."""
+    calls = []
+
+    class FakeBulkIndexer:
+        def index(self, index_name, documents, id_field=None, route=None):
+            calls.append((index_name, id_field))
+            return {"indexed": len(documents), "failed": 0, "items": []}
+
+    adapter = AOSSAdapter(None, {"aoss": {"endpoint": "https://search.local", "index_name": "sales_template_v1"}})
+    monkeypatch.setattr(adapter, "_ensure_index", lambda: None)
+    adapter.bulk_indexer = FakeBulkIndexer()
+
+    adapter.index_unstructured_data([{"business_id": "biz-1", "text_hash": "h1"}])
+
+    assert calls == [("sales_template_v1", "text_hash")]
@@ -0,0 +1,71 @@
+import json
+import threading
+
+from shared_layer.aws.adapters.aoss_bulk_indexer import AOSSBulkIndexer
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Accepts every document once, except ids in `throttle_once`, which get a 429 on their first attempt."""
+
+    def __init__(self, throttle_once=(), reject=()):
+        self.throttle_once = set(throttle_once)
+        self.reject = set(reject)
+        self.bodies = []
+        self._lock = threading.Lock()
+
+    def post(self, url, data, headers, auth, timeout, verify):
+        lines = data.decode("utf-8").splitlines()
+        items = []
+        with self._lock:
+            self.bodies.append(data)
+            for source in lines[1::2]:
+                doc_id = json.loads(source)["doc"]
+                if doc_id in self.throttle_once:
+                    self.throttle_once.discard(doc_id)
+                    items.append({"index": {"status": 429, "error": {"type": "es_rejected_execution_exception"}}})
+                elif doc_id in self.reject:
+                    items.append({"index": {"status": 400, "error": {"type": "mapper_parsing_exception",
+                                                                     "reason": "bad field"}}})
+                else:
+                    items.append({"index": {"status": 201, "_id": f"id-{doc_id}"}})
+        return FakeResponse(200, {"errors": any("error" in i["index"] for i in items), "items": items})
+
+
+def _indexer(session, max_request_bytes=200):
+    return AOSSBulkIndexer("https://search.local", auth_provider=lambda: None, max_request_bytes=max_request_bytes,
+                           max_workers=3, max_retries=2, base_backoff_seconds=0, session=session)
+
+
+def test_requests_stay_under_byte_limit_and_results_keep_input_order():
+    session = FakeSession()
+    docs = [{"doc": n, "text": "x" * 40} for n in range(20)]
+
+    result = _indexer(session).index("sales", docs)
+
+    assert result["indexed"] == 20 and result["failed"] == 0
+    assert [item["id"] for item in result["items"]] == [f"id-{n}" for n in range(20)]
+    assert len(session.bodies) > 1
+    assert all(len(body) <= 200 for body in session.bodies)
+
+
+def test_only_failed_items_are_retried():
+    session = FakeSession(throttle_once={3, 7}, reject={5})
+    docs = [{"doc": n} for n in range(10)]
+
+    result = _indexer(session, max_request_bytes=10_000).index("sales", docs)
+
+    assert len(session.bodies) == 2
+    assert session.bodies[1].count(b"\n") == 4  # just docs 3 and 7
+    assert result["items"][3]["attempts"] == 2 and result["items"][3]["error"] is None
+    assert result["failed"] == 1
+    assert result["items"][5]["status"] == 400 and "bad field" in result["items"][5]["error"]
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timezone
+
+from shared_layer.aws.adapters.aoss_partition_manager import QUARTER, TimePartitionManager, current_partitions
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.ok = status_code < 300
+        self._payload = payload or {}
+        self.text = str(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    def __init__(self, write_index=None):
+        self.write_index = write_index
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        path = url.split("search.local/")[1]
+        self.calls.append((method, path, kwargs.get("data")))
+        if method == "GET" and path.startswith("_alias/"):
+            return FakeResponse(200, {self.write_index: {}}) if self.write_index else FakeResponse(404)
+        return FakeResponse()
+
+
+def _manager(session, **kwargs):
+    return TimePartitionManager("https://search.local", "sales", session, auth_provider=lambda: None,
+                                template_loader=lambda: {"settings": {}}, **kwargs)
+
+
+def test_search_prunes_partitions_by_date_range():
+    manager = _manager(FakeSession())
+
+    assert manager.search_target(None, None) == "sales-read"
+    assert manager.search_target(datetime(2025, 11, 20), datetime(2026, 1, 3, tzinfo=timezone.utc)) == \
+        "sales-p-2025-11,sales-p-2025-12,sales-p-2026-01,sales"
+    quarters = _manager(FakeSession(), granularity=QUARTER, include_legacy_index=False)
+    assert quarters.search_target(datetime(2025, 2, 1), datetime(2025, 7, 1)) == \
+        "sales-p-2025-q1,sales-p-2025-q2,sales-p-2025-q3"
+
+
+def test_rollover_moves_write_alias_once_per_period_and_compacts_previous():
+    current_partitions.clear()
+    session = FakeSession(write_index="sales-p-2025-05")
+    manager = _manager(session)
+
+    assert manager.ensure_current(datetime(2025, 6, 2)) == "sales-p-2025-06"
+    assert manager.ensure_current(datetime(2025, 6, 3)) == "sales-p-2025-06"
+
+    paths = [(method, path) for method, path, _ in session.calls]
+    assert paths.count(("PUT", "sales-p-2025-06")) == 1
+    assert ("POST", "_aliases") in paths
+    assert ("POST", "sales-p-2025-05/_forcemerge") in paths
+
+
+def test_template_registration_adds_the_legacy_index_to_the_read_alias():
+    session = FakeSession()
+    _manager(session).ensure_template()
+
+    alias_bodies = [json.loads(data) for method, path, data in session.calls if path == "_aliases"]
+    assert alias_bodies == [{"actions": [{"add": {"index": "sales", "alias": "sales-read"}}]}]
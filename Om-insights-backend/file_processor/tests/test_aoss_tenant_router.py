@@ -0,0 +1,112 @@
+from shared_layer.aws.adapters import aoss_tenant_router
+from shared_layer.aws.adapters.aoss_tenant_router import TenantIndexRouter
+from shared_layer.cache.tenant_placement_store import DEDICATED, MIGRATING, SHARED
+
+
+class FakeResponse:
+    def __init__(self, body=None, status_code=200):
+        self.ok, self.status_code, self.text, self.body = status_code < 300, status_code, "", body or {}
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+        self.task_completed = False
+        self.large_tenants = []
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        path = url.split("/", 3)[-1]
+        self.calls.append((method, path, params, data))
+        if path == "_reindex":
+            return FakeResponse({"task": "node:1"})
+        if path.startswith("_tasks/"):
+            return FakeResponse({"completed": self.task_completed, "response": {"total": 10, "failures": []}})
+        if path.endswith("_search"):
+            return FakeResponse({"aggregations": {"tenants": {"buckets": [
+                {"key": business_id, "doc_count": 10} for business_id in self.large_tenants]}}})
+        return FakeResponse({"count": 10})
+
+    def paths(self):
+        return [path for _, path, _, _ in self.calls]
+
+
+class FakePlacementTable:
+    """In-memory stand-in for TenantPlacementStore (conditional on version)."""
+    enabled = True
+
+    def __init__(self):
+        self.items = {}
+
+    def get(self, base_index, business_id):
+        return dict(self.items.get(business_id, {"state": SHARED, "version": 0}))
+
+    def in_progress(self, base_index):
+        return [business_id for business_id, item in self.items.items()
+                if item["state"] == MIGRATING or not item["shared_copy_deleted"]]
+
+    def transition(self, base_index, business_id, expected_version, state, index=None, shared_copy_deleted=False,
+                   copy_task=None):
+        item = self.get(base_index, business_id)
+        if item["version"] != expected_version:
+            return False
+        self.items[business_id] = {**item, "state": state, "version": expected_version + 1, "changed_at": 0,
+                                   "index": index or item.get("index"), "shared_copy_deleted": shared_copy_deleted,
+                                   "copy_task": copy_task}
+        return True
+
+
+def make_router():
+    aoss_tenant_router.tenant_targets.clear()
+    session, table = FakeSession(), FakePlacementTable()
+    router = TenantIndexRouter("https://aoss", "sales", session, auth_provider=lambda: None, auto_promote=True,
+                               promote_doc_count=5, placement_store=table, writer_grace_seconds=900)
+    return router, session, table
+
+
+def test_promotion_copies_in_the_background_after_writers_switched_and_deletes_last(monkeypatch):
+    router, session, table = make_router()
+    now = [1_000]
+    monkeypatch.setattr(aoss_tenant_router.time, "time", lambda: now[0])
+    session.large_tenants = ["acme"]
+
+    assert router.run_promotions() == 1
+    assert table.items["acme"]["state"] == MIGRATING
+    assert router.resolve_write("acme") == ("sales-dedicated-acme", None, True, False)
+    assert router.resolve("acme").index == "sales,sales-dedicated-acme"
+
+    # Within the writer grace period nothing moves: a stale writer may still target the shared index
+    now[0] = 899
+    assert router.run_promotions() == 0
+    assert "_reindex" not in session.paths()
+
+    now[0] = 900
+    assert router.run_promotions() == 1
+    reindex = next((params, data) for _, path, params, data in session.calls if path == "_reindex")
+    assert reindex[0] == {"wait_for_completion": "false"} and '"op_type": "create"' in reindex[1]
+    assert table.items["acme"]["copy_task"] == "node:1"
+
+    # The copy is still running: the tenant stays MIGRATING and the copy is not restarted
+    assert router.run_promotions() == 0
+    assert table.items["acme"]["state"] == MIGRATING and session.paths().count("_reindex") == 1
+
+    session.task_completed = True
+    assert router.run_promotions() == 1
+    assert table.items["acme"]["state"] == DEDICATED
+    assert "sales/_delete_by_query" not in session.paths()
+
+    now[0] = 900 + aoss_tenant_router.DEFAULT_TARGET_TTL_SECONDS
+    assert router.run_promotions() == 1
+    assert "sales/_delete_by_query" in session.paths()
+    assert table.items["acme"]["shared_copy_deleted"]
+    assert router.run_promotions() == 0
+
+
+def test_promotion_is_disabled_without_a_placement_table():
+    router = TenantIndexRouter("https://aoss", "sales", FakeSession(), auth_provider=lambda: None, auto_promote=True)
+
+    assert not router.auto_promote
+    assert router.run_promotions() == 0
+    assert router.resolve_write("acme") == ("sales", "acme", False, False)
@@ -0,0 +1,83 @@
+import io
+import json
+import threading
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from shared_layer.aws.adapters import bedrock_adapter
+from shared_layer.aws.adapters.bedrock_adapter import BedrockEmbeddingAdapter
+from shared_layer.aws.utils.rate_limiter import LatencyStats
+from shared_layer.cache.embedding_cache import EmbeddingCache, memory_tier
+
+
+class FakeTitanClient:
+    """Embeds a text as [len(text)] and throttles the first call."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, modelId, body, accept, contentType):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "InvokeModel")
+        text = json.loads(body)["inputText"]
+        return {"body": io.BytesIO(json.dumps({"embedding": [float(len(text))]}).encode())}
+
+
+def test_enrich_keeps_chunk_order_and_retries_throttles(monkeypatch):
+    created = []
+    monkeypatch.setattr(bedrock_adapter, "LatencyStats", lambda: created.append(LatencyStats()) or created[-1])
+    client = FakeTitanClient()
+    config = {"bedrock": {"max_concurrency": 4, "requests_per_second": 1000, "max_requests_per_second": 1000}}
+    adapter = BedrockEmbeddingAdapter(client, config)
+    batches = [{"sentences": ["x" * n]} for n in range(1, 21)]
+
+    enriched = adapter.enrich_with_embeddings(batches)
+
+    assert [b["embedding"].to_list() for b in enriched] == [[float(n)] for n in range(1, 21)]
+    assert client.calls == 21
+    assert len(created) == 1 and created[0].summary()["throttles"] == 1  # one stats object for the whole call
+
+
+def test_cached_and_duplicate_chunks_skip_titan():
+    memory_tier.clear()
+    client = FakeTitanClient()
+    client.calls = 1  # no throttle in this test
+    config = {"bedrock": {"requests_per_second": 1000, "max_requests_per_second": 1000}}
+    adapter = BedrockEmbeddingAdapter(client, config, embedding_cache=EmbeddingCache())
+
+    adapter.enrich_with_embeddings([{"sentences": ["boilerplate"]}, {"sentences": ["boilerplate"]}, {"sentences": ["a"]}])
+    assert client.calls == 1 + 2
+
+    enriched = adapter.enrich_with_embeddings([{"sentences": ["a"]}, {"sentences": ["boilerplate"]}])
+    assert client.calls == 1 + 2
+    assert [b["embedding"].to_list() for b in enriched] == [[1.0], [11.0]]
+    assert adapter.embedding_cache.stats()["memory_hits"] == 2
+
+
+def test_transient_server_and_connection_errors_are_retried():
+    failures = [
+        ClientError({"Error": {"Code": "ModelTimeoutException"}, "ResponseMetadata": {"HTTPStatusCode": 408}},
+                    "InvokeModel"),
+        ClientError({"Error": {"Code": "InternalServerException"}, "ResponseMetadata": {"HTTPStatusCode": 500}},
+                    "InvokeModel"),
+        EndpointConnectionError(endpoint_url="https://bedrock-runtime")
+    ]
+
+    class FlakyTitanClient:
+        def invoke_model(self, modelId, body, accept, contentType):
+            if failures:
+                raise failures.pop(0)
+            return {"body": io.BytesIO(json.dumps({"embedding": [1.0]}).encode())}
+
+    config = {"bedrock": {"requests_per_second": 1000, "max_requests_per_second": 1000}}
+    adapter = BedrockEmbeddingAdapter(FlakyTitanClient(), config)
+    initial_rate = adapter.rate_limiter.rate
+
+    stats = LatencyStats()
+    assert adapter.embed_batch(["hello"], stats) == [[1.0]]
+    assert stats.summary()["throttles"] == 0 and stats.summary()["calls"] == 1
+    assert adapter.rate_limiter.rate >= initial_rate
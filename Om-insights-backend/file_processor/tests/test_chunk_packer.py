@@ -0,0 +1,25 @@
+from file_processor.data_formatters.processors.text.chunk_packer import ChunkPacker
+from shared_layer.aws.utils.token_estimator import TokenEstimator
+
+
+def test_packs_whole_sentences_within_budget_with_overlap():
+    estimator = TokenEstimator(chars_per_token=4.0)
+    sentences = [f"Sentence number {i} talks about rice sales in Guntur." for i in range(40)]
+    packer = ChunkPacker(target_tokens=60, overlap_tokens=15, estimator=estimator)
+
+    chunks = packer.pack(" ".join(sentences))
+
+    assert packer.last_report["embedding_calls"] == len(chunks) < len(sentences)
+    assert all(estimator.estimate(chunk) <= 60 for chunk in chunks)
+    # Every sentence survives intact, and consecutive chunks share their boundary sentence
+    assert all(any(sentence in chunk for chunk in chunks) for sentence in sentences)
+    assert chunks[1].startswith(chunks[0].split(". ")[-1])
+
+
+def test_estimator_calibrates_towards_model_counts():
+    estimator = TokenEstimator(chars_per_token=3.5)
+    for _ in range(50):
+        estimator.observe(text_length=5000, token_count=1000)
+
+    assert abs(estimator.chars_per_token - 5.0) < 0.05
+    assert estimator.estimate("x" * 500) in (100, 101)
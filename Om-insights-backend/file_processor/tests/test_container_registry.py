@@ -0,0 +1,41 @@
+from dependency_injector import containers, providers
+
+from shared_layer.lifecycle.container_registry import get_container, request_scope, reset_containers
+
+
+class Client:
+    pass
+
+
+class ExampleContainer(containers.DeclarativeContainer):
+    client = providers.Singleton(Client)
+    request_state = providers.Singleton(dict)
+
+
+def test_container_is_built_once_and_keeps_singletons():
+    reset_containers()
+    created = []
+
+    first = get_container(ExampleContainer, on_create=created.append)
+    second = get_container(ExampleContainer, on_create=created.append)
+
+    assert first is second
+    assert created == [first]
+    assert first.client() is second.client()
+
+
+def test_request_scope_resets_only_request_state_and_runs_all_cleanups():
+    reset_containers()
+    container = get_container(ExampleContainer)
+    client = container.client()
+    calls = []
+
+    def failing_cleanup():
+        raise RuntimeError("flush failed")
+
+    with request_scope(container, reset=("request_state",), on_exit=(failing_cleanup, lambda: calls.append("ran"))):
+        container.request_state()["user"] = "a"
+
+    assert calls == ["ran"]
+    assert container.request_state() == {}
+    assert container.client() is client
@@ -0,0 +1,45 @@
+import bz2
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from file_processor.helpers.common.decode_helper import DecodeHelper
+
+
+def _zip(data: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("upload.txt", data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("compression, compress", [("gzip", gzip.compress), ("bz2", bz2.compress), ("zip", _zip)])
+def test_decompress_round_trip(compression, compress):
+    """Every compression the preflight detects decompresses back to the original bytes."""
+    text = "Große Nachfrage nach Kaffee\nsecond line\n".encode("utf-8")
+    assert DecodeHelper.decompress(compress(text), compression) == text
+
+
+def test_decompress_rejects_unknown_compression():
+    with pytest.raises(ValueError):
+        DecodeHelper.decompress(b"data", "xz")
+
+
+def test_decode_redetects_when_bytes_past_the_sample_are_not_the_hinted_encoding():
+    """A Latin-1 file whose first 64 KB are ASCII still decodes instead of failing the whole file."""
+    tail = "Café crème,3.50\nthé glacé,2.80\nCrêpe à la française,4.20\nGâteau très sucré,5.10\n" * 40
+    raw = b"Product,Price\n" * 6000 + tail.encode("latin-1")
+    assert DecodeHelper.decode(raw, "utf-8").endswith(tail)
+
+
+def test_decode_replaces_and_counts_undecodable_characters(monkeypatch):
+    counted = []
+    monkeypatch.setattr("file_processor.helpers.common.decode_helper.count",
+                        lambda stage, name, value: counted.append((name, value)))
+    monkeypatch.setattr("file_processor.helpers.common.decode_helper.S3Adapter.detect_encoding",
+                        staticmethod(lambda data: "utf-8"))
+
+    assert DecodeHelper.decode(b"ok \xff\xfe end") == "ok �� end"
+    assert counted == [("ReplacedCharacters", 2)]
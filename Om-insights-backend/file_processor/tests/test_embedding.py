@@ -0,0 +1,28 @@
+import json
+
+import numpy as np
+
+from shared_layer.model.embedding import Embedding, EmbeddingPrecision, dumps_document
+
+
+def test_precisions_round_trip_within_tolerance():
+    values = np.random.default_rng(7).normal(0, 0.05, 1536).astype(np.float32)
+
+    for precision, tolerance, nbytes in (
+            (EmbeddingPrecision.FLOAT32, 0.0, 6144),
+            (EmbeddingPrecision.FLOAT16, 1e-3, 3072),
+            (EmbeddingPrecision.INT8, np.abs(values).max() / 127, 1536)):
+        embedding = Embedding.from_floats(values.tolist(), precision)
+        restored = Embedding.from_bytes(embedding.to_bytes())
+
+        assert restored.precision == precision
+        assert embedding.nbytes == nbytes
+        assert np.max(np.abs(restored.to_numpy() - values)) <= tolerance + 1e-7
+
+
+def test_dumps_document_writes_compact_embedding():
+    embedding = Embedding.from_floats([0.1234567891, -0.5], EmbeddingPrecision.FLOAT16)
+    line = dumps_document({"text_hash": "abc", "embedding": embedding})
+
+    assert json.loads(line) == {"text_hash": "abc", "embedding": [0.12347, -0.5]}
+    assert dumps_document({"embedding": embedding}) == '{"embedding":[0.12347,-0.5]}'
@@ -0,0 +1,40 @@
+from botocore.exceptions import ClientError
+
+from shared_layer.cache import idempotency_store
+from shared_layer.cache.idempotency_store import DUPLICATE_IN_PROGRESS, STARTED, IdempotencyStore
+
+
+class FakeDynamoDB:
+    """Evaluates begin()'s condition: no claim, or an expired IN_PROGRESS claim."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues,
+                 ReturnValuesOnConditionCheckFailure):
+        key = Item["idempotency_key"]["S"]
+        old = self.items.get(key)
+        now = int(ExpressionAttributeValues[":now"]["N"])
+        if old and not (old["status"]["S"] == "IN_PROGRESS" and int(old["expires_at"]["N"]) < now):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}, "Item": old}, "PutItem")
+        self.items[key] = Item
+
+
+def test_claim_is_sized_from_the_lambda_timeout(monkeypatch):
+    monkeypatch.setenv("LAMBDA_TIMEOUT_SECONDS", "280")
+
+    assert IdempotencyStore().in_progress_seconds == 290
+    assert IdempotencyStore.claim_seconds_for_lambda(30) == 40
+
+
+def test_redelivery_after_the_visibility_timeout_takes_over_a_crashed_claim(monkeypatch):
+    monkeypatch.setenv("LAMBDA_TIMEOUT_SECONDS", "280")
+    store = IdempotencyStore(FakeDynamoDB(), "idempotency")
+    now = [1_000]
+    monkeypatch.setattr(idempotency_store.time, "time", lambda: now[0])
+
+    assert store.begin("process#abc") == STARTED       # this attempt times out without complete()/release()
+    now[0] += 100
+    assert store.begin("process#abc") == DUPLICATE_IN_PROGRESS  # still running as far as anyone knows
+    now[0] = 1_000 + 300 + 1                           # worker queue visibility timeout has passed
+    assert store.begin("process#abc") == STARTED
@@ -0,0 +1,51 @@
+import math
+from collections import Counter
+
+from file_processor.data_formatters.processors.text import keyword_stats
+from file_processor.data_formatters.processors.text.keyword_stats import (KeywordStatistics, KeywordStatsStore,
+                                                                          TfidfKeywordExtractor)
+
+
+def test_idf_is_smoothed_and_unknown_terms_score_highest():
+    stats = KeywordStatistics()
+    stats.add_documents([{"sales", "store"}, {"sales"}, {"sales", "refund"}])
+
+    assert stats.idf("sales") == math.log(4 / 4) + 1.0
+    assert stats.idf("refund") == math.log(4 / 2) + 1.0
+    assert stats.idf("unseen") == math.log(4 / 1) + 1.0 > stats.idf("refund") > stats.idf("sales")
+
+
+def test_merge_adds_documents_and_prune_keeps_frequent_terms():
+    left, right = KeywordStatistics(2, {"sales": 2, "store": 1}), KeywordStatistics(1, {"sales": 1, "refund": 1})
+
+    left.merge(right)
+    left.prune(2)
+
+    assert left.n_docs == 3
+    assert left.df["sales"] == 3 and len(left.df) == 2
+    assert KeywordStatistics.from_bytes(left.to_bytes()).df == left.df
+
+
+def test_rank_prefers_terms_rare_in_the_corpus_and_reads_once_per_file(fake_s3):
+    store = KeywordStatsStore(fake_s3, bucket="stats")
+    store.update("acme", KeywordStatistics(10, {"sales": 10, "store": 8}))
+    fake_s3.gets = fake_s3.puts = 0
+
+    ranked = TfidfKeywordExtractor(store, top_k=2).rank("acme", [Counter({"sales": 2, "refund": 1, "store": 1})])
+
+    assert list(ranked[0]) == ["refund", "sales"]
+    assert ranked[0]["refund"] == 1.0
+    assert (fake_s3.gets, fake_s3.puts) == (1, 1)
+    assert store.load("acme").n_docs == 11
+
+
+def test_concurrent_update_is_merged_not_overwritten(monkeypatch, fake_s3):
+    monkeypatch.setattr(keyword_stats.time, "sleep", lambda seconds: None)
+    store = KeywordStatsStore(fake_s3, bucket="stats")
+    base, etag = store.load_versioned("acme")
+
+    fake_s3.before_put = lambda: store.update("acme", KeywordStatistics(2, {"refund": 2}))
+    stats = store.update("acme", KeywordStatistics(1, {"sales": 1}), base=base, etag=etag)
+
+    assert stats.n_docs == 3
+    assert store.load("acme").df == Counter({"refund": 2, "sales": 1})
@@ -0,0 +1,48 @@
+import pytest
+
+from shared_layer.logging import metrics
+from shared_layer.logging.metrics import Span, metric_tags, span
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.lines = []
+
+    def info(self, msg, extra=None):
+        self.lines.append(extra)
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(metrics, "logger", recorder)
+    return recorder.lines
+
+
+def test_span_emits_emf_with_tags_and_throughput(emitted):
+    with metric_tags(data_type="Sales", business_id="acme", tier="pro"):
+        with span("s3_fetch", bytes=2048):
+            pass
+
+    [line] = emitted
+    directive = line["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Dimensions"] == [["Stage", "DataType", "Tier"]]
+    assert {metric["Name"] for metric in directive["Metrics"]} == {"Duration", "Bytes", "BytesPerSecond"}
+    assert (line["Stage"], line["DataType"], line["Tier"], line["business_id"]) == ("s3_fetch", "sales", "pro", "acme")
+    assert line["Bytes"] == 2048
+
+
+def test_span_accumulates_across_restarts_and_counts_errors(emitted):
+    parse_span = Span("csv_parse")
+    for _ in range(3):
+        with parse_span:
+            pass
+    try:
+        with parse_span:
+            raise ValueError("bad row")
+    except ValueError:
+        pass
+    parse_span.add(rows=10).emit()
+
+    [line] = emitted
+    assert (line["Rows"], line["Errors"], line["DataType"]) == (10, 1, "unknown")
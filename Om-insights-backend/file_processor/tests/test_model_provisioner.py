@@ -0,0 +1,72 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+import pytest
+
+from shared_layer.aws.utils import model_provisioner
+from shared_layer.aws.utils.model_provisioner import ModelProvisioner, ModelProvisionError
+
+
+def _model_archive() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in (("en_core_web_sm/config.cfg", b"[nlp]"), ("en_core_web_sm/meta.json", b"{}")):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class FakeS3:
+    def __init__(self, archive: bytes, sha256: str):
+        self.archive = archive
+        self.manifest = json.dumps({"version": "3.7.1", "sha256": sha256}).encode()
+        self.downloads = 0
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.manifest)}
+
+    def download_file(self, bucket, key, path):
+        self.downloads += 1
+        with open(path, "wb") as f:
+            f.write(self.archive)
+
+
+@pytest.fixture(autouse=True)
+def reset_warm_handles():
+    model_provisioner._ready_paths.clear()
+    yield
+    model_provisioner._ready_paths.clear()
+
+
+def test_publishes_version_once(tmp_path):
+    archive = _model_archive()
+    s3 = FakeS3(archive, hashlib.sha256(archive).hexdigest())
+    provisioner = ModelProvisioner("bucket", "model.tar.gz", str(tmp_path), "en_core_web_sm",
+                                   manifest_key="model.manifest.json", s3_client=s3)
+
+    path = provisioner.ensure_ready()
+
+    assert path == os.path.join(str(tmp_path), "en_core_web_sm", "3.7.1")
+    assert os.path.isfile(os.path.join(path, "config.cfg"))
+    assert provisioner.is_ready("3.7.1")
+
+    # A new execution environment (no warm handle) finds the published version.
+    model_provisioner._ready_paths.clear()
+    assert provisioner.ensure_ready() == path
+    assert s3.downloads == 1
+
+
+def test_checksum_mismatch_publishes_nothing(tmp_path):
+    s3 = FakeS3(_model_archive(), "0" * 64)
+    provisioner = ModelProvisioner("bucket", "model.tar.gz", str(tmp_path), "en_core_web_sm",
+                                   manifest_key="model.manifest.json", s3_client=s3)
+
+    with pytest.raises(ModelProvisionError):
+        provisioner.ensure_ready()
+
+    assert not provisioner.is_ready("3.7.1")
+    assert os.listdir(os.path.join(str(tmp_path), "en_core_web_sm")) == []
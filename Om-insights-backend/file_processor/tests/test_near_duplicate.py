@@ -0,0 +1,47 @@
+from file_processor.data_formatters.processors.text import near_duplicate
+from file_processor.data_formatters.processors.text.near_duplicate import (
+    FingerprintStore, NearDuplicateFilter, SimHashIndex, hamming_distance, simhash
+)
+
+INVOICE = ("Invoice number {n} issued to Sri Lakshmi Traders for delivery of rice bags, "
+           "payment due within thirty days of the invoice date via bank transfer to our account")
+
+
+def test_simhash_is_close_for_near_duplicates_only():
+    a, _ = simhash(INVOICE.format(n=1001))
+    b, _ = simhash(INVOICE.format(n=1002))
+    c, _ = simhash("Customer feedback says the new store layout makes it easy to find spices and snacks quickly")
+
+    assert hamming_distance(a, b) <= 10
+    assert hamming_distance(a, c) > 10
+
+
+def test_index_finds_fingerprints_within_threshold():
+    index = SimHashIndex(threshold=3)
+    index.add(0b1011)
+
+    assert index.find(0b1011 ^ (1 << 40) ^ (1 << 7)) == 0b1011
+    assert index.find(0b1011 ^ 0b1111 << 20) is None
+
+
+def test_filter_collapses_duplicates_and_keeps_order():
+    chunks = [INVOICE.format(n=1), "short note", INVOICE.format(n=1), "short note", "Quarterly sales grew in Guntur " * 3]
+
+    unique = NearDuplicateFilter(hamming_threshold=3).filter(None, chunks)
+
+    assert unique == [chunks[0], "short note", "short note", chunks[4]]
+
+
+def test_concurrent_fingerprint_flushes_keep_both_writers(monkeypatch, fake_s3):
+    """A flush that loses the conditional write re-appends onto the other writer's fingerprints."""
+    monkeypatch.setattr(near_duplicate.time, "sleep", lambda seconds: None)
+    near_duplicate.fingerprint_cache.clear()
+    ours, theirs = FingerprintStore(fake_s3), FingerprintStore(fake_s3)
+    ours.add("biz-1", [1, 2])
+    theirs.add("biz-1", [3])
+
+    fake_s3.before_put = theirs.flush
+    assert ours.flush() == 1
+
+    near_duplicate.fingerprint_cache.clear()
+    assert sorted(ours.load("biz-1")) == [1, 2, 3]
@@ -0,0 +1,61 @@
+from file_processor.data_formatters.processors.text import noise_profile
+from file_processor.data_formatters.processors.text.noise_profile import (FrequencySketch, NoiseProfile,
+                                                                          NoiseProfileStore)
+
+
+def test_sketch_merge_matches_single_sketch():
+    """Merging two per-file sketches gives the same estimates as counting everything in one."""
+    left, right, combined = FrequencySketch(256, 4, 10), FrequencySketch(256, 4, 10), FrequencySketch(256, 4, 10)
+    left.update({"order": 5, "price": 2})
+    right.update({"order": 3, "delivery": 4})
+    combined.update({"order": 8, "price": 2, "delivery": 4})
+
+    left.merge(right)
+
+    assert left.table == combined.table
+    assert left.total == combined.total
+    assert left.estimate("order") >= 8
+    assert left.most_common(1)[0][0] == "order"
+
+
+def test_noise_profile_round_trip_and_noise_words():
+    """Serialized profiles keep their counts, and entity words are never reported as noise."""
+    profile = NoiseProfile(width=256, depth=4, top_k=10)
+    profile.record({"item": 9, "store": 6, "paris": 4}, ["Paris"])
+    profile.record({"item": 3}, ["paris"])
+
+    restored = NoiseProfile.from_bytes(profile.to_bytes("biz-1"))
+
+    assert restored.files == 2
+    assert restored.tokens.estimate("item") >= 12
+    assert "paris" not in restored.noise_words()
+    assert {"item", "store"} <= restored.noise_words()
+
+
+def test_noise_words_survive_a_sketch_full_of_entities():
+    """Once every sketch cell holds entity counts, frequent non-entity tokens are still noise."""
+    profile = NoiseProfile(width=256, depth=4, top_k=10)
+    for file_no in range(200):
+        entities = [f"customer{file_no}x{i}" for i in range(50)] + ["paris"]
+        profile.record({"item": 40, "store": 30, "paris": 20, **{name: 1 for name in entities}}, entities)
+
+    assert min(profile.entities.table) > 0  # every cell collides with some entity
+    noise = profile.noise_words()
+    assert {"item", "store"} <= noise
+    assert "paris" not in noise
+
+
+def test_concurrent_flushes_accumulate(monkeypatch, fake_s3):
+    """A flush that loses the conditional write re-merges onto the other writer's profile."""
+    monkeypatch.setattr(noise_profile.time, "sleep", lambda seconds: None)
+    noise_profile.profile_cache.clear()
+    ours, theirs = NoiseProfileStore(fake_s3, width=256, depth=4), NoiseProfileStore(fake_s3, width=256, depth=4)
+    ours.record("biz-1", {"item": 5}, [])
+    theirs.record("biz-1", {"store": 7}, [])
+
+    fake_s3.before_put = theirs.flush
+    assert ours.flush() == 1
+
+    stored = NoiseProfile.from_bytes(fake_s3.objects["biz-1/noise_profile.json.gz"][0])
+    assert stored.files == 2
+    assert stored.tokens.estimate("item") >= 5 and stored.tokens.estimate("store") >= 7
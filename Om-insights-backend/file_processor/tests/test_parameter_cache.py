@@ -0,0 +1,56 @@
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from shared_layer.cache.parameter_cache import ParameterCache
+
+
+class FakeSSM:
+    def __init__(self):
+        self.value = "100"
+        self.calls = 0
+        self.fail = False
+        self.fetched = threading.Event()
+
+    def get_parameter(self, Name, WithDecryption=False):
+        self.calls += 1
+        self.fetched.set()
+        if self.fail:
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "GetParameter")
+        return {"Parameter": {"Name": Name, "Value": self.value}}
+
+
+def test_fresh_values_come_from_memory():
+    ParameterCache.clear()
+    ssm = FakeSSM()
+    cache = ParameterCache(ssm, ttl_seconds=60)
+
+    assert [cache.get_int("/threshold", 0) for _ in range(5)] == [100] * 5
+    assert ssm.calls == 1
+
+
+def test_stale_value_is_served_while_refreshing_in_background():
+    ParameterCache.clear()
+    ssm = FakeSSM()
+    cache = ParameterCache(ssm, ttl_seconds=0.01, max_stale_seconds=60)
+    cache.get("/threshold")
+    time.sleep(0.02)
+    ssm.value = "200"
+    ssm.fetched.clear()
+
+    assert cache.get("/threshold") == "100"
+    assert ssm.fetched.wait(1)
+    time.sleep(0.05)
+    assert cache.get("/threshold") == "200"
+
+
+def test_failures_fall_back_to_default_without_hammering_ssm():
+    ParameterCache.clear()
+    ssm = FakeSSM()
+    ssm.fail = True
+    cache = ParameterCache(ssm)
+
+    assert cache.get_int("/threshold", 42) == 42
+    assert cache.get_int("/threshold", 42) == 42
+    assert ssm.calls == 1
@@ -0,0 +1,66 @@
+import gzip
+
+from file_processor.helpers.common.preflight_helper import INLINE, SHARDED, SINGLE, PreflightHelper
+from file_processor.model.file_metadata_dto import FileMetadataDTO
+
+CONFIG = {"file_processing": {"preflight": {"sample_bytes": 4096, "inline_max_bytes": 8192}}}
+
+
+class FakeS3:
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    def get_object_range(self, bucket, key, start, end):
+        self.requests.append((start, end))
+        return self.body[start:end + 1]
+
+
+def metadata(body, file_format="csv"):
+    return FileMetadataDTO(
+        company="acme", event_time="2025-01-01T00:00:00Z", data_type="sales", business_region="us",
+        subscription="pro", file_name=f"data.{file_format}", file_size=len(body), file_format=file_format,
+        s3_key=f"acme/sales/data.{file_format}", bucket="uploads", status="Uploaded"
+    )
+
+
+def test_small_csv_is_inlined_with_its_layout():
+    body = b"Product;Price;Date\n" + b"".join(f"item{i};{i}.5;2025-01-0{i % 9 + 1}\n".encode() for i in range(20))
+    s3 = FakeS3(body)
+
+    hints, content = PreflightHelper(s3, CONFIG).inspect(metadata(body), size_threshold=1_000_000)
+
+    assert hints.tier == INLINE
+    assert content == body.decode()
+    assert hints.delimiter == ";"
+    assert hints.header == "Product;Price;Date"
+    assert s3.requests == [(0, len(body) - 1)]
+
+
+def test_large_file_is_sharded_from_one_sample():
+    body = b"Product,Price\n" + b"".join(f"item{i:05d},{i % 10}\n".encode() for i in range(20_000))
+    s3 = FakeS3(body)
+
+    hints, content = PreflightHelper(s3, CONFIG).inspect(metadata(body), size_threshold=100_000)
+
+    assert hints.tier == SHARDED
+    assert content is None
+    assert s3.requests == [(0, 4095)]
+    assert abs(hints.estimated_rows - 20_000) < 200
+
+
+def test_compressed_file_goes_to_a_single_worker():
+    body = gzip.compress(b"Product,Price\n" + b"item,1\n" * 50_000)
+    hints, content = PreflightHelper(FakeS3(body), CONFIG).inspect(metadata(body), size_threshold=10)
+
+    assert (hints.tier, hints.compression, content) == (SINGLE, "gzip", None)
+
+
+def test_non_ascii_file_is_not_inlined_when_the_escaped_message_exceeds_sqs_limit():
+    body = ("Produit,Catégorie\n" + "éèêëàâ,çüûùôî\n" * 4000).encode("utf-8")  # ~100 KB, ~300 KB escaped
+    config = {"file_processing": {"preflight": {"sample_bytes": 256 * 1024, "inline_max_bytes": 128 * 1024}}}
+    assert len(body) < 128 * 1024
+
+    hints, content = PreflightHelper(FakeS3(body), config).inspect(metadata(body), size_threshold=1_000_000)
+
+    assert (hints.tier, content) == (SINGLE, None)
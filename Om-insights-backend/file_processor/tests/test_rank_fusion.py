@@ -0,0 +1,36 @@
+import time
+
+from shared_layer.aws.adapters.aoss_adapter import AOSSAdapter, search_cache
+from shared_layer.model.search_model import SearchHit, SearchMode, SearchRequest
+from shared_layer.search.rank_fusion import reciprocal_rank_fusion
+
+
+def _hits(*ids):
+    return [SearchHit(id=doc_id, score=1.0) for doc_id in ids]
+
+
+def test_documents_found_by_both_legs_rank_first():
+    fused = reciprocal_rank_fusion([_hits("a", "b", "c"), _hits("invoice-42", "b")], limit=3)
+
+    assert [hit.id for hit in fused] == ["b", "a", "invoice-42"]
+    assert fused[0].score > fused[1].score
+
+
+def test_hybrid_search_drops_a_slow_leg(monkeypatch):
+    search_cache.clear()
+    adapter = AOSSAdapter(None, {"aoss": {"endpoint": "https://search.local", "index_name": "sales_template_v1",
+                                          "search": {"hybrid": {"knn_timeout_seconds": 0.05}}}})
+
+    def slow_knn(vector, request, size):
+        time.sleep(0.5)
+        return _hits("vector-hit")
+
+    monkeypatch.setattr(adapter, "_query_vector", lambda request: None)
+    monkeypatch.setattr(adapter, "_knn_search", slow_knn)
+    monkeypatch.setattr(adapter, "_lexical_search", lambda request, size: _hits("INV-2024-001", "other"))
+
+    started = time.perf_counter()
+    response = adapter.search(SearchRequest(query_text="INV-2024-001", mode=SearchMode.HYBRID, k=2))
+
+    assert time.perf_counter() - started < 0.4
+    assert [hit.id for hit in response.hits] == ["INV-2024-001", "other"]
@@ -0,0 +1,155 @@
+import json
+
+from botocore.exceptions import ClientError
+
+from file_processor.services.impl.routing_service_impl import RoutingServiceImpl
+from shared_layer.aws.adapters.sqs_adapter import SQSAdapter
+from shared_layer.cache.idempotency_store import IdempotencyStore
+from shared_layer.cache.parameter_cache import ParameterCache
+
+CONFIG = {
+    "queues": {
+        "sales": {"url": "https://sqs/sales", "tiers": {"pro": "https://sqs/sales-pro", "free": "https://sqs/sales-free"}},
+        "inventory": {"url": "https://sqs/inventory"}
+    },
+    "subscription_tiers": {"default": "free", "tiers": ["free", "basic", "pro"]},
+    "dynamodb": {"routing_metadata": {"table_name": "routing-metadata"}},
+    "file_processing": {"size_threshold_param": "/threshold", "sharding": {"shard_bytes": 4 * 1024 * 1024}}
+}
+
+
+class FakeDynamo:
+    def __init__(self):
+        self.statuses = {}
+        self.shards_total = {}
+
+    def put_item(self, table_name, item):
+        pass
+
+    def update_metadata_status(self, business_id, event_time, new_status, table_name):
+        self.statuses[(business_id, event_time)] = new_status
+
+    def start_shard_tracking(self, business_id, event_time, shard_count, table_name):
+        self.statuses[(business_id, event_time)] = "Sharded"
+        self.shards_total[(business_id, event_time)] = shard_count
+
+
+class FakeSQS:
+    def __init__(self, fail_keys=()):
+        self.fail_keys = set(fail_keys)
+        self.calls = []
+        self.bodies = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append((QueueUrl, len(Entries)))
+        self.bodies.extend(json.loads(e["MessageBody"]) for e in Entries)
+        failed = [e for e in Entries if json.loads(e["MessageBody"])["s3_key"] in self.fail_keys]
+        return {"Successful": [{"Id": e["Id"]} for e in Entries if e not in failed],
+                "Failed": [{"Id": e["Id"], "Code": "InternalError", "SenderFault": False} for e in failed]}
+
+
+class FakeSSM:
+    def __init__(self):
+        self.calls = 0
+
+    def get_parameter(self, Name, WithDecryption=False):
+        self.calls += 1
+        return {"Parameter": {"Value": str(10 * 1024 * 1024)}}
+
+
+def _s3_record(key, minute, size=100):
+    return {
+        "eventVersion": "2.1", "eventSource": "aws:s3", "awsRegion": "us-east-1",
+        "eventTime": f"2025-06-01T10:{minute:02d}:00Z", "eventName": "ObjectCreated:Put",
+        "s3": {"bucket": {"name": "uploads", "arn": "arn:aws:s3:::uploads"},
+               "object": {"key": key, "size": size, "eTag": "abc", "sequencer": "01"}}
+    }
+
+
+def _sqs_event(*messages):
+    return {"Records": [{"messageId": message_id, "body": json.dumps({"Records": records})}
+                        for message_id, records in messages]}
+
+
+def test_every_record_is_routed_in_batches_and_failures_are_reported():
+    sqs = FakeSQS(fail_keys={"r/basic/acme/inventory/b.csv"})
+    ParameterCache.clear()
+    service = RoutingServiceImpl(FakeDynamo(), SQSAdapter(CONFIG, sqs), ParameterCache(FakeSSM()), CONFIG)
+    event = _sqs_event(
+        ("m1", [_s3_record(f"r/basic/acme/sales/{n}.txt", n) for n in range(12)]),
+        ("m2", [_s3_record("r/basic/acme/inventory/b.csv", 30)]),
+        ("m3", [_s3_record("r/basic/acme/unknown/c.bin", 31)]),
+        ("m4", []),
+    )
+    event["Records"].append({"messageId": "m5", "body": "not json"})
+
+    result = service.route_batch(event)
+
+    assert result["routed"] == 12
+    # basic has no sales tier queue configured, so it falls back to the shared sales queue
+    assert sorted(sqs.calls) == [("https://sqs/inventory", 1), ("https://sqs/sales", 2), ("https://sqs/sales", 10)]
+    assert result["batchItemFailures"] == [{"itemIdentifier": "m2"}, {"itemIdentifier": "m5"}]
+
+
+def test_file_over_threshold_is_split_into_byte_range_shards():
+    sqs, dynamo = FakeSQS(), FakeDynamo()
+    ParameterCache.clear()
+    service = RoutingServiceImpl(dynamo, SQSAdapter(CONFIG, sqs), ParameterCache(FakeSSM()), CONFIG)
+    size = 11 * 1024 * 1024
+
+    result = service.route_batch(_sqs_event(("m1", [_s3_record("r/pro/acme/sales/big.csv", 5, size=size)])))
+
+    assert result == {"batchItemFailures": [], "routed": 0, "sharded": 1, "duplicates": 0}
+    assert list(dynamo.shards_total.values()) == [3]
+    assert {url for url, _ in sqs.calls} == {"https://sqs/sales-pro"}
+    assert [(b["shard_index"], b["byte_start"], b["byte_end"]) for b in sqs.bodies] == [
+        (0, 0, 4194304), (1, 4194304, 8388608), (2, 8388608, size)
+    ]
+
+
+def test_files_go_to_their_subscription_tier_queue():
+    sqs = FakeSQS()
+    ParameterCache.clear()
+    service = RoutingServiceImpl(FakeDynamo(), SQSAdapter(CONFIG, sqs), ParameterCache(FakeSSM()), CONFIG)
+
+    service.route_batch(_sqs_event(
+        ("m1", [_s3_record("r/pro/acme/sales/a.csv", 1)]),
+        ("m2", [_s3_record("r/free/bulk/sales/b.csv", 2), _s3_record("r/trial/new/sales/c.csv", 3)]),
+    ))
+
+    assert sorted(sqs.calls) == [("https://sqs/sales-free", 2), ("https://sqs/sales-pro", 1)]
+
+
+class FakeIdempotencyTable:
+    """Conditional-write semantics of the idempotency table, in memory."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item, ConditionExpression, **kwargs):
+        key = Item["idempotency_key"]["S"]
+        if key in self.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}, "Item": self.items[key]},
+                              "PutItem")
+        self.items[key] = Item
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, **kwargs):
+        self.items[Key["idempotency_key"]["S"]]["status"] = ExpressionAttributeValues[":completed"]
+
+    def delete_item(self, TableName, Key, **kwargs):
+        self.items.pop(Key["idempotency_key"]["S"], None)
+
+
+def test_duplicate_notifications_are_routed_once():
+    sqs = FakeSQS(fail_keys={"r/pro/acme/sales/retry.csv"})
+    ParameterCache.clear()
+    store = IdempotencyStore(FakeIdempotencyTable(), "idempotency")
+    service = RoutingServiceImpl(FakeDynamo(), SQSAdapter(CONFIG, sqs), ParameterCache(FakeSSM()), CONFIG, store)
+    event = _sqs_event(("m1", [_s3_record("r/pro/acme/sales/a.csv", 1), _s3_record("r/pro/acme/sales/retry.csv", 2)]))
+
+    first = service.route_batch(event)
+    sqs.fail_keys.clear()
+    second = service.route_batch(event)
+
+    assert (first["routed"], first["duplicates"]) == (1, 0)
+    assert (second["routed"], second["duplicates"]) == (1, 1)  # only the file whose send failed is retried
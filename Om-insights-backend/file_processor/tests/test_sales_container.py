@@ -0,0 +1,49 @@
+import io
+import json
+
+import pytest
+from dependency_injector import providers
+
+pytest.importorskip("spacy")  # The sales container imports the NLP stack
+from file_processor.src.processing_lambdas.sales.container import SalesWorkerContainer  # noqa: E402
+from shared_layer.aws.adapters import aoss_adapter as aoss_adapter_module  # noqa: E402
+from shared_layer.model.search_model import SearchRequest  # noqa: E402
+
+
+class FakeTitan:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        return {"body": io.BytesIO(json.dumps({"embedding": [0.1] * 8, "inputTextTokenCount": 2}).encode())}
+
+
+class FakeClients:
+    def __init__(self):
+        self.bedrock_client = FakeTitan()
+        self.aoss_client = None
+        self.dynamodb_client = None
+
+
+class FakeSearchResponse:
+    ok, status_code, text = True, 200, ""
+
+    def json(self):
+        return {"hits": {"hits": [{"_id": "1", "_score": 0.9, "_source": {"business_id": "acme"}}]}}
+
+
+def test_wired_aoss_adapter_searches_by_text(monkeypatch):
+    monkeypatch.setattr(aoss_adapter_module, "get_sigv4_auth", lambda region, service: None)
+    container = SalesWorkerContainer()
+    clients = FakeClients()
+    container.aws_clients.override(providers.Object(clients))
+    container.embedding_cache.override(providers.Object(None))
+
+    adapter = container.aoss_adapter()
+    adapter.session.post = lambda *args, **kwargs: FakeSearchResponse()
+    response = adapter.search(SearchRequest(query_text="late deliveries in march", business_id="acme"))
+
+    assert adapter.embedder is container.bedrock_adapter()
+    assert clients.bedrock_client.calls == 1
+    assert [hit.id for hit in response.hits] == ["1"]
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+pytest.importorskip("spacy")  # The sales handler imports the NLP stack
+from file_processor.src.processing_lambdas.sales import sales_lambda  # noqa: E402
+
+
+class RecordingFingerprintStore:
+    def __init__(self):
+        self.calls = []
+
+    def flush(self):
+        self.calls.append("flush")
+
+    def discard(self):
+        self.calls.append("discard")
+
+
+class FakeContainer:
+    def __init__(self):
+        self.store = RecordingFingerprintStore()
+
+    def chunk_fingerprint_store(self):
+        return self.store
+
+
+class FakeWorkerService:
+    def __init__(self, result):
+        self.result = result
+
+    def process_data(self, sqs_body):
+        return self.result
+
+
+RECORD = {"messageId": "m1", "body": json.dumps({
+    "company": "acme", "event_time": "2025-01-01T00:00:00Z", "data_type": "sales", "business_region": "us",
+    "subscription": "pro", "file_name": "notes.txt", "file_size": 10, "file_format": "txt",
+    "s3_key": "acme/sales/notes.txt", "bucket": "uploads", "status": "Uploaded"
+})}
+
+
+@pytest.mark.parametrize("result, expected", [
+    ({"status": "Success", "metadata": {"chunks_indexed": False}}, "discard"),
+    ({"status": "Success", "metadata": {"chunks_indexed": True}}, "flush"),
+    ({"status": "Failed"}, "discard"),
+])
+def test_fingerprints_are_kept_only_after_a_confirmed_index_write(monkeypatch, result, expected):
+    container = FakeContainer()
+    monkeypatch.setattr(sales_lambda, "container", container)
+    uncommitted = []
+
+    sales_lambda._process_record(RECORD, FakeWorkerService(result), flush_fingerprints=True, uncommitted=uncommitted)
+
+    assert container.store.calls == [expected]
+    assert uncommitted == ([] if expected == "flush" else ["m1"])
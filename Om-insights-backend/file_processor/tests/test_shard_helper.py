@@ -0,0 +1,90 @@
+from botocore.exceptions import ClientError
+
+from file_processor.helpers.common.metadata_helper import MetadataHelper
+from file_processor.helpers.common.shard_helper import ShardHelper
+from shared_layer.aws.adapters.dynamodb_adapter import DynamoDBAdapter
+
+
+class FakeS3:
+    def __init__(self, body):
+        self.body = body
+        self.requests = 0
+
+    def get_object_range(self, bucket, key, start, end):
+        self.requests += 1
+        return self.body[start:end + 1]
+
+
+class FakeShardTable:
+    """In-memory stand-in for the set-based shard counters of DynamoDBAdapter."""
+
+    def __init__(self, shards_total):
+        self.item = {"status": "Sharded", "shards_total": shards_total, "completed": set(), "failed": set()}
+
+    def record_shard_result(self, business_id, event_time, shard_index, succeeded, table_name):
+        self.item["completed"].add(shard_index)
+        if not succeeded:
+            self.item["failed"].add(shard_index)
+        return {"status": self.item["status"], "shards_total": self.item["shards_total"],
+                "completed_shards": len(self.item["completed"]), "failed_shards": len(self.item["failed"])}
+
+    def complete_sharded_file(self, business_id, event_time, final_status, table_name):
+        if self.item["status"] != "Sharded" or len(self.item["completed"]) != self.item["shards_total"]:
+            return False
+        self.item["status"] = final_status
+        return True
+
+
+def test_shards_cover_every_line_exactly_once():
+    body = b"id,name\n" + b"".join(f"{i},{'x' * (i % 17)}\n".encode() for i in range(500))
+    s3 = FakeS3(body)
+    shards = ShardHelper.plan(len(body), shard_bytes=1000)
+
+    pieces = [ShardHelper.read_shard(s3, "b", "k", start, end, len(body), tail_bytes=64) for start, end in shards]
+
+    assert len(shards) == -(-len(body) // 1000)
+    assert b"".join(pieces) == body
+    assert all(piece.endswith(b"\n") for piece in pieces if piece)
+    assert ShardHelper.read_header(s3, "b", "k", len(body)) == b"id,name\n"
+
+
+def test_plan_grows_shards_to_respect_max_shards():
+    assert len(ShardHelper.plan(10_000, shard_bytes=10, max_shards=8)) == 8
+
+
+def test_last_shard_marks_file_processed_once():
+    table = FakeShardTable(shards_total=3)
+    helper = MetadataHelper(table, {"dynamodb": {"routing_metadata": {"table_name": "routing-metadata"}}})
+
+    results = [helper.record_shard_result("acme", "t", index, succeeded=True) for index in (0, 2, 1, 1)]
+
+    assert results == [None, None, "Processed", None]
+    assert table.item["status"] == "Processed"
+
+
+class FakeMetadataClient:
+    """Evaluates start_shard_tracking's condition against one in-memory metadata item."""
+
+    def __init__(self):
+        self.item = {"business_id": "acme"}
+
+    def update_item(self, UpdateExpression, ExpressionAttributeValues, ConditionExpression, **kwargs):
+        total = int(ExpressionAttributeValues[":total"]["N"])
+        if "shards_total = :total" in ConditionExpression and self.item.get("shards_total", total) != total:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        self.item.update(status="Sharded", shards_total=total)
+        if "REMOVE" in UpdateExpression:
+            self.item.pop("completed_shards", None)
+
+
+def test_retried_shard_tracking_keeps_recorded_shards():
+    client = FakeMetadataClient()
+    adapter = DynamoDBAdapter(client, {})
+
+    adapter.start_shard_tracking("acme", "t", 3, "routing-metadata")
+    client.item["completed_shards"] = {"0", "1"}
+    adapter.start_shard_tracking("acme", "t", 3, "routing-metadata")  # Router retry after a failed send
+    assert client.item["completed_shards"] == {"0", "1"}
+
+    adapter.start_shard_tracking("acme", "t", 5, "routing-metadata")  # Re-planned with other ranges
+    assert "completed_shards" not in client.item
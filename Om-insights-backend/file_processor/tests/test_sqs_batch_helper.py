@@ -0,0 +1,18 @@
+import pytest
+
+from file_processor.helpers.worker.sqs_batch_helper import SQSBatchHelper
+
+
+def _handle(record):
+    if record["body"] == "boom":
+        raise RuntimeError("processing failed")
+    return record["body"] != "retry"
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_only_failed_records_are_reported(max_workers):
+    records = [{"messageId": f"m{i}", "body": body} for i, body in enumerate(["ok", "retry", "ok", "boom", "ok"])]
+
+    response = SQSBatchHelper.process(records, _handle, max_workers=max_workers)
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "m1"}, {"itemIdentifier": "m3"}]}
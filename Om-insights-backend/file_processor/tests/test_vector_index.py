@@ -0,0 +1,117 @@
+import numpy as np
+
+from shared_layer.model.search_model import SearchRequest, SearchResponse
+from shared_layer.repository.aoss_repository import AOSSRepository
+from shared_layer.search import local_vector_adapter
+from shared_layer.search.local_vector_adapter import HotTenantVectorCache, LocalVectorAdapter
+from shared_layer.search.vector_index import VectorIndex
+
+
+def _random_vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_hnsw_recall_matches_brute_force():
+    vectors = _random_vectors(1500)
+    exact, graph = VectorIndex(16, hnsw_threshold=10**9), VectorIndex(16, hnsw_threshold=200)
+    for n, vector in enumerate(vectors):
+        exact.add(str(n), vector)
+        graph.add(str(n), vector)
+    assert graph.uses_graph and not exact.uses_graph
+
+    queries = _random_vectors(30, seed=1)
+    recall = np.mean([
+        len({i for i, _ in exact.search(q, 10)} & {i for i, _ in graph.search(q, 10)}) / 10 for q in queries
+    ])
+    assert recall >= 0.9
+
+
+def test_filters_and_mmap_round_trip(tmp_path):
+    vectors = _random_vectors(400)
+    index = VectorIndex(16, hnsw_threshold=100)
+    for n, vector in enumerate(vectors):
+        index.add(str(n), vector, {"business_id": f"biz-{n % 4}", "data_type": "sales"})
+    index.save(str(tmp_path))
+
+    loaded = VectorIndex.load(str(tmp_path))
+    assert isinstance(loaded.vectors, np.memmap)
+    results = loaded.search(vectors[5], 5, filters={"business_id": "biz-1"})
+    assert results[0][0] == "5"
+    assert all(int(doc_id) % 4 == 1 for doc_id, _ in results)
+
+    loaded.add("new", vectors[0], {"business_id": "biz-9"})
+    assert loaded.search(vectors[0], 1, filters={"business_id": "biz-9"})[0][0] == "new"
+
+
+def test_local_adapter_serves_typed_hits_with_date_filter():
+    adapter = LocalVectorAdapter(config={"aoss": {"local_index": {"dimension": 3}}})
+    adapter.index_unstructured_data([
+        {"text_hash": "old", "business_id": "b", "timestamp": "2024-01-01T00:00:00Z", "embedding": [1.0, 0, 0]},
+        {"text_hash": "new", "business_id": "b", "timestamp": "2025-06-01T00:00:00Z", "embedding": [0.9, 0.1, 0],
+         "sentences": ["Q2 sales rose."]},
+    ])
+
+    response = adapter.search(SearchRequest(query_vector=[1.0, 0, 0], business_id="b", date_from="2025-01-01T00:00:00", k=5))
+
+    assert [hit.id for hit in response.hits] == ["new"]
+    assert response.hits[0].sentences == ["Q2 sales rose."]
+
+
+class FakeRemote(AOSSRepository):
+    def __init__(self, documents):
+        super().__init__(None, {"aoss": {"local_index": {"dimension": 3}}})
+        self.documents, self.searches = documents, []
+
+    def scan_documents(self, business_id):
+        return (dict(document) for document in self.documents if document["business_id"] == business_id)
+
+    def index_unstructured_data(self, parsed_data):
+        self.documents.extend(parsed_data)
+        return {"indexed": len(parsed_data), "failed": 0}
+
+    def describe_collections(self):
+        return {}
+
+    def search(self, request):
+        self.searches.append(request)
+        return SearchResponse(hits=[])
+
+
+def test_hot_tenant_is_served_locally_only_from_a_full_fresh_snapshot(tmp_path):
+    remote = FakeRemote([{"text_hash": f"d{n}", "business_id": "hot", "embedding": [1.0, n / 10, 0]} for n in range(5)])
+    cache = HotTenantVectorCache(remote, str(tmp_path), ["hot"], max_snapshot_age_seconds=600)
+    request = SearchRequest(query_vector=[1.0, 0, 0], business_id="hot", k=10)
+
+    # A write before any snapshot exists must not make the local tier look authoritative
+    cache.index_unstructured_data([{"text_hash": "early", "business_id": "hot", "embedding": [0, 1.0, 0]}])
+    assert cache.search(request).hits == [] and len(remote.searches) == 1
+
+    assert cache.export_snapshots() == {"hot": 6}
+    assert {hit.id for hit in cache.search(request).hits} == {f"d{n}" for n in range(5)} | {"early"}
+    assert len(remote.searches) == 1
+
+    cache.index_unstructured_data([{"text_hash": "late", "business_id": "hot", "embedding": [0, 0, 1.0]}])
+    assert "late" in {hit.id for hit in cache.search(request).hits}
+
+    cache.tenants["hot"]["manifest"]["exported_at"] -= 601
+    cache.search(request)
+    assert len(remote.searches) == 2
+
+
+def test_snapshot_export_keeps_two_versions_and_serves_the_current_one(tmp_path, monkeypatch):
+    remote = FakeRemote([{"text_hash": "a", "business_id": "hot", "embedding": [1.0, 0, 0]}])
+    cache = HotTenantVectorCache(remote, str(tmp_path), ["hot"], reload_check_seconds=0)
+    clock = [1_000.0]
+    monkeypatch.setattr(local_vector_adapter.time, "time", lambda: clock[0])
+    for _ in range(3):
+        cache.export_snapshots()
+        clock[0] += 1
+
+    versions = sorted(path.name for path in (tmp_path / "hot").iterdir() if path.name.isdigit())
+    assert versions == ["1001000", "1002000"]
+    assert (tmp_path / "hot" / "CURRENT").read_text() == "1002000"
+
+    request = SearchRequest(query_vector=[1.0, 0, 0], business_id="hot", k=1)
+    assert cache.search(request).hits[0].id == "a"
+    assert cache.tenants["hot"]["version"] == "1002000"
@@ -0,0 +1,29 @@
+import pytest
+
+from shared_layer.lifecycle.warm_start import WarmStartInitializer
+
+
+def test_runs_loaders_once_and_reports_timings():
+    calls = []
+    warm_start = WarmStartInitializer("test_lambda")
+    warm_start.register("model", lambda: calls.append("model"))
+    warm_start.register("optional", lambda: 1 / 0, required=False)
+    with warm_start.timed("container"):
+        pass
+
+    timings = warm_start.run()
+    warm_start.run()
+
+    assert calls == ["model"]
+    assert set(timings) == {"container", "model", "optional"}
+    assert timings["optional"]["status"] == "failed"
+    assert timings["model"]["status"] == "ok"
+
+
+def test_required_failure_is_raised():
+    warm_start = WarmStartInitializer("test_lambda")
+    warm_start.register("model", lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        warm_start.run()
+    assert warm_start.completed
@@ -2,12 +2,27 @@ import json
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 import os
-import boto3
+import time
 import requests
 from datetime import datetime
+from hashlib import sha1
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Iterator, List, Optional, Tuple
 from shared_layer.repository.aoss_repository import AOSSRepository
 from shared_layer.logging.logger import Logger
-from requests_aws4auth import AWS4Auth
+from shared_layer.logging.metrics import count, span
+from shared_layer.cache.tenant_placement_store import TenantPlacementStore
+from shared_layer.cache.ttl_cache import TTLCache
+from shared_layer.model.embedding import Embedding, EmbeddingPrecision, dumps_document
+from shared_layer.model.search_model import SearchHit, SearchMode, SearchRequest, SearchResponse
+from shared_layer.search.rank_fusion import DEFAULT_RRF_K, reciprocal_rank_fusion
+from shared_layer.repository.bedrock_repository import BedRockRepository
+from shared_layer.aws.utils.auth_util import get_sigv4_auth
+from shared_layer.aws.adapters.aoss_partition_manager import MONTH, TimePartitionManager, current_partitions
+from shared_layer.aws.adapters.aoss_tenant_router import (DEFAULT_PROMOTE_DOC_COUNT, DEFAULT_WRITER_GRACE_SECONDS,
+                                                          TenantIndexRouter)
+from shared_layer.aws.adapters.aoss_bulk_indexer import AOSSBulkIndexer, DEFAULT_MAX_RETRIES, DEFAULT_MAX_WORKERS
+from shared_layer.exceptions.error_handler import OmInsightsPartialSuccessError
 from file_processor.search.index_manager import IndexTemplateManager
 
 logger = Logger()
@@ -15,77 +30,147 @@ logger = Logger()
 REGION = os.environ.get("AWS_REGION", "us-east-1")
 SERVICE = "es" # For Amazon OpenSearch-managed domains, keep this as "es".
 
-# AWS SigV4 Auth setup
-credentials = boto3.Session().get_credentials().get_frozen_credentials()
-awsauth = AWS4Auth(
-    credentials.access_key,
-    credentials.secret_key,
-    REGION,
-    SERVICE,
-    session_token=credentials.token
-)
-
 HEADERS = {"Content-Type": "application/json"}
+KNOWN_INDEX_TTL_SECONDS = 3600
+DEFAULT_SEARCH_CACHE_TTL_SECONDS = 60
+DEFAULT_SEARCH_TIMEOUT_SECONDS = 10
+DEFAULT_LEG_TIMEOUT_SECONDS = 2
+DEFAULT_HYBRID_CANDIDATE_FACTOR = 3   # each hybrid leg fetches k * factor candidates for fusion
+DEFAULT_SCAN_PAGE_SIZE = 500
+SCROLL_KEEP_ALIVE = "2m"
+LEXICAL_FIELDS = [
+    "sentences",
+    "indexed_metadata.keywords^3",
+    "indexed_metadata.entities^3",
+    "indexed_metadata.all^2",
+    "indexed_metadata.locations"
+]
+
+# ✅ Process-wide record of indices known to exist (skips the create round trip on warm invocations)
+known_indices = TTLCache(ttl_seconds=KNOWN_INDEX_TTL_SECONDS, max_size=256)
+# ✅ Process-wide search result cache (repeated dashboard queries skip the cluster)
+search_cache = TTLCache(ttl_seconds=DEFAULT_SEARCH_CACHE_TTL_SECONDS, max_size=512)
+# ✅ Shared pool for concurrent search legs (timed-out legs don't block the caller)
+search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
 
 
 class AOSSAdapter(AOSSRepository):
-    def __init__(self, aoss_client, config: dict):
+    def __init__(self, aoss_client, config: dict, embedder: Optional[BedRockRepository] = None,
+                 placement_store: Optional[TenantPlacementStore] = None):
         super().__init__(aoss_client, config)
+        self.embedder = embedder  # Embeds query_text for search()
         self.endpoint = config.get("aoss", {}).get("endpoint")
         self.index_name = config.get("aoss", {}).get("index_name")
 
         if not self.endpoint or not self.index_name:
             raise ValueError("AOSSAdapter config must include 'endpoint' and 'index_name'.")
 
+        bulk_config = config.get("aoss", {}).get("bulk", {})
+        self.bulk_indexer = AOSSBulkIndexer(
+            self.endpoint,
+            auth_provider=lambda: get_sigv4_auth(REGION, SERVICE),
+            max_request_bytes=bulk_config.get("max_request_mb", 8) * 1024 * 1024,
+            max_workers=bulk_config.get("max_workers", DEFAULT_MAX_WORKERS),
+            max_retries=bulk_config.get("max_retries", DEFAULT_MAX_RETRIES)
+        )
+        self.session = self.bulk_indexer.session  # ✅ Pooled keep-alive connections, shared with bulk indexing
+
+        # ✅ Time partitions: one small HNSW graph per month/quarter behind write/read aliases
+        partition_config = config.get("aoss", {}).get("partitions", {})
+        self.partition_manager = TimePartitionManager(
+            self.endpoint, self.index_name, self.session,
+            auth_provider=lambda: get_sigv4_auth(REGION, SERVICE),
+            template_loader=self._load_index_template,
+            granularity=partition_config.get("granularity", MONTH),
+            compact_on_rollover=partition_config.get("compact_on_rollover", True),
+            include_legacy_index=partition_config.get("include_legacy_index", True)
+        ) if partition_config.get("enabled", False) else None
+
+        # ✅ Tenant locality: route by business_id, optional per-tenant aliases and dedicated indices
+        tenancy_config = dict(config.get("aoss", {}).get("tenancy", {}))
+        if self.partition_manager and tenancy_config.get("create_aliases", True):
+            # Tenant aliases and promotion are bound to one concrete index; partitions keep routing only
+            logger.warning("⚠️ Time partitions enabled: tenant aliases and promotion are disabled, routing is kept.")
+            tenancy_config.update(create_aliases=False, auto_promote=False)
+        self.tenant_router = TenantIndexRouter(
+            self.endpoint, self.index_name, self.session,
+            auth_provider=lambda: get_sigv4_auth(REGION, SERVICE),
+            create_aliases=tenancy_config.get("create_aliases", True),
+            auto_promote=tenancy_config.get("auto_promote", False),
+            promote_doc_count=tenancy_config.get("promote_doc_count", DEFAULT_PROMOTE_DOC_COUNT),
+            template_loader=self._load_index_template,
+            placement_store=placement_store,
+            writer_grace_seconds=tenancy_config.get("writer_grace_seconds", DEFAULT_WRITER_GRACE_SECONDS)
+        ) if tenancy_config.get("enabled", False) else None
+
+        search_config = config.get("aoss", {}).get("search", {})
+        self.search_cache_ttl_seconds = search_config.get("cache_ttl_seconds", DEFAULT_SEARCH_CACHE_TTL_SECONDS)
+        self.search_timeout_seconds = search_config.get("timeout_seconds", DEFAULT_SEARCH_TIMEOUT_SECONDS)
+        hybrid_config = search_config.get("hybrid", {})
+        self.knn_timeout_seconds = hybrid_config.get("knn_timeout_seconds", DEFAULT_LEG_TIMEOUT_SECONDS)
+        self.lexical_timeout_seconds = hybrid_config.get("lexical_timeout_seconds", DEFAULT_LEG_TIMEOUT_SECONDS)
+        self.hybrid_candidate_factor = hybrid_config.get("candidate_factor", DEFAULT_HYBRID_CANDIDATE_FACTOR)
+        self.rrf_k = hybrid_config.get("rrf_k", DEFAULT_RRF_K)
+
     def index_unstructured_data(self, parsed_data: dict):
         logger.info("🚀 Starting to index unstructured data")
 
-        index_template = self._load_index_template()
-        self._create_index_if_not_exists(index_template)
+        self._ensure_index()
 
-        # 2. Prepare bulk request payload
-        bulk_payload = ""
         timestamp = datetime.now().isoformat() + "Z"
-
         for batch in parsed_data:
             batch["timestamp"] = timestamp
-            # Bulk format: action metadata + document
-            action = {"index": {"_index": self.index_name}}
-            bulk_payload += f"{json.dumps(action)}\n{json.dumps(batch)}\n"
 
-        # 3. Send bulk request
-        url = f"{self.endpoint}/_bulk"
-        logger.info(f"📤 Sending bulk request to OpenSearch index: {self.index_name}")
+        write_target = self.partition_manager.write_alias if self.partition_manager else self.index_name
+        route = self._tenant_route(parsed_data, write_target) if self.tenant_router else None
 
-        try:
-            response = requests.post(
-                url,
-                headers={"Content-Type": "application/json"},
-                auth=awsauth,
-                data=bulk_payload,
-                verify=False  # ⚠️ Disable only in dev
+        # ✅ Stream size-bounded bulk requests; only failed items are retried
+        logger.info(f"📤 Sending bulk requests to OpenSearch index: {write_target}")
+        with span("aoss_index", rows=len(parsed_data)):
+            # ✅ Documents are keyed by chunk hash, so a retried or redelivered batch overwrites instead of duplicating
+            result = self.bulk_indexer.index(write_target, parsed_data, id_field="text_hash", route=route)
+
+        if result["failed"]:
+            count("aoss_index", "FailedItems", result["failed"])
+            failed_items = [item for item in result["items"] if item["error"]]
+            if any("index_not_found" in item["error"] for item in failed_items):
+                known_indices.pop((self.endpoint, self.index_name))  # Deleted behind our back: re-create next time
+                current_partitions.pop(self.index_name)
+            logger.warning(f"❌ {len(failed_items)} batch(es) failed during indexing.")
+            for item in failed_items:
+                logger.error(f"🔴 Failed batch #{item['position']} ({item['status']}): {item['error']}")
+            raise OmInsightsPartialSuccessError(
+                data=result,
+                source_exception=Exception("One or more batches failed during bulk indexing."),
+                message=f"{result['failed']} of {len(result['items'])} batches failed during bulk indexing."
             )
-            result = response.json()
 
-            if response.status_code != 200 or result.get("errors"):
-                failed_items = [
-                    item for item in result.get("items", [])
-                    if "error" in item.get("index", {})
-                ]
-                logger.warning(f"❌ {len(failed_items)} batch(es) failed during indexing.")
+        logger.info("✅ All batches indexed successfully.")
+        return result  # Tenant promotion runs from a scheduled job (TenantIndexRouter.run_promotions)
 
-                for item in failed_items:
-                    err = item["index"]["error"]
-                    logger.error(f"🔴 Failed batch: {err.get('reason', 'Unknown error')}")
+    def _tenant_route(self, parsed_data: list, write_target: str):
+        """Return the bulk route callback mapping each document to its tenant's (index, routing)."""
+        business_ids = {batch.get("business_id") for batch in parsed_data} - {None}
+        for business_id in business_ids:
+            self.tenant_router.ensure_alias(business_id)
+        # ✅ Write placement is read fresh once per business per batch (promotion fences on it)
+        write_targets = {business_id: self.tenant_router.resolve_write(business_id) for business_id in business_ids}
 
-                raise Exception("One or more batches failed during bulk indexing.")
+        def route(document: dict):
+            business_id = document.get("business_id")
+            target = write_targets.get(business_id) or self.tenant_router.resolve_write(business_id)
+            return (target.index if target.dedicated else write_target), target.routing
 
-            logger.info("✅ All batches indexed successfully.")
+        return route
+
+    def _ensure_index(self):
+        if self.partition_manager:
+            self.partition_manager.ensure_current()  # Rolls the write alias over at period boundaries
+            return
+        if known_indices.get((self.endpoint, self.index_name)):
+            return  # ✅ Created or seen by this execution environment recently
+        self._create_index_if_not_exists(self._load_index_template())
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Bulk request failed: {e}")
-            raise
-    @staticmethod
     def _load_index_template(self) -> dict:
         try:
             template = IndexTemplateManager.get_template(self.index_name)
@@ -95,14 +180,14 @@ class AOSSAdapter(AOSSRepository):
             logger.error(f"❌ Failed to load index template: {e}")
             raise
 
-    @staticmethod
     def _create_index_if_not_exists(self, template: dict):
+        cache_key = (self.endpoint, self.index_name)
         url = f"{self.endpoint}/{self.index_name}"
         logger.info(f"🔍 Checking if index '{self.index_name}' exists or needs creation")
 
         try:
             response = requests.put(
-                url, headers=HEADERS, auth=awsauth, data=json.dumps(template),verify=False
+                url, headers=HEADERS, auth=get_sigv4_auth(REGION, SERVICE), data=json.dumps(template),verify=False
             )
 
             if response.ok:
@@ -112,23 +197,22 @@ class AOSSAdapter(AOSSRepository):
             else:
                 logger.error(f"❌ Index creation failed ({response.status_code}): {response.text}")
                 raise Exception("Index creation failed.")
+            known_indices.set(cache_key, True)
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Index creation error: {e}")
             raise
-    @staticmethod
     def _validate_document(self, document: dict) -> dict:
         # Optional future: Add schema validation (e.g., Pydantic or JSON schema)
         if "embedding" in document and len(document["embedding"]) != 1536:
             raise ValueError("Invalid embedding dimension. Expected 1536.")
         return document
-    @staticmethod
     def _index_document(self, document: dict):
         url = f"{self.endpoint}/{self.index_name}/_doc"
         logger.info(f"📥 Indexing document to '{self.index_name}'")
 
         try:
             response = requests.post(
-                url, headers=HEADERS, auth=awsauth, data=json.dumps(document),verify=False
+                url, headers=HEADERS, auth=get_sigv4_auth(REGION, SERVICE), data=dumps_document(document),verify=False
             )
             if response.ok:
                 logger.info("✅ Document indexed successfully.")
@@ -143,8 +227,198 @@ class AOSSAdapter(AOSSRepository):
         logger.info("📚 Describing AOSS collections")
         return self.aoss_client.list_collections()
 
-    def search(self, collection_id: str, query: dict):
-        logger.info(f"🔍 Searching collection '{collection_id}' with query: {query}")
-        # Future implementation placeholder
-        pass
+    def search(self, request: SearchRequest) -> SearchResponse:
+        """
+        Filtered k-NN search over the HNSW `embedding` field, or hybrid BM25 + k-NN.
+
+        Filters run inside the k-NN query (efficient filtering), so `k` hits are
+        returned from the matching documents only. In hybrid mode both legs
+        run concurrently, each with its own timeout, and are fused with
+        reciprocal rank fusion; a leg that fails or times out is dropped.
+        Responses are cached for `aoss.search.cache_ttl_seconds`, keyed on the
+        int8-quantized query vector (k-NN) or the query text (hybrid) plus filters.
+        """
+        start = time.perf_counter()
+        vector = None
+        if request.mode == SearchMode.HYBRID:
+            cache_key = self._hybrid_cache_key(request)
+        else:
+            vector = self._query_vector(request)
+            cache_key = self._search_cache_key(vector, request)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Search served from cache ({len(cached.hits)} hits)")
+            return cached.copy(update={"cached": True, "took_ms": round((time.perf_counter() - start) * 1000, 1)})
+
+        if request.mode == SearchMode.HYBRID:
+            hits = self._hybrid_search(request)
+        else:
+            hits = self._knn_search(vector, request, request.k)
+        result = SearchResponse(hits=hits, took_ms=round((time.perf_counter() - start) * 1000, 1))
+        search_cache.set(cache_key, result, self.search_cache_ttl_seconds)
+        logger.info(f"✅ {request.mode.value} search returned {len(hits)} hits in {result.took_ms} ms")
+        return result
 
+    def _knn_search(self, vector: Embedding, request: SearchRequest, size: int) -> List[SearchHit]:
+        body = {
+            "size": size,
+            "_source": {"excludes": ["embedding"]},
+            "query": {"knn": {"embedding": {"vector": vector.to_list(), "k": size}}}
+        }
+        filters = self._search_filters(request)
+        if filters:
+            body["query"]["knn"]["embedding"]["filter"] = {"bool": {"filter": filters}}
+
+        logger.info(f"🔍 k-NN search on '{self.index_name}' (k={size}, filters={len(filters)})")
+        return self._post_search(body, request)
+
+    def _lexical_search(self, request: SearchRequest, size: int) -> List[SearchHit]:
+        """BM25 over the chunk text and the spaCy-extracted metadata; exact keyword fields are boosted."""
+        body = {
+            "size": size,
+            "_source": {"excludes": ["embedding"]},
+            "query": {"bool": {
+                "filter": self._search_filters(request),
+                "should": [
+                    {"multi_match": {"query": request.query_text, "fields": LEXICAL_FIELDS}},
+                    {"nested": {
+                        "path": "indexed_metadata.ranked_keywords",
+                        "query": {"match": {"indexed_metadata.ranked_keywords.keyword": request.query_text}},
+                        "score_mode": "max"
+                    }}
+                ],
+                "minimum_should_match": 1
+            }}
+        }
+        logger.info(f"🔍 BM25 search on '{self.index_name}' (size={size})")
+        return self._post_search(body, request)
+
+    def _hybrid_search(self, request: SearchRequest) -> List[SearchHit]:
+        size = request.k * self.hybrid_candidate_factor
+        legs = {
+            "knn": (search_executor.submit(lambda: self._knn_search(self._query_vector(request), request, size)),
+                    self.knn_timeout_seconds),
+            "bm25": (search_executor.submit(self._lexical_search, request, size), self.lexical_timeout_seconds)
+        }
+        rankings, errors = [], {}
+        started = time.monotonic()
+        for name, (future, timeout) in legs.items():
+            try:
+                # Legs run in parallel, so each timeout counts from the shared start
+                rankings.append(future.result(timeout=max(0.0, started + timeout - time.monotonic())))
+            except Exception as e:
+                future.cancel()
+                errors[name] = f"timed out after {timeout}s" if isinstance(e, FutureTimeoutError) else str(e)
+                logger.warning(f"⚠️ Hybrid search dropped the {name} leg: {errors[name]}")
+        if not rankings:
+            raise Exception(f"Hybrid search failed on every leg: {errors}")
+        return reciprocal_rank_fusion(rankings, limit=request.k, rrf_k=self.rrf_k)
+
+    def scan_documents(self, business_id: str, page_size: int = DEFAULT_SCAN_PAGE_SIZE) -> Iterator[dict]:
+        """
+        Yields every document of one business, embedding included, page by page
+        (scroll API). Used to export hot-tenant snapshots; the scroll context
+        is cleared once the caller stops iterating.
+        """
+        index, params = self._search_target(business_id)
+        body = {"size": page_size, "sort": ["_doc"],
+                "query": {"bool": {"filter": [{"term": {"business_id": business_id}}]}}}
+        response = self._post_json(f"{index}/_search", body, {**params, "scroll": SCROLL_KEEP_ALIVE})
+        scroll_id = response.get("_scroll_id")
+        try:
+            while True:
+                hits = response.get("hits", {}).get("hits", [])
+                if not hits:
+                    return
+                for hit in hits:
+                    document = hit.get("_source", {})
+                    document.setdefault("text_hash", hit.get("_id"))
+                    yield document
+                response = self._post_json("_search/scroll", {"scroll": SCROLL_KEEP_ALIVE, "scroll_id": scroll_id})
+                scroll_id = response.get("_scroll_id", scroll_id)
+        finally:
+            if scroll_id:
+                try:
+                    self.session.delete(f"{self.endpoint}/_search/scroll", headers=HEADERS,
+                                        auth=get_sigv4_auth(REGION, SERVICE), data=json.dumps({"scroll_id": [scroll_id]}),
+                                        timeout=self.search_timeout_seconds, verify=False)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"⚠️ Could not clear scroll context (expires on its own): {e}")
+
+    def _search_target(self, business_id: Optional[str], date_from=None, date_to=None) -> Tuple[str, dict]:
+        """The index (or alias list) and query params a search for this business and date range goes to."""
+        index, params = self.index_name, {}
+        if self.partition_manager:
+            # ✅ Only partitions overlapping the date filter are searched (some may not exist yet)
+            index = self.partition_manager.search_target(date_from, date_to)
+            params["ignore_unavailable"] = "true"
+        if self.tenant_router and business_id:
+            # ✅ Only the tenant's shard (or dedicated index; both while it migrates) is searched
+            target = self.tenant_router.resolve(business_id)
+            if target.dedicated or target.migrating:
+                index = target.index
+            if target.routing:
+                params["routing"] = target.routing
+        return index, params
+
+    def _post_json(self, path: str, body: dict, params: Optional[dict] = None) -> dict:
+        response = self.session.post(
+            f"{self.endpoint}/{path}", headers=HEADERS, auth=get_sigv4_auth(REGION, SERVICE),
+            params=params or {}, data=json.dumps(body), timeout=self.search_timeout_seconds, verify=False
+        )
+        if not response.ok:
+            logger.error(f"❌ Request to {path} failed ({response.status_code}): {response.text}")
+            raise Exception(f"Request to {path} failed.")
+        return response.json()
+
+    def _post_search(self, body: dict, request: SearchRequest) -> List[SearchHit]:
+        index, params = self._search_target(request.business_id, request.date_from, request.date_to)
+        try:
+            response = self.session.post(
+                f"{self.endpoint}/{index}/_search", headers=HEADERS, auth=get_sigv4_auth(REGION, SERVICE),
+                params=params, data=json.dumps(body), timeout=self.search_timeout_seconds, verify=False
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Search request failed: {e}")
+            raise
+        if not response.ok:
+            logger.error(f"❌ Search failed ({response.status_code}): {response.text}")
+            raise Exception("Search failed.")
+
+        return [
+            SearchHit.from_source(hit.get("_id"), hit.get("_score"), hit.get("_source", {}))
+            for hit in response.json().get("hits", {}).get("hits", [])
+        ]
+
+    def _query_vector(self, request: SearchRequest) -> Embedding:
+        if request.query_vector:
+            return Embedding.from_floats(request.query_vector)
+        if not self.embedder:
+            raise ValueError("AOSSAdapter needs an embedder to search by query_text.")
+        return self.embedder.embed_query(request.query_text)
+
+    def _search_cache_key(self, vector: Embedding, request: SearchRequest) -> tuple:
+        quantized = vector.with_precision(EmbeddingPrecision.INT8).data.tobytes()
+        return (self.index_name, sha1(quantized).hexdigest(), request.business_id, request.data_type,
+                request.date_from, request.date_to, request.k)
+
+    def _hybrid_cache_key(self, request: SearchRequest) -> tuple:
+        text_hash = sha1(" ".join(request.query_text.lower().split()).encode("utf-8")).hexdigest()
+        return (self.index_name, SearchMode.HYBRID.value, text_hash, request.business_id, request.data_type,
+                request.date_from, request.date_to, request.k)
+
+    @staticmethod
+    def _search_filters(request: SearchRequest) -> list:
+        filters = []
+        if request.business_id:
+            filters.append({"term": {"business_id": request.business_id}})
+        if request.data_type:
+            filters.append({"term": {"data_type": request.data_type}})
+        if request.date_from or request.date_to:
+            date_range = {}
+            if request.date_from:
+                date_range["gte"] = request.date_from.isoformat()
+            if request.date_to:
+                date_range["lte"] = request.date_to.isoformat()
+            filters.append({"range": {"timestamp": date_range}})
+        return filters
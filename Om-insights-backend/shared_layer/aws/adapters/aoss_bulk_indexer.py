@@ -0,0 +1,193 @@
+import json
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from shared_layer.logging.logger import Logger
+from shared_layer.model.embedding import dumps_document
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_MAX_REQUEST_BYTES = 8 * 1024 * 1024   # well under the 10 MB OpenSearch / AOSS bulk limit
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_BACKOFF_SECONDS = 0.5
+DEFAULT_TIMEOUT_SECONDS = 60
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+HEADERS = {"Content-Type": "application/x-ndjson"}
+
+# (position, encoded action + source lines)
+BulkItem = Tuple[int, bytes]
+
+
+class AOSSBulkIndexer:
+    """
+    Streams documents to the `_bulk` API in byte-bounded NDJSON requests.
+
+    Each document is encoded once (action line + source line) and packed into
+    requests of at most `max_request_bytes`; up to `max_workers` requests are
+    in flight at a time over one pooled, SigV4-signed session. After each
+    round, only the items rejected with a retryable status (429/5xx), or
+    whose request failed outright, are re-packed into new size-bounded
+    requests and sent again with jittered exponential backoff; items that
+    succeeded are never re-sent. `index()` returns one result per input
+    document, in input order.
+    """
+
+    def __init__(self, endpoint: str, auth_provider: Callable[[], object],
+                 max_request_bytes: int = DEFAULT_MAX_REQUEST_BYTES, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_retries: int = DEFAULT_MAX_RETRIES, base_backoff_seconds: float = DEFAULT_BASE_BACKOFF_SECONDS,
+                 timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS, verify_ssl: bool = False,
+                 session: Optional[requests.Session] = None):
+        self.url = f"{endpoint.rstrip('/')}/_bulk"
+        self.auth_provider = auth_provider
+        self.max_request_bytes = max_request_bytes or DEFAULT_MAX_REQUEST_BYTES
+        self.max_workers = max(1, max_workers or DEFAULT_MAX_WORKERS)
+        self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.verify_ssl = verify_ssl
+        self.session = session or self._build_session(self.max_workers)
+
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def index(self, index_name: str, documents: Iterable[dict], id_field: Optional[str] = None,
+              route: Optional[Callable[[dict], Tuple[str, Optional[str]]]] = None) -> Dict:
+        """
+        Indexes `documents` into `index_name`.
+
+        `route(document)` may return a per-document (index, routing) instead,
+        e.g. to keep each tenant's documents on one shard.
+
+        Returns:
+            {"indexed", "failed", "requests", "bytes_sent", "items"}, where
+            `items` holds one {"position", "id", "status", "error", "attempts"}
+            dict per document.
+        """
+        results: Dict[int, dict] = {}
+        stats = {"requests": 0, "bytes_sent": 0}
+
+        retry = self._send_all(self._encode(index_name, documents, id_field, route), results, stats, attempt=1)
+        for attempt in range(2, self.max_retries + 2):
+            if not retry:
+                break
+            self._backoff(attempt - 1)
+            logger.info(f"🔁 Retrying {len(retry)} bulk item(s) (attempt {attempt})")
+            retry = self._send_all(iter(retry), results, stats, attempt=attempt)
+
+        items = [results[position] for position in sorted(results)]
+        failed = sum(1 for item in items if item["error"])
+        summary = {
+            "indexed": len(items) - failed,
+            "failed": failed,
+            "requests": stats["requests"],
+            "bytes_sent": stats["bytes_sent"],
+            "items": items
+        }
+        logger.info({
+            "message": "📤 Bulk indexing complete",
+            "index": index_name,
+            **{key: value for key, value in summary.items() if key != "items"}
+        })
+        return summary
+
+    @staticmethod
+    def _encode(index_name: str, documents: Iterable[dict], id_field: Optional[str],
+                route: Optional[Callable[[dict], Tuple[str, Optional[str]]]]) -> Iterator[BulkItem]:
+        for position, document in enumerate(documents):
+            action = {"_index": index_name}
+            if route:
+                action["_index"], routing = route(document)
+                if routing is not None:
+                    action["routing"] = routing
+            if id_field and document.get(id_field) is not None:
+                action["_id"] = str(document[id_field])
+            lines = f"{json.dumps({'index': action})}\n{dumps_document(document)}\n"
+            yield position, lines.encode("utf-8")
+
+    def _batches(self, items: Iterator[BulkItem]) -> Iterator[List[BulkItem]]:
+        """Groups encoded items into requests of at most `max_request_bytes` (an oversized item goes alone)."""
+        batch, size = [], 0
+        for item in items:
+            item_size = len(item[1])
+            if batch and size + item_size > self.max_request_bytes:
+                yield batch
+                batch, size = [], 0
+            batch.append(item)
+            size += item_size
+        if batch:
+            yield batch
+
+    def _send_all(self, items: Iterator[BulkItem], results: Dict[int, dict], stats: Dict,
+                  attempt: int) -> List[BulkItem]:
+        """Sends all batches with bounded concurrency; returns the items to retry."""
+        retry: List[BulkItem] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = set()
+            # Encoding stays at most 2 requests ahead of the senders, so memory is bounded by request size
+            for batch in self._batches(items):
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        retry.extend(self._record(future.result(), results, attempt))
+                in_flight.add(executor.submit(self._send, batch))
+                stats["requests"] += 1
+                stats["bytes_sent"] += sum(len(lines) for _, lines in batch)
+            for future in wait(in_flight).done:
+                retry.extend(self._record(future.result(), results, attempt))
+        return retry
+
+    def _send(self, batch: List[BulkItem]) -> List[Tuple[BulkItem, int, Optional[str], Optional[str]]]:
+        """Posts one bulk request. Returns (item, status, doc_id, error) per item."""
+        body = b"".join(lines for _, lines in batch)
+        try:
+            response = self.session.post(
+                self.url, data=body, headers=HEADERS, auth=self.auth_provider(),
+                timeout=self.timeout_seconds, verify=self.verify_ssl  # ⚠️ verify disabled only in dev
+            )
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"⚠️ Bulk request failed, will retry its items: {e}")
+            return [(item, 503, None, str(e)) for item in batch]
+
+        if response.status_code != 200:
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+            logger.warning(f"⚠️ Bulk request rejected: {error}")
+            return [(item, response.status_code, None, error) for item in batch]
+
+        response_items = response.json().get("items", [])
+        outcomes = []
+        for item, response_item in zip(batch, response_items):
+            outcome = next(iter(response_item.values()), {})
+            error = outcome.get("error")
+            if isinstance(error, dict):
+                error = f"{error.get('type', 'error')}: {error.get('reason', 'Unknown error')}"
+            outcomes.append((item, outcome.get("status", 500), outcome.get("_id"), error))
+        for item in batch[len(response_items):]:
+            outcomes.append((item, 500, None, "No result returned for item."))
+        return outcomes
+
+    def _record(self, outcomes, results: Dict[int, dict], attempt: int) -> List[BulkItem]:
+        retry = []
+        for item, status, doc_id, error in outcomes:
+            position = item[0]
+            results[position] = {"position": position, "id": doc_id, "status": status,
+                                 "error": error, "attempts": attempt}
+            if error and status in RETRYABLE_STATUSES and attempt <= self.max_retries:
+                retry.append(item)
+        return retry
+
+    def _backoff(self, retry_number: int) -> None:
+        delay = self.base_backoff_seconds * (2 ** (retry_number - 1))
+        time.sleep(delay / 2 + random.uniform(0, delay / 2))
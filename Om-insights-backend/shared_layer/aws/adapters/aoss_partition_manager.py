@@ -0,0 +1,194 @@
+import json
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import requests
+
+from shared_layer.cache.ttl_cache import TTLCache
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+MONTH = "month"
+QUARTER = "quarter"
+MAX_PRUNED_PARTITIONS = 24   # wider date ranges just search the read alias
+ROLLOVER_CHECK_TTL_SECONDS = 3600
+FORCE_MERGE_TIMEOUT_SECONDS = 5
+
+HEADERS = {"Content-Type": "application/json"}
+
+# ✅ Process-wide record of the current write partition (kept across warm invocations)
+current_partitions = TTLCache(ttl_seconds=ROLLOVER_CHECK_TTL_SECONDS, max_size=64)
+
+
+def _as_naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+class TimePartitionManager:
+    """
+    Monthly or quarterly partitions of one logical index, behind aliases.
+
+    Partitions are named `<index>-p-YYYY-MM` (or `-YYYY-qN`) and pick up the
+    mappings, k-NN settings and the read alias from an index template, so
+    each HNSW graph only covers one period. Writes go to `<index>-write`,
+    which is moved to the new partition at the first write of a period.
+    Searches name just the partitions overlapping the query's date range
+    and fall back to `<index>-read` when no range is given. The partition
+    that just stopped taking writes can be force-merged to one segment.
+
+    Documents written before partitioning live in the unpartitioned
+    `<index>` itself. With `include_legacy_index` it is added to the read
+    alias when the template is registered and named in every pruned search,
+    so those documents stay searchable without a reindex.
+    """
+
+    def __init__(self, endpoint: str, base_index: str, session: requests.Session, auth_provider: Callable[[], object],
+                 template_loader: Callable[[], dict], granularity: str = MONTH, compact_on_rollover: bool = True,
+                 include_legacy_index: bool = True, timeout_seconds: float = 10):
+        if granularity not in (MONTH, QUARTER):
+            raise ValueError(f"Unsupported partition granularity '{granularity}'.")
+        self.endpoint = endpoint.rstrip("/")
+        self.base_index = base_index
+        self.session = session
+        self.auth_provider = auth_provider
+        self.template_loader = template_loader
+        self.granularity = granularity
+        self.compact_on_rollover = compact_on_rollover
+        self.include_legacy_index = include_legacy_index
+        self.timeout_seconds = timeout_seconds
+
+    @property
+    def write_alias(self) -> str:
+        return f"{self.base_index}-write"
+
+    @property
+    def read_alias(self) -> str:
+        return f"{self.base_index}-read"
+
+    @property
+    def legacy_index(self) -> Optional[str]:
+        """The pre-partitioning index (the base name itself), if it is still searched."""
+        return self.base_index if self.include_legacy_index else None
+
+    @property
+    def pattern(self) -> str:
+        return f"{self.base_index}-p-*"
+
+    def _period(self, moment: datetime) -> tuple:
+        return (moment.year, moment.month) if self.granularity == MONTH else (moment.year, (moment.month - 1) // 3 + 1)
+
+    def _next_period(self, period: tuple) -> tuple:
+        year, part = period
+        last = 12 if self.granularity == MONTH else 4
+        return (year + 1, 1) if part == last else (year, part + 1)
+
+    def _name(self, period: tuple) -> str:
+        year, part = period
+        suffix = f"{year}-{part:02d}" if self.granularity == MONTH else f"{year}-q{part}"
+        return f"{self.base_index}-p-{suffix}"
+
+    def partition_name(self, moment: datetime) -> str:
+        return self._name(self._period(moment))
+
+    def partitions_between(self, start: datetime, end: datetime) -> List[str]:
+        names, period, last = [], self._period(start), self._period(end)
+        while period <= last:
+            names.append(self._name(period))
+            period = self._next_period(period)
+        return names
+
+    def search_target(self, date_from: Optional[datetime], date_to: Optional[datetime]) -> str:
+        """Comma-separated partitions overlapping the range (pruned, plus the legacy index), or the read alias."""
+        if not date_from and not date_to:
+            return self.read_alias
+        start = _as_naive_utc(date_from) if date_from else datetime(2000, 1, 1)
+        end = _as_naive_utc(date_to) if date_to else datetime.utcnow()
+        if start > end:
+            return self.read_alias
+        names = self.partitions_between(start, end)
+        if len(names) > MAX_PRUNED_PARTITIONS:
+            return self.read_alias
+        if self.legacy_index:
+            names.append(self.legacy_index)  # ✅ Its documents are not split by period
+        return ",".join(names)
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None, timeout: Optional[float] = None,
+                 **params) -> requests.Response:
+        return self.session.request(
+            method, f"{self.endpoint}/{path}", headers=HEADERS, auth=self.auth_provider(), params=params or None,
+            data=json.dumps(body) if body is not None else None, timeout=timeout or self.timeout_seconds,
+            verify=False  # ⚠️ Disable only in dev
+        )
+
+    def ensure_template(self) -> None:
+        template = self.template_loader()
+        response = self._request("PUT", f"_index_template/{self.base_index}-partitions", {
+            "index_patterns": [self.pattern],
+            "priority": 100,
+            "template": {**template, "aliases": {self.read_alias: {}}}
+        })
+        if not response.ok:
+            raise Exception(f"Partition template registration failed: {response.text}")
+        if self.legacy_index:
+            self._alias_legacy_index()
+
+    def _alias_legacy_index(self) -> None:
+        """Adds the unpartitioned index to the read alias (idempotent; skipped when it doesn't exist)."""
+        response = self._request("POST", "_aliases", {
+            "actions": [{"add": {"index": self.legacy_index, "alias": self.read_alias}}]
+        })
+        if response.ok:
+            logger.info(f"🔗 Legacy index '{self.legacy_index}' is searchable through '{self.read_alias}'")
+        elif response.status_code == 404:
+            logger.info(f"ℹ️ No legacy index '{self.legacy_index}' to add to '{self.read_alias}'")
+        else:
+            raise Exception(f"Adding '{self.legacy_index}' to '{self.read_alias}' failed: {response.text}")
+
+    def ensure_current(self, now: Optional[datetime] = None) -> str:
+        """Makes sure this period's partition exists and holds the write alias; returns its name."""
+        now = now or datetime.now(timezone.utc)
+        name = self.partition_name(now)
+        if current_partitions.get(self.base_index) == name:
+            return name
+
+        self.ensure_template()
+        response = self._request("PUT", name, {})
+        if not response.ok and "resource_already_exists_exception" not in response.text:
+            raise Exception(f"Partition creation failed for '{name}': {response.text}")
+
+        previous = self._write_index()
+        if previous != name:
+            actions = [{"add": {"index": name, "alias": self.write_alias, "is_write_index": True}}]
+            if previous:
+                actions.insert(0, {"remove": {"index": previous, "alias": self.write_alias}})
+            response = self._request("POST", "_aliases", {"actions": actions})
+            if not response.ok:
+                raise Exception(f"Write alias rollover to '{name}' failed: {response.text}")
+            logger.info(f"🗓️ Rolled write alias '{self.write_alias}' over to '{name}' (was {previous})")
+            if previous and self.compact_on_rollover:
+                self.compact(previous)
+
+        current_partitions.set(self.base_index, name)
+        return name
+
+    def _write_index(self) -> Optional[str]:
+        response = self._request("GET", f"_alias/{self.write_alias}")
+        if response.status_code != 200:
+            return None
+        indices = list(response.json())
+        return indices[0] if indices else None
+
+    def compact(self, partition: str) -> None:
+        """Marks a closed partition read-mostly and force-merges it to one segment (runs server-side)."""
+        try:
+            self._request("PUT", f"{partition}/_settings", {"index": {"refresh_interval": "30s"}})
+            self._request("POST", f"{partition}/_forcemerge", timeout=FORCE_MERGE_TIMEOUT_SECONDS,
+                          max_num_segments=1)
+        except requests.exceptions.ReadTimeout:
+            pass  # The merge keeps running on the cluster; we only started it
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"⚠️ Could not compact partition '{partition}': {e}")
+            return
+        logger.info(f"🗜️ Started force-merge of partition '{partition}'")
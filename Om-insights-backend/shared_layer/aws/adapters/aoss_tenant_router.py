@@ -0,0 +1,343 @@
+import json
+import re
+import time
+from typing import Callable, NamedTuple, Optional
+
+import requests
+
+from shared_layer.cache.tenant_placement_store import DEDICATED, MIGRATING, SHARED, TenantPlacementStore
+from shared_layer.cache.ttl_cache import TTLCache
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_PROMOTE_DOC_COUNT = 2_000_000
+DEFAULT_TARGET_TTL_SECONDS = 300
+DEFAULT_COUNT_CHECK_TTL_SECONDS = 3600
+DEFAULT_WRITER_GRACE_SECONDS = 900   # ≥ the longest indexing call (the worker Lambda timeout)
+MAX_PROMOTIONS_PER_RUN = 100
+ROUTING_SCRIPT = "ctx._routing = ctx._source.business_id"
+
+HEADERS = {"Content-Type": "application/json"}
+
+# ✅ Process-wide read-side caches (kept across warm invocations); writers never use tenant_targets
+tenant_targets = TTLCache(ttl_seconds=DEFAULT_TARGET_TTL_SECONDS, max_size=4096)
+known_aliases = TTLCache(ttl_seconds=DEFAULT_COUNT_CHECK_TTL_SECONDS, max_size=4096)
+
+
+class TenantTarget(NamedTuple):
+    index: str               # index (or comma-separated indices) to search / write
+    routing: Optional[str]   # None once the tenant has its own index
+    dedicated: bool
+    migrating: bool = False
+
+
+class TenantIndexRouter:
+    """
+    Maps a business to the index (and shard routing) holding its documents.
+
+    Tenants start in the shared index, routed by `business_id`, so on a
+    multi-shard index a tenant's documents live on one shard and its
+    queries touch only that shard (a single-shard index gains nothing).
+    Documents indexed before routing was enabled sit on `_id`-hashed shards
+    and are invisible to routed searches until `reroute_documents()` has
+    copied the index. Each tenant gets a filtered, routed alias
+    (`<index>-tenant-<id>`) for direct consumers.
+
+    Tenants that grow past `promote_doc_count` move to a dedicated index.
+    The move is fenced by the shared `TenantPlacementStore`, never by the
+    per-process caches, and advances one step per scheduled
+    `run_promotions()` round (never on the indexing path):
+
+    1. SHARED → MIGRATING: the dedicated index is created and writers, which
+       read the placement fresh on every batch, switch to it. Readers search
+       both indices.
+    2. After `writer_grace_seconds` no writer can still hold the SHARED
+       placement, so the shared index is frozen for the tenant: a
+       background reindex copies its documents with `op_type=create` (newer
+       copies already in the dedicated index win) and its task id is kept
+       in the placement. Once a later round sees the task completed, the
+       alias is swapped and the tenant is DEDICATED.
+    3. Once every reader cache has expired, the tenant's documents are
+       deleted from the shared index.
+    """
+
+    def __init__(self, endpoint: str, base_index: str, session: requests.Session, auth_provider: Callable[[], object],
+                 create_aliases: bool = True, auto_promote: bool = False,
+                 promote_doc_count: int = DEFAULT_PROMOTE_DOC_COUNT,
+                 template_loader: Optional[Callable[[], dict]] = None, timeout_seconds: float = 10,
+                 placement_store: Optional[TenantPlacementStore] = None,
+                 writer_grace_seconds: int = DEFAULT_WRITER_GRACE_SECONDS):
+        self.endpoint = endpoint.rstrip("/")
+        self.base_index = base_index
+        self.session = session
+        self.auth_provider = auth_provider
+        self.create_aliases = create_aliases
+        self.placement_store = placement_store or TenantPlacementStore()
+        if auto_promote and not (create_aliases and self.placement_store.enabled):
+            logger.warning("⚠️ Tenant promotion needs aliases and a placement table; auto_promote is disabled.")
+            auto_promote = False
+        self.auto_promote = auto_promote
+        self.promote_doc_count = promote_doc_count or DEFAULT_PROMOTE_DOC_COUNT
+        self.template_loader = template_loader
+        self.timeout_seconds = timeout_seconds
+        self.writer_grace_seconds = writer_grace_seconds or DEFAULT_WRITER_GRACE_SECONDS
+
+    @staticmethod
+    def _slug(business_id: str) -> str:
+        return re.sub(r"[^a-z0-9_-]", "-", business_id.lower())
+
+    def alias_name(self, business_id: str) -> str:
+        return f"{self.base_index}-tenant-{self._slug(business_id)}"
+
+    def dedicated_index(self, business_id: str) -> str:
+        return f"{self.base_index}-dedicated-{self._slug(business_id)}"
+
+    def _shared(self, business_id: str) -> TenantTarget:
+        return TenantTarget(self.base_index, business_id, False)
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None, timeout: Optional[float] = None,
+                 **params) -> requests.Response:
+        return self.session.request(
+            method, f"{self.endpoint}/{path}", headers=HEADERS, auth=self.auth_provider(), params=params or None,
+            data=json.dumps(body) if body is not None else None, timeout=timeout or self.timeout_seconds,
+            verify=False  # ⚠️ Disable only in dev
+        )
+
+    def _placement(self, business_id: str) -> dict:
+        return self.placement_store.get(self.base_index, business_id)
+
+    def _target(self, business_id: str, placement: dict, for_write: bool) -> TenantTarget:
+        state, dedicated = placement["state"], placement.get("index")
+        if state == DEDICATED or (state == MIGRATING and for_write):
+            return TenantTarget(dedicated, None, True)
+        if state == MIGRATING:
+            # Older documents are still only in the shared index, newer ones only in the dedicated one
+            return TenantTarget(f"{self.base_index},{dedicated}", business_id, False, migrating=True)
+        return self._shared(business_id)
+
+    def resolve(self, business_id: Optional[str]) -> TenantTarget:
+        """Where searches for the tenant go; cached for a few minutes per process."""
+        if not business_id:
+            return TenantTarget(self.base_index, None, False)
+        if not self.placement_store.enabled:
+            return self._shared(business_id)
+        target = tenant_targets.get((self.base_index, business_id))
+        if target is None:
+            target = self._target(business_id, self._placement(business_id), for_write=False)
+            tenant_targets.set((self.base_index, business_id), target)
+        return target
+
+    def resolve_write(self, business_id: Optional[str]) -> TenantTarget:
+        """
+        Where the tenant's new documents go. Read from the placement store on
+        every call (once per business per indexing batch): promotion relies
+        on no writer acting on a placement older than `writer_grace_seconds`.
+        """
+        if not business_id:
+            return TenantTarget(self.base_index, None, False)
+        if not self.placement_store.enabled:
+            return self._shared(business_id)
+        return self._target(business_id, self._placement(business_id), for_write=True)
+
+    def ensure_alias(self, business_id: str) -> None:
+        """Creates the tenant's filtered, routed alias on the shared index (once per process)."""
+        if not self.create_aliases or not business_id or known_aliases.get((self.base_index, business_id)):
+            return
+        if not self.resolve(business_id).dedicated:
+            response = self._request("PUT", f"{self.base_index}/_alias/{self.alias_name(business_id)}", {
+                "filter": {"term": {"business_id": business_id}},
+                "routing": business_id
+            })
+            if not response.ok:
+                logger.warning(f"⚠️ Could not create alias for {business_id} ({response.status_code}): {response.text}")
+                return
+            logger.info(f"🏷️ Alias '{self.alias_name(business_id)}' ready for {business_id}")
+        known_aliases.set((self.base_index, business_id), True)
+
+    def run_promotions(self) -> int:
+        """
+        One promotion round (run on a schedule, never on the indexing path):
+        advances every promotion in progress, then starts one for each
+        shared tenant past `promote_doc_count`. Returns the steps taken.
+        """
+        if not self.auto_promote:
+            return 0
+        steps = 0
+        in_progress = self.placement_store.in_progress(self.base_index)
+        for business_id in in_progress:
+            steps += self._step(business_id, self.advance)
+        for business_id in set(self._large_tenants()) - set(in_progress):
+            steps += self._step(business_id, self.promote)
+        return steps
+
+    def maybe_promote(self, business_id: str) -> bool:
+        """Starts or advances one tenant's promotion; a shared tenant is promoted only past `promote_doc_count`."""
+        if not self.auto_promote or not business_id:
+            return False
+        placement = self._placement(business_id)
+        if placement["state"] != SHARED:
+            return self.advance(business_id, placement)
+        response = self._request("POST", f"{self.base_index}/_count",
+                                 {"query": {"term": {"business_id": business_id}}}, routing=business_id)
+        if not response.ok:
+            logger.warning(f"⚠️ Tenant size check failed for {business_id} ({response.status_code})")
+            return False
+        count = response.json().get("count", 0)
+        if count < self.promote_doc_count:
+            return False
+        logger.info(f"📈 Tenant {business_id} has {count} documents (>= {self.promote_doc_count}); promoting")
+        return self.promote(business_id)
+
+    @staticmethod
+    def _step(business_id: str, step: Callable[..., bool]) -> bool:
+        try:
+            return step(business_id)
+        except Exception as e:
+            # One tenant's failure doesn't stop the round; the next round retries it
+            logger.error(f"❌ Tenant promotion step failed for {business_id}: {e}")
+            return False
+
+    def _large_tenants(self) -> list:
+        """Business ids in the shared index with at least `promote_doc_count` documents (one aggregation)."""
+        response = self._request("POST", f"{self.base_index}/_search", {
+            "size": 0,
+            "aggs": {"tenants": {"terms": {"field": "business_id", "min_doc_count": self.promote_doc_count,
+                                           "size": MAX_PROMOTIONS_PER_RUN}}}
+        })
+        if not response.ok:
+            raise Exception(f"Tenant size aggregation failed ({response.status_code}): {response.text}")
+        buckets = response.json().get("aggregations", {}).get("tenants", {}).get("buckets", [])
+        return [bucket["key"] for bucket in buckets]
+
+    def promote(self, business_id: str) -> bool:
+        """Step 1: creates the dedicated index and moves the tenant to MIGRATING (writers switch)."""
+        if not self.placement_store.enabled:
+            raise Exception("Tenant promotion needs the tenant placement table")
+        placement = self._placement(business_id)
+        if placement["state"] != SHARED:
+            return self.advance(business_id, placement)
+
+        dedicated = self.dedicated_index(business_id)
+        template = self.template_loader() if self.template_loader else {}
+        response = self._request("PUT", dedicated, template)
+        if not response.ok and "resource_already_exists_exception" not in response.text:
+            raise Exception(f"Dedicated index creation failed for {business_id}: {response.text}")
+
+        # Direct alias consumers see both indices while the tenant migrates
+        response = self._request("PUT", f"{dedicated}/_alias/{self.alias_name(business_id)}",
+                                 {"filter": {"term": {"business_id": business_id}}})
+        if not response.ok:
+            raise Exception(f"Alias update failed for {business_id}: {response.text}")
+
+        if not self.placement_store.transition(self.base_index, business_id, placement["version"], MIGRATING,
+                                               index=dedicated):
+            return False
+        tenant_targets.pop((self.base_index, business_id))
+        logger.info(f"🚚 {business_id} is migrating to '{dedicated}'; writers have switched, "
+                    f"the copy runs after {self.writer_grace_seconds}s")
+        return True
+
+    def advance(self, business_id: str, placement: Optional[dict] = None) -> bool:
+        """Steps 2 and 3 of a promotion, each once its grace period (or copy task) is done."""
+        placement = placement or self._placement(business_id)
+        waited = time.time() - placement.get("changed_at", 0)
+        dedicated = placement.get("index")
+
+        if placement["state"] == MIGRATING and not placement.get("copy_task") and waited >= self.writer_grace_seconds:
+            # ✅ No writer still targets the shared index: copy in the background, without overwriting newer documents
+            task = self._start_reindex({"index": self.base_index, "query": {"term": {"business_id": business_id}}},
+                                       dedicated, op_type="create")
+            if not self.placement_store.transition(self.base_index, business_id, placement["version"], MIGRATING,
+                                                   index=dedicated, copy_task=task):
+                return False
+            logger.info(f"🔁 Copying {business_id}'s shared documents into '{dedicated}' (task {task})")
+            return True
+
+        if placement["state"] == MIGRATING and placement.get("copy_task"):
+            status = self._task_status(placement["copy_task"])
+            if status is None:
+                return False  # Still running: a later round checks again
+            if not status:
+                # The copy failed: clear the task so the next round starts it again
+                self.placement_store.transition(self.base_index, business_id, placement["version"], MIGRATING,
+                                                index=dedicated)
+                return False
+            response = self._request("POST", "_aliases", {"actions": [
+                {"remove": {"index": self.base_index, "alias": self.alias_name(business_id)}},
+                {"add": {"index": dedicated, "alias": self.alias_name(business_id), "is_write_index": True}}
+            ]})
+            if not response.ok:
+                raise Exception(f"Alias swap failed for {business_id}: {response.text}")
+            if not self.placement_store.transition(self.base_index, business_id, placement["version"], DEDICATED):
+                return False
+            tenant_targets.pop((self.base_index, business_id))
+            logger.info(f"✅ Promoted {business_id} to dedicated index '{dedicated}'")
+            return True
+
+        if (placement["state"] == DEDICATED and not placement.get("shared_copy_deleted")
+                and waited >= DEFAULT_TARGET_TTL_SECONDS):
+            # ✅ Every reader cache has expired: nothing reads or writes the tenant's shared copy any more
+            response = self._request("POST", f"{self.base_index}/_delete_by_query",
+                                     {"query": {"term": {"business_id": business_id}}},
+                                     routing=business_id, wait_for_completion="false", conflicts="proceed")
+            if not response.ok:
+                raise Exception(f"Shared copy cleanup failed for {business_id}: {response.text}")
+            self.placement_store.transition(self.base_index, business_id, placement["version"], DEDICATED,
+                                            shared_copy_deleted=True)
+            logger.info(f"🧹 Removing {business_id}'s documents from '{self.base_index}'")
+            return True
+        return False
+
+    def reroute_documents(self, dest_index: str) -> str:
+        """
+        One-time migration for an index filled before routing was enabled:
+        copies every document into `dest_index` routed by its `business_id`.
+        Runs as a background task (returns its id); point `aoss.index_name`
+        at `dest_index` once it has finished.
+        """
+        template = self.template_loader() if self.template_loader else {}
+        response = self._request("PUT", dest_index, template)
+        if not response.ok and "resource_already_exists_exception" not in response.text:
+            raise Exception(f"Index creation failed for '{dest_index}': {response.text}")
+        response = self._request("POST", "_reindex", {
+            "conflicts": "proceed",
+            "source": {"index": self.base_index},
+            "dest": {"index": dest_index},
+            "script": {"lang": "painless", "source": ROUTING_SCRIPT}
+        }, wait_for_completion="false")
+        if not response.ok:
+            raise Exception(f"Rerouting reindex into '{dest_index}' failed: {response.text}")
+        task = response.json().get("task")
+        logger.info(f"🔁 Rerouting '{self.base_index}' into '{dest_index}' (task {task})")
+        return task
+
+    def _start_reindex(self, source: dict, dest_index: str, op_type: str = "index") -> str:
+        """Starts a background reindex (large tenants take far longer than any Lambda); returns its task id."""
+        response = self._request("POST", "_reindex", {
+            "conflicts": "proceed",
+            "source": source,
+            "dest": {"index": dest_index, "op_type": op_type}
+        }, wait_for_completion="false")
+        if not response.ok:
+            raise Exception(f"Reindex into '{dest_index}' failed to start: {response.text}")
+        return response.json()["task"]
+
+    def _task_status(self, task: str) -> Optional[bool]:
+        """None while the task runs, True when it completed cleanly, False when it failed or is unknown."""
+        response = self._request("GET", f"_tasks/{task}")
+        if response.status_code == 404:
+            logger.warning(f"⚠️ Copy task {task} is unknown; restarting the copy")
+            return False
+        if not response.ok:
+            raise Exception(f"Task status check failed for {task}: {response.text}")
+        result = response.json()
+        if not result.get("completed"):
+            return None
+        failures = result.get("error") or (result.get("response") or {}).get("failures")
+        if failures:
+            logger.error(f"❌ Copy task {task} failed: {failures}")
+            return False
+        logger.info(f"🔁 Copy task {task} copied {(result.get('response') or {}).get('total', 0)} documents")
+        return True
@@ -1,66 +1,164 @@
 import json
-from typing import List
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from hashlib import sha256
 
+from botocore.exceptions import (ClientError, ConnectionClosedError, ConnectTimeoutError, EndpointConnectionError,
+                                 ReadTimeoutError)
+
+from shared_layer.aws.utils.rate_limiter import AdaptiveRateLimiter, LatencyStats
+from shared_layer.aws.utils.token_estimator import titan_token_estimator
+from shared_layer.cache.embedding_cache import EmbeddingCache
 from shared_layer.repository.bedrock_repository import BedRockRepository
 from shared_layer.logging.logger import Logger
+from shared_layer.model.embedding import Embedding, EmbeddingPrecision
 
 logger = Logger()
 
+# ✅ Constants
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException"}
+# Retried with backoff, without slowing the rate limiter (botocore's own retries are off for this client)
+TRANSIENT_ERROR_CODES = {"InternalServerException", "ModelTimeoutException", "ModelNotReadyException"}
+TRANSIENT_TRANSPORT_ERRORS = (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError, ConnectionClosedError)
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_MAX_REQUESTS_PER_SECOND = 50.0
+DEFAULT_MAX_RETRIES = 5
+BASE_BACKOFF_SECONDS = 0.2
+
+
 class BedrockEmbeddingAdapter(BedRockRepository):
-    def __init__(self, bedrock_client, config, batch_size: int = 10):
+    def __init__(self, bedrock_client, config, embedding_cache: Optional[EmbeddingCache] = None):
         super().__init__(bedrock_client, config)
         self.client = bedrock_client  # Titan client
         self.model_id = "amazon.titan-embed-text-v1"
-        self.batch_size = batch_size
+        self.embedding_cache = embedding_cache
+
+        bedrock_config = (config or {}).get("bedrock", {}) or {}
+        self.max_concurrency = bedrock_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        self.max_retries = bedrock_config.get("max_retries", DEFAULT_MAX_RETRIES)
+        # ✅ Precision embeddings are held, cached and indexed with
+        self.precision = EmbeddingPrecision(bedrock_config.get("embedding_precision", EmbeddingPrecision.FLOAT32))
+        # ✅ Shared by all worker threads: adapts to ThrottlingException (AIMD)
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=bedrock_config.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND),
+            max_rate=bedrock_config.get("max_requests_per_second", DEFAULT_MAX_REQUESTS_PER_SECOND)
+        )
 
     @staticmethod
     def _hash_text(text: str) -> str:
         return sha256(text.encode("utf-8")).hexdigest()
 
-    def embed_batch(self, input_texts: List[str]) -> List[List[float]]:
+    def _invoke_titan(self, text: str, latency_stats: Optional[LatencyStats] = None) -> List[float]:
         """
-        Sends one text per Titan request (serially). Titan does not support batch input.
-
-        Args:
-            input_texts (List[str]): List of text chunks.
-
-        Returns:
-            List[List[float]]: Titan embedding per chunk.
+        Embeds one text, waiting on the rate limiter. Throttled calls, 5xx /
+        model-timeout errors and connection failures are retried with jittered
+        backoff; only throttles slow the shared rate limiter down. Outcomes are
+        recorded in the caller's `latency_stats` (the adapter is shared by
+        concurrent records, so it keeps none of its own).
         """
-        embeddings = []
-
-        for text in input_texts:
-            payload = {
-                "inputText": text
-            }
-
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(payload).encode("utf-8"),
-                accept="application/json",
-                contentType="application/json"
-            )
+        latency_stats = latency_stats or LatencyStats()
+        payload = {
+            "inputText": text
+        }
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.client.invoke_model(
+                    modelId=self.model_id,
+                    body=json.dumps(payload).encode("utf-8"),
+                    accept="application/json",
+                    contentType="application/json"
+                )
+            except (ClientError, *TRANSIENT_TRANSPORT_ERRORS) as e:
+                throttled = self._is_throttle(e)
+                if not (throttled or self._is_transient(e)) or attempt == self.max_retries:
+                    latency_stats.record_error()
+                    raise
+                if throttled:
+                    latency_stats.record_throttle()
+                    self.rate_limiter.on_throttle()
+                backoff = BASE_BACKOFF_SECONDS * (2 ** attempt)
+                reason = "throttled" if throttled else f"failed ({type(e).__name__})"
+                logger.warning(f"⚠️ Titan {reason} (attempt {attempt + 1}), retrying in ~{backoff:.1f}s")
+                time.sleep(random.uniform(0, backoff))
+                continue
+
+            latency_stats.record((time.perf_counter() - start) * 1000)
+            self.rate_limiter.on_success()
 
             body = json.loads(response["body"].read())
             embedding = body.get("embedding")
+            # ✅ Calibrate chunk sizing against Titan's real token count
+            titan_token_estimator.observe(len(text), body.get("inputTextTokenCount", 0))
 
             if not embedding:
                 raise ValueError("Titan response missing 'embedding' key.")
 
-            embeddings.append(embedding)
+            return embedding
 
-        return embeddings
+    @staticmethod
+    def _is_throttle(error: Exception) -> bool:
+        return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        if isinstance(error, TRANSIENT_TRANSPORT_ERRORS):
+            return True
+        if not isinstance(error, ClientError):
+            return False
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return error.response.get("Error", {}).get("Code") in TRANSIENT_ERROR_CODES or status >= 500
+
+    def embed_batch(self, input_texts: List[str],
+                    latency_stats: Optional[LatencyStats] = None) -> List[List[float]]:
+        """
+        Sends one text per Titan request (Titan does not support batch input),
+        with up to `max_concurrency` requests in flight.
+
+        Args:
+            input_texts (List[str]): List of text chunks.
+            latency_stats (LatencyStats): Collects this batch's call latencies and outcomes.
+
+        Returns:
+            List[List[float]]: Titan embedding per chunk, in input order.
+        """
+        if not input_texts:
+            return []
+        latency_stats = latency_stats or LatencyStats()
+        if len(input_texts) == 1 or self.max_concurrency <= 1:
+            return [self._invoke_titan(text, latency_stats) for text in input_texts]
+
+        workers = min(self.max_concurrency, len(input_texts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="titan") as executor:
+            # ✅ map() yields results in submission order
+            return list(executor.map(lambda text: self._invoke_titan(text, latency_stats), input_texts))
+
+    def embed_query(self, text: str) -> Embedding:
+        """Embeds a search query, served from the embedding cache when the same text was seen before."""
+        text_hash = self._hash_text(text)
+        if self.embedding_cache:
+            cached = self.embedding_cache.get_many(self.model_id, [text_hash]).get(text_hash)
+            if cached is not None:
+                return cached.with_precision(self.precision)
+        embedding = Embedding.from_floats(self._invoke_titan(text), self.precision)
+        if self.embedding_cache:
+            self.embedding_cache.put_many(self.model_id, {text_hash: embedding})
+        return embedding
 
     def enrich_with_embeddings(self, spacy_batches: List[dict]) -> List[dict]:
         """
-        Appends Titan embeddings to each 512-token SpaCy-processed chunk.
+        Appends Titan embeddings to each SpaCy-processed chunk (sized to Titan's token budget by the chunker).
 
         Args:
             spacy_batches (List[dict]): Sentence-chunked processed text.
 
         Returns:
-            List[dict]: Enriched with `embedding` field per chunk.
+            List[dict]: Enriched with an `embedding` field (`Embedding`) per chunk.
         """
         logger.info("🔍 Starting batch embedding enrichment using Amazon Titan...")
 
@@ -74,26 +172,49 @@ class BedrockEmbeddingAdapter(BedRockRepository):
             texts_to_embed.append(text)
             batch_refs.append((idx, text_hash))
 
-        for i in range(0, len(texts_to_embed), self.batch_size):
-            batch_texts = texts_to_embed[i:i + self.batch_size]
-            ref_slice = batch_refs[i:i + self.batch_size]
-
-            embeddings = self.embed_batch(batch_texts)
-
-            if len(embeddings) != len(batch_texts):
-                raise RuntimeError(f"❌ Titan returned {len(embeddings)} embeddings for {len(batch_texts)} inputs")
-
-            for (batch_idx, expected_hash), embedding in zip(ref_slice, embeddings):
-                original_text = " ".join(spacy_batches[batch_idx]["sentences"])
-                actual_hash = self._hash_text(original_text)
-
-                if expected_hash != actual_hash:
-                    raise ValueError(f"❌ Hash mismatch on chunk {batch_idx}. Embedding mismatch risk!")
-
-                if not isinstance(embedding, list) or not all(isinstance(x, (float, int)) for x in embedding):
-                    raise ValueError(f"❌ Invalid embedding format in batch {batch_idx}")
-
-                spacy_batches[batch_idx]["embedding"] = embedding
-
-        logger.info("✅ All embeddings added successfully.")
-        return spacy_batches
\ No newline at end of file
+        latency_stats = LatencyStats()  # ✅ Per call: concurrent records must not mix their stats
+        start = time.perf_counter()
+
+        # ✅ Only texts missing from the cache (deduplicated within the file) reach Titan
+        unique_texts = dict(zip((text_hash for _, text_hash in batch_refs), texts_to_embed))
+        vectors = {
+            text_hash: embedding.with_precision(self.precision)
+            for text_hash, embedding in self.embedding_cache.get_many(self.model_id, unique_texts).items()
+        } if self.embedding_cache else {}
+        pending = [(text_hash, text) for text_hash, text in unique_texts.items() if text_hash not in vectors]
+
+        embeddings = self.embed_batch([text for _, text in pending], latency_stats)
+
+        if len(embeddings) != len(pending):
+            raise RuntimeError(f"❌ Titan returned {len(embeddings)} embeddings for {len(pending)} inputs")
+
+        fresh = {}
+        for (text_hash, _), embedding in zip(pending, embeddings):
+            if not isinstance(embedding, list) or not all(isinstance(x, (float, int)) for x in embedding):
+                raise ValueError(f"❌ Invalid embedding format for chunk hash {text_hash}")
+            fresh[text_hash] = Embedding.from_floats(embedding, self.precision)
+        vectors.update(fresh)
+
+        if self.embedding_cache:
+            self.embedding_cache.put_many(self.model_id, fresh)
+
+        for batch_idx, expected_hash in batch_refs:
+            original_text = " ".join(spacy_batches[batch_idx]["sentences"])
+            actual_hash = self._hash_text(original_text)
+
+            if expected_hash != actual_hash:
+                raise ValueError(f"❌ Hash mismatch on chunk {batch_idx}. Embedding mismatch risk!")
+
+            spacy_batches[batch_idx]["embedding"] = vectors[expected_hash]
+
+        logger.info({
+            "message": "✅ All embeddings added successfully.",
+            "chunks": len(texts_to_embed),
+            "embedding_precision": self.precision.value,
+            "titan_calls": len(pending),
+            "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+            "rate_limit_rps": round(self.rate_limiter.rate, 2),
+            "titan_latency": latency_stats.summary(),
+            "embedding_cache": self.embedding_cache.stats() if self.embedding_cache else None
+        })
+        return spacy_batches
@@ -1,13 +1,15 @@
 # file_processor/repository/dynamodb_adapter.py
 
 from botocore.exceptions import ClientError, BotoCoreError
-from typing import Dict, List
+from typing import Dict, List, Optional
 from shared_layer.logging.logger import Logger
 
 from shared_layer.repository.dynamo_repository import DynamoRepository
 
 logger = Logger()
 
+SHARDING_STATUS = "Sharded"
+
 class DynamoDBAdapter(DynamoRepository):
     """
     Concrete adapter implementing DynamoDB repository methods.
@@ -113,3 +115,92 @@ class DynamoDBAdapter(DynamoRepository):
         except Exception as e:
             logger.error(f"❌ Unexpected error updating metadata status: {str(e)}", exc_info=True)
             return None
+
+    @staticmethod
+    def _metadata_key(business_id: str, event_time: str) -> Dict:
+        return {"business_id": {"S": business_id}, "upload_timestamp": {"S": event_time}}
+
+    def start_shard_tracking(self, business_id: str, event_time: str, shard_count: int, table_name: str) -> None:
+        """
+        Stores the shard count on the file's metadata item and marks it as sharded.
+
+        Idempotent for a retried router run: with the same shard count, shards
+        already recorded are kept (their redeliveries are deduplicated by the
+        workers and would never be recorded again). Only a different count
+        (sharding config changed between attempts) resets the counters, since
+        the earlier results then cover other byte ranges.
+        """
+        values = {":sharded": {"S": SHARDING_STATUS}, ":total": {"N": str(shard_count)}}
+        try:
+            self.dynamodb.update_item(
+                TableName=table_name,
+                Key=self._metadata_key(business_id, event_time),
+                UpdateExpression="SET #s = :sharded, shards_total = :total",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues=values,
+                ConditionExpression="attribute_exists(business_id) AND "
+                                    "(attribute_not_exists(shards_total) OR shards_total = :total)"
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            logger.warning(f"⚠️ Shard count for {business_id} at {event_time} changed; resetting shard results")
+            self.dynamodb.update_item(
+                TableName=table_name,
+                Key=self._metadata_key(business_id, event_time),
+                UpdateExpression="SET #s = :sharded, shards_total = :total REMOVE completed_shards, failed_shards",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues=values,
+                ConditionExpression="attribute_exists(business_id)"
+            )
+        logger.info(f"✅ Tracking {shard_count} shard(s) for {business_id} at {event_time}")
+
+    def record_shard_result(self, business_id: str, event_time: str, shard_index: int, succeeded: bool,
+                            table_name: str) -> Optional[Dict]:
+        """
+        Adds the shard to the `completed_shards` string set (and `failed_shards` if it
+        had failures) in one atomic update. Sets make redelivered shards count once.
+        """
+        shard = {"SS": [str(shard_index)]}
+        update_expression = "ADD completed_shards :shard"
+        if not succeeded:
+            update_expression += ", failed_shards :shard"
+        try:
+            response = self.dynamodb.update_item(
+                TableName=table_name,
+                Key=self._metadata_key(business_id, event_time),
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues={":shard": shard},
+                ConditionExpression="attribute_exists(shards_total)",
+                ReturnValues="ALL_NEW"
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                logger.warning(f"⚠️ No shard tracking found for {business_id} | {event_time}")
+                return None
+            raise
+        attributes = response.get("Attributes", {})
+        return {
+            "status": attributes.get("status", {}).get("S"),
+            "shards_total": int(attributes.get("shards_total", {}).get("N", 0)),
+            "completed_shards": len(attributes.get("completed_shards", {}).get("SS", [])),
+            "failed_shards": len(attributes.get("failed_shards", {}).get("SS", []))
+        }
+
+    def complete_sharded_file(self, business_id: str, event_time: str, final_status: str, table_name: str) -> bool:
+        """Moves the file from Sharded to `final_status`, only if all shards are in (exactly once)."""
+        try:
+            self.dynamodb.update_item(
+                TableName=table_name,
+                Key=self._metadata_key(business_id, event_time),
+                UpdateExpression="SET #s = :final",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":final": {"S": final_status}, ":sharded": {"S": SHARDING_STATUS}},
+                ConditionExpression="#s = :sharded AND size(completed_shards) = shards_total"
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        logger.info(f"✅ All shards finished for {business_id} at {event_time} -> {final_status}")
+        return True
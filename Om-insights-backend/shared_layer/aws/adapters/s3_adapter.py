@@ -1,5 +1,6 @@
 import json
 import re
+from typing import Optional, Tuple
 
 import boto3
 from botocore.exceptions import ClientError
@@ -8,7 +9,15 @@ from shared_layer.logging.logger import Logger
 import chardet
 
 logger = Logger()
+
+# ✅ Error codes of a conditional PutObject that lost to another writer
+CONDITIONAL_WRITE_CONFLICTS = ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409')
+
+
 class S3Adapter:
+    # Buckets already confirmed (or created) by this process
+    _verified_buckets = set()
+
     def __init__(self, config: dict):
         self.config = config
         self.s3_client = boto3.client('s3')
@@ -22,6 +31,15 @@ class S3Adapter:
             logger.error(f"Error retrieving object from S3: {str(e)}")
             raise
 
+    def get_object_range(self, bucket: str, key: str, start: int, end: int) -> bytes:
+        """Reads bytes [start, end] (inclusive, as in the HTTP Range header) of an object."""
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")
+            return response['Body'].read()
+        except Exception as e:
+            logger.error(f"Error retrieving bytes {start}-{end} of {bucket}/{key}: {str(e)}")
+            raise
+
     def put_object(self, bucket: str, key: str, body: bytes):
         try:
             response = self.s3_client.put_object(Bucket=bucket, Key=key, Body=body)
@@ -31,6 +49,35 @@ class S3Adapter:
             logger.error(f"Error uploading object to S3: {str(e)}")
             raise
 
+    def get_object_version(self, bucket: str, key: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """Body and ETag of an object, or (None, None) when it doesn't exist (the base of a conditional write)."""
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            return response['Body'].read(), response['ETag']
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None, None
+            logger.error(f"Error retrieving object from S3: {str(e)}")
+            raise
+
+    def put_object_if_unchanged(self, bucket: str, key: str, body: bytes, etag: Optional[str]) -> bool:
+        """
+        Writes the object only if it still has `etag` (If-Match), or with no
+        `etag` only if it still doesn't exist (If-None-Match). Returns False
+        when another writer changed it first, so the caller can re-read and retry.
+        """
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        try:
+            self.s3_client.put_object(Bucket=bucket, Key=key, Body=body, **condition)
+            logger.info(f"Uploaded object to S3: {bucket}/{key}")
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in CONDITIONAL_WRITE_CONFLICTS:
+                logger.info(f"Object {bucket}/{key} changed concurrently; conditional write rejected")
+                return False
+            logger.error(f"Error uploading object to S3: {str(e)}")
+            raise
+
     def delete_object(self, bucket: str, key: str):
         try:
             response = self.s3_client.delete_object(Bucket=bucket, Key=key)
@@ -170,10 +217,14 @@ class S3Adapter:
     def ensure_bucket_exists(self, bucket: str):
         """
         Ensures that the specified S3 bucket exists. Creates the bucket if it does not exist.
+        The check runs once per bucket per process; later calls return immediately.
 
         Args:
             bucket (str): S3 bucket name
         """
+        if bucket in S3Adapter._verified_buckets:
+            return
+
         if not self.is_valid_bucket_name(bucket):
             logger.error(f"Invalid bucket name: {bucket}")
             raise ValueError(f"Invalid bucket name: {bucket}")
@@ -190,6 +241,7 @@ class S3Adapter:
             else:
                 logger.error(f"Error checking bucket {bucket}: {str(e)}")
                 raise
+        S3Adapter._verified_buckets.add(bucket)
 
     def save_json(self, bucket: str, key: str, data: dict):
         """
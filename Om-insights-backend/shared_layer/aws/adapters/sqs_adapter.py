@@ -1,10 +1,16 @@
 import json
-import boto3
+from typing import Dict, List, Tuple
+
 from shared_layer.logging.logger import Logger
 from shared_layer.model.response import Response
 
 logger = Logger()
 
+# ✅ SendMessageBatch limits
+MAX_BATCH_ENTRIES = 10
+MAX_BATCH_BYTES = 256 * 1024
+MAX_MESSAGE_BYTES = 256 * 1024   # one message body, as serialized by send_batch_to_worker_queue
+
 
 class SQSAdapter:
     def __init__(self, config: dict, sqs_client):
@@ -16,6 +22,19 @@ class SQSAdapter:
             queue_name.lower(): queue_info["url"]
             for queue_name, queue_info in config["queues"].items()
         }
+        # ✅ Per-subscription-tier queues, registered as "<data_type>_<tier>"
+        for queue_name, queue_info in config["queues"].items():
+            for tier, tier_url in (queue_info.get("tiers") or {}).items():
+                self.worker_queues[self.tier_queue_name(queue_name, tier)] = tier_url
+
+    @staticmethod
+    def tier_queue_name(queue_name: str, tier: str) -> str:
+        return f"{queue_name.lower()}_{tier.lower()}"
+
+    def resolve_worker_queue(self, queue_name: str, tier: str) -> str:
+        """The tier's own queue for this data type, or the data type's shared queue if it has none."""
+        tier_queue = self.tier_queue_name(queue_name, tier)
+        return tier_queue if tier_queue in self.worker_queues else queue_name.lower()
 
     def send_to_worker_queue(self, queue_name, file_metadata):
         queue_url = self.worker_queues.get(queue_name)
@@ -42,3 +61,47 @@ class SQSAdapter:
                 status="Error",
                 message=str(e)
             ).dict()
+
+    def send_batch_to_worker_queue(self, queue_name: str, messages: List[Tuple[str, dict]]) -> Dict[str, str]:
+        """
+        Sends messages with SendMessageBatch (up to 10 entries / 256 KB per call).
+
+        Args:
+            messages: (key, body) pairs; keys only need to be unique within the call.
+
+        Returns:
+            {key: error} for every message that was not sent (empty when all succeeded).
+        """
+        queue_url = self.worker_queues.get(queue_name)
+        if not queue_url:
+            logger.error(f"No queue URL found for {queue_name}. Check routing_config.yaml and environment variables.")
+            return {key: f"Unknown queue: {queue_name}" for key, _ in messages}
+
+        failures = {}
+        for chunk in self._chunks([(key, json.dumps(body, default=str)) for key, body in messages]):
+            # Entry ids must be unique per call and [A-Za-z0-9_-]; positions satisfy both
+            keys = {str(i): key for i, (key, _) in enumerate(chunk)}
+            entries = [{"Id": str(i), "MessageBody": body} for i, (_, body) in enumerate(chunk)]
+            try:
+                response = self.sqs_client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+            except Exception as e:
+                logger.error(f"Failed to send message batch to {queue_url}. Error: {str(e)}")
+                failures.update({key: str(e) for key in keys.values()})
+                continue
+            for failed in response.get("Failed", []):
+                failures[keys[failed["Id"]]] = f"{failed.get('Code')}: {failed.get('Message', '')}"
+            logger.info(f"Sent {len(response.get('Successful', []))}/{len(entries)} messages to {queue_url}")
+        return failures
+
+    @staticmethod
+    def _chunks(encoded: List[Tuple[str, str]]):
+        chunk, size = [], 0
+        for key, body in encoded:
+            body_size = len(body.encode("utf-8"))
+            if chunk and (len(chunk) == MAX_BATCH_ENTRIES or size + body_size > MAX_BATCH_BYTES):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append((key, body))
+            size += body_size
+        if chunk:
+            yield chunk
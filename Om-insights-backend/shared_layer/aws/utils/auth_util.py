@@ -1,8 +1,17 @@
 """Authentication utilities for Om Insights."""
+import threading
+
+import boto3
+from requests_aws4auth import AWS4Auth
+
 from shared_layer.logging.logger import Logger
 
 logger = Logger()
 
+# SigV4 signers per (region, service), built on first use
+_sigv4_auth = {}
+_sigv4_lock = threading.Lock()
+
 class AuthContext:
     """
     Authentication context for Om Insights.
@@ -82,4 +91,28 @@ def get_auth_context(event):
     except Exception as e:
         logger.error(f"Error extracting auth context: {str(e)}", exc_info=True)
         # Return a default auth context in case of errors
-        return AuthContext(user_id='anonymous')
\ No newline at end of file
+        return AuthContext(user_id='anonymous')
+
+
+def get_sigv4_auth(region, service):
+    """
+    Get a cached SigV4 signer for OpenSearch requests.
+
+    The signer holds the session's refreshable credentials instead of a frozen
+    copy, so it stays valid after the Lambda role credentials rotate.
+
+    :param region: AWS region of the endpoint
+    :param service: Signing service name ("es" or "aoss")
+    :return: AWS4Auth instance
+    """
+    key = (region, service)
+    if key not in _sigv4_auth:
+        with _sigv4_lock:
+            if key not in _sigv4_auth:
+                credentials = boto3.Session().get_credentials()
+                _sigv4_auth[key] = AWS4Auth(
+                    region=region,
+                    service=service,
+                    refreshable_credentials=credentials
+                )
+    return _sigv4_auth[key]
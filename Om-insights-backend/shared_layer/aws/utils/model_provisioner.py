@@ -0,0 +1,262 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from shared_layer.exceptions.error_handler import OmInsightsError
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+READY_MARKER = ".complete"
+LOCK_POLL_SECONDS = 0.5
+DEFAULT_LOCK_TIMEOUT_SECONDS = 600
+STALE_TMP_SECONDS = 3600
+
+# ✅ Warm handle: model paths already verified by this execution environment
+_ready_paths = {}
+_ready_lock = threading.Lock()
+
+
+class ModelProvisionError(OmInsightsError):
+    """Raised when a model archive cannot be downloaded, verified or extracted."""
+
+
+class ModelProvisioner:
+    """
+    Provisions a model archive from S3 onto a shared file system (EFS) exactly once per version.
+
+    Layout under `base_dir`:
+        <model_name>/<version>/        extracted model, published by an atomic rename
+        <model_name>/<version>/.complete  manifest of the published version
+        <model_name>/current          version pointer, replaced atomically
+        .<model_name>.lock            advisory lock held by the single downloader
+
+    The version comes from an optional JSON manifest next to the archive
+    (`{"version": ..., "sha256": ...}`); without one the archive ETag is used.
+    Concurrent cold starts block on the lock, and whoever gets it second finds
+    the version already published and returns without downloading.
+    """
+
+    def __init__(self, bucket: str, key: str, base_dir: str, model_name: str,
+                 manifest_key: Optional[str] = None, s3_client=None,
+                 lock_timeout_seconds: float = DEFAULT_LOCK_TIMEOUT_SECONDS):
+        self.bucket = bucket
+        self.key = key
+        self.base_dir = base_dir
+        self.model_name = model_name
+        self.manifest_key = manifest_key
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._s3_client = s3_client
+
+    @property
+    def s3_client(self):
+        if self._s3_client is None:
+            self._s3_client = boto3.client("s3")
+        return self._s3_client
+
+    @property
+    def model_root(self) -> str:
+        return os.path.join(self.base_dir, self.model_name)
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.base_dir, f".{self.model_name}.lock")
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.model_root, version)
+
+    def is_ready(self, version: str) -> bool:
+        return os.path.isfile(os.path.join(self.version_dir(version), READY_MARKER))
+
+    def ensure_ready(self) -> str:
+        """
+        Returns the local path of the current model version, downloading it first if needed.
+
+        Raises:
+            ModelProvisionError: If no usable version can be provisioned.
+        """
+        memo_key = (self.bucket, self.key, self.base_dir)
+        with _ready_lock:
+            if memo_key in _ready_paths:
+                return _ready_paths[memo_key]
+
+            manifest = self._resolve_manifest()
+            version = manifest["version"]
+            path = self.version_dir(version)
+
+            if not self.is_ready(version):
+                self._provision(manifest)
+            else:
+                logger.info(f"✅ Model {self.model_name}@{version} already provisioned at {path}")
+
+            _ready_paths[memo_key] = path
+            return path
+
+    # ------------------------------------------------------------------
+    # Version resolution
+    # ------------------------------------------------------------------
+    def _resolve_manifest(self) -> dict:
+        try:
+            if self.manifest_key:
+                try:
+                    body = self.s3_client.get_object(Bucket=self.bucket, Key=self.manifest_key)["Body"].read()
+                    manifest = json.loads(body)
+                    if manifest.get("version"):
+                        return manifest
+                    logger.warning(f"⚠️ Manifest s3://{self.bucket}/{self.manifest_key} has no version. Using ETag.")
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                        raise
+                    logger.warning(f"⚠️ No manifest at s3://{self.bucket}/{self.manifest_key}. Using ETag.")
+
+            head = self.s3_client.head_object(Bucket=self.bucket, Key=self.key)
+            return {"version": head["ETag"].strip('"').replace("-", "_"), "sha256": None}
+
+        except ClientError as e:
+            # S3 unreachable: fall back to whatever version was published last.
+            current = self._read_current_version()
+            if current and self.is_ready(current):
+                logger.warning(f"⚠️ Could not resolve model version from S3 ({e}). Using published {current}.")
+                return {"version": current, "sha256": None}
+            raise ModelProvisionError(f"❌ Cannot resolve model version for {self.model_name}: {e}") from e
+
+    def _read_current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.model_root, "current")) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------
+    # Provisioning (single writer)
+    # ------------------------------------------------------------------
+    def _provision(self, manifest: dict) -> None:
+        version = manifest["version"]
+        os.makedirs(self.model_root, exist_ok=True)
+
+        with open(self.lock_path, "a+") as lock_file:
+            self._acquire_lock(lock_file)
+            try:
+                # Another Lambda may have published it while we were waiting.
+                if self.is_ready(version):
+                    logger.info(f"✅ Model {self.model_name}@{version} was provisioned by another instance")
+                    return
+                self._cleanup_stale_tmp()
+                self._download_and_publish(manifest)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire_lock(self, lock_file) -> None:
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        waited = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if waited:
+                    logger.info(f"🔓 Acquired model lock {self.lock_path}")
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise ModelProvisionError(f"❌ Timed out waiting for model lock {self.lock_path}")
+                if not waited:
+                    logger.info(f"⏳ Waiting for another instance to provision {self.model_name}...")
+                    waited = True
+                time.sleep(LOCK_POLL_SECONDS)
+
+    def _download_and_publish(self, manifest: dict) -> None:
+        version = manifest["version"]
+        token = uuid.uuid4().hex
+        tmp_archive = os.path.join("/tmp", f"{self.model_name}-{token}.tar.gz")
+        staging_dir = os.path.join(self.model_root, f".tmp-{token}")
+
+        try:
+            logger.info(f"⬇️ Downloading model from s3://{self.bucket}/{self.key} ({version})")
+            self.s3_client.download_file(self.bucket, self.key, tmp_archive)
+            logger.info("✅ Download complete")
+
+            digest = self._sha256(tmp_archive)
+            expected = manifest.get("sha256")
+            if expected and expected.lower() != digest:
+                raise ModelProvisionError(
+                    f"❌ Checksum mismatch for {self.key}: expected {expected}, got {digest}"
+                )
+
+            logger.info(f"📦 Extracting model into staging dir {staging_dir}")
+            os.makedirs(staging_dir)
+            with tarfile.open(tmp_archive, "r:gz") as tar:
+                self._safe_extract(tar, staging_dir)
+
+            model_dir = self._find_model_dir(staging_dir)
+            with open(os.path.join(model_dir, READY_MARKER), "w") as f:
+                json.dump({"version": version, "sha256": digest, "source": f"s3://{self.bucket}/{self.key}"}, f)
+
+            # ✅ Publish: the version directory appears complete or not at all
+            os.rename(model_dir, self.version_dir(version))
+            self._write_current_version(version)
+            logger.info(f"✅ Model {self.model_name}@{version} published at {self.version_dir(version)}")
+
+        except ClientError as e:
+            raise ModelProvisionError(f"❌ S3 download error: {e}") from e
+        except tarfile.TarError as e:
+            raise ModelProvisionError(f"❌ TAR extraction error: {e}") from e
+        finally:
+            if os.path.exists(tmp_archive):
+                os.remove(tmp_archive)
+            if os.path.exists(staging_dir):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            logger.info("🧹 Cleaned up temporary model files")
+
+    def _write_current_version(self, version: str) -> None:
+        pointer = os.path.join(self.model_root, "current")
+        tmp_pointer = f"{pointer}.{uuid.uuid4().hex}"
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+        os.replace(tmp_pointer, pointer)
+
+    def _cleanup_stale_tmp(self) -> None:
+        """Removes staging dirs left behind by instances that died mid-extraction."""
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for name in os.listdir(self.model_root):
+            path = os.path.join(self.model_root, name)
+            if name.startswith(".tmp-") and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.info(f"🗑️ Removed stale staging dir: {path}")
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _safe_extract(tar: tarfile.TarFile, target_dir: str) -> None:
+        """Extracts the archive, rejecting members that would land outside `target_dir`."""
+        root = os.path.realpath(target_dir)
+        for member in tar.getmembers():
+            if member.issym() or member.islnk() or member.isdev():
+                raise ModelProvisionError(f"❌ Refusing to extract link/device member: {member.name}")
+            destination = os.path.realpath(os.path.join(root, member.name))
+            if os.path.commonpath([root, destination]) != root:
+                raise ModelProvisionError(f"❌ Refusing to extract member outside target: {member.name}")
+        tar.extractall(path=root)
+
+    @staticmethod
+    def _find_model_dir(staging_dir: str) -> str:
+        """Returns the directory holding `config.cfg` (archives usually wrap it in a top-level folder)."""
+        for root, dirs, files in os.walk(staging_dir):
+            if "config.cfg" in files:
+                return root
+        raise ModelProvisionError("❌ Extracted archive does not contain a config.cfg")
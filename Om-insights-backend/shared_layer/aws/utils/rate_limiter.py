@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Dict, List
+
+# ✅ Constants
+DEFAULT_RATE = 10.0            # requests per second
+DEFAULT_MIN_RATE = 1.0
+DEFAULT_MAX_RATE = 50.0
+DEFAULT_INCREASE_STEP = 0.5    # additive increase per successful call
+DEFAULT_DECREASE_FACTOR = 0.5  # multiplicative decrease per throttle
+MAX_LATENCY_SAMPLES = 10000
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket whose refill rate adapts to throttling (AIMD).
+
+    Every successful call nudges the rate up by `increase_step`; every
+    throttling response halves it (by default), so the callers settle just
+    below the account's real quota instead of hammering it.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = None,
+                 min_rate: float = DEFAULT_MIN_RATE, max_rate: float = DEFAULT_MAX_RATE,
+                 increase_step: float = DEFAULT_INCREASE_STEP,
+                 decrease_factor: float = DEFAULT_DECREASE_FACTOR):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst or max(1.0, self.rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the time waited in seconds."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            # Drop any saved-up burst so the slowdown takes effect immediately.
+            self._tokens = min(self._tokens, 0.0)
+
+
+class LatencyStats:
+    """Thread-safe per-call latency and outcome counters."""
+
+    def __init__(self):
+        self._samples: List[float] = []
+        self.calls = 0
+        self.throttles = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float) -> None:
+        with self._lock:
+            self.calls += 1
+            if len(self._samples) < MAX_LATENCY_SAMPLES:
+                self._samples.append(latency_ms)
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples = []
+            self.calls = self.throttles = self.errors = 0
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples)
+            calls, throttles, errors = self.calls, self.throttles, self.errors
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+        return {
+            "calls": calls,
+            "throttles": throttles,
+            "errors": errors,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(samples[-1], 1) if samples else 0.0,
+            "avg_ms": round(sum(samples) / len(samples), 1) if samples else 0.0
+        }
@@ -0,0 +1,39 @@
+import math
+import threading
+
+# ✅ Constants
+DEFAULT_CHARS_PER_TOKEN = 3.5   # conservative start; English text is usually ~4-4.5 for Titan
+MIN_CHARS_PER_TOKEN = 2.0
+MAX_CHARS_PER_TOKEN = 8.0
+SMOOTHING = 0.1
+
+
+class TokenEstimator:
+    """
+    Estimates model tokens from text length, calibrated against the model's own counts.
+
+    Titan returns `inputTextTokenCount` with every embedding; feeding those
+    back through `observe()` keeps the chars-per-token ratio close to the real
+    tokenizer without shipping it. The ratio is an exponential moving average,
+    so it follows the mix of content a function instance actually sees.
+    """
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        return max(1, math.ceil(len(text) / self.chars_per_token)) if text else 0
+
+    def observe(self, text_length: int, token_count: int) -> None:
+        if not text_length or not token_count:
+            return
+        ratio = min(MAX_CHARS_PER_TOKEN, max(MIN_CHARS_PER_TOKEN, text_length / token_count))
+        with self._lock:
+            self.chars_per_token += SMOOTHING * (ratio - self.chars_per_token)
+            self.observations += 1
+
+
+# ✅ Process-wide estimator for Titan text embeddings (calibration survives warm invocations)
+titan_token_estimator = TokenEstimator()
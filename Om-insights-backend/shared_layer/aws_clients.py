@@ -1,4 +1,5 @@
 import boto3
+from botocore.config import Config
 from shared_layer.aws.adapters.dynamodb_adapter import DynamoDBAdapter
 from shared_layer.logging.logger import Logger
 
@@ -17,6 +18,9 @@ class AWSClientProvider:
         self._dynamodb_client = None
         self._aoss_client = None
         self._bedrock_client = None
+        self._sqs_client = None
+        self._ssm_client = None
+        self._batch_client = None
 
         # Repositories
         self._dynamo_repository = None
@@ -38,15 +42,21 @@ class AWSClientProvider:
 
     @property
     def sqs_client(self):
-        return self._build_client("sqs")
+        if not self._sqs_client:
+            self._sqs_client = self._build_client("sqs")
+        return self._sqs_client
 
     @property
     def ssm_client(self):
-        return self._build_client("ssm")
+        if not self._ssm_client:
+            self._ssm_client = self._build_client("ssm")
+        return self._ssm_client
 
     @property
     def batch_client(self):
-        return self._build_client("batch")
+        if not self._batch_client:
+            self._batch_client = self._build_client("batch")
+        return self._batch_client
 
     @property
     def aoss_client(self):
@@ -57,7 +67,13 @@ class AWSClientProvider:
     @property
     def bedrock_client(self):
         if not self._bedrock_client:
-            self._bedrock_client = boto3.client("bedrock-runtime", region_name=self._aws_region)
+            # ✅ Room for concurrent embedding calls; BedrockEmbeddingAdapter retries throttles (feeding its
+            # rate limiter), 5xx / model timeouts and connection errors itself, so botocore does not retry
+            self._bedrock_client = boto3.client(
+                "bedrock-runtime",
+                region_name=self._aws_region,
+                config=Config(max_pool_connections=32, retries={"mode": "standard", "max_attempts": 1})
+            )
         return self._bedrock_client
 
     @property
@@ -73,4 +89,7 @@ class AWSClientProvider:
         self._s3_client = None
         self._dynamodb_client = None
         self._aoss_client = None
+        self._sqs_client = None
+        self._ssm_client = None
+        self._batch_client = None
         self._dynamo_repository = None
@@ -0,0 +1,150 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from shared_layer.cache.ttl_cache import TTLCache
+from shared_layer.logging.logger import Logger
+from shared_layer.model.embedding import Embedding
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_MEMORY_ENTRIES = 4096
+DEFAULT_MEMORY_TTL_SECONDS = 6 * 3600
+DEFAULT_TTL_DAYS = 90
+BATCH_GET_LIMIT = 100     # DynamoDB BatchGetItem limit
+BATCH_WRITE_LIMIT = 25    # DynamoDB BatchWriteItem limit
+MAX_UNPROCESSED_RETRIES = 3
+
+# ✅ Process-wide memory tier (kept across warm invocations)
+memory_tier = TTLCache(ttl_seconds=DEFAULT_MEMORY_TTL_SECONDS, max_size=DEFAULT_MEMORY_ENTRIES)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: in-process LRU in front of a DynamoDB table.
+
+    Entries are keyed by model id + sha256 of the chunk text, so identical text
+    (re-uploads, retries, boilerplate) is embedded once per model. The memory
+    tier holds `Embedding` objects, DynamoDB their compact `to_bytes` form. A
+    failing DynamoDB tier only turns lookups into misses; it never fails the
+    embedding step.
+    """
+
+    def __init__(self, dynamodb_client=None, table_name: Optional[str] = None,
+                 ttl_days: int = DEFAULT_TTL_DAYS):
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+        self.ttl_days = ttl_days or DEFAULT_TTL_DAYS
+        self.memory_hits = 0
+        self.table_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def table_enabled(self) -> bool:
+        return bool(self.dynamodb and self.table_name)
+
+    @staticmethod
+    def cache_key(model_id: str, text_hash: str) -> str:
+        return f"{model_id}#{text_hash}"
+
+    def get_many(self, model_id: str, text_hashes: Iterable[str]) -> Dict[str, Embedding]:
+        """Returns {text_hash: embedding} for every hash found in either tier."""
+        found = {}
+        missing = []
+        for text_hash in dict.fromkeys(text_hashes):
+            embedding = memory_tier.get(self.cache_key(model_id, text_hash))
+            if embedding is not None:
+                found[text_hash] = embedding
+            else:
+                missing.append(text_hash)
+        memory_hits = len(found)
+
+        if missing and self.table_enabled:
+            for text_hash, payload in self._batch_get(model_id, missing).items():
+                try:
+                    embedding = Embedding.from_bytes(payload)
+                except ValueError:
+                    continue  # Unreadable entry: treat as a miss and overwrite it
+                memory_tier.set(self.cache_key(model_id, text_hash), embedding)
+                found[text_hash] = embedding
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.table_hits += len(found) - memory_hits
+            self.misses += len(missing) - (len(found) - memory_hits)
+        return found
+
+    def put_many(self, model_id: str, embeddings: Dict[str, Embedding]) -> None:
+        """Stores freshly computed embeddings in both tiers."""
+        if not embeddings:
+            return
+        for text_hash, embedding in embeddings.items():
+            memory_tier.set(self.cache_key(model_id, text_hash), embedding)
+        if self.table_enabled:
+            self._batch_put(model_id, embeddings)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.table_hits + self.misses
+            hits = self.memory_hits + self.table_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "table_hits": self.table_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+            }
+
+    def _batch_get(self, model_id: str, text_hashes: List[str]) -> Dict[str, bytes]:
+        results = {}
+        prefix_len = len(model_id) + 1
+        for i in range(0, len(text_hashes), BATCH_GET_LIMIT):
+            request = {
+                self.table_name: {
+                    "Keys": [{"cache_key": {"S": self.cache_key(model_id, h)}}
+                             for h in text_hashes[i:i + BATCH_GET_LIMIT]],
+                    "ProjectionExpression": "cache_key, embedding"
+                }
+            }
+            try:
+                for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get("Responses", {}).get(self.table_name, []):
+                        results[item["cache_key"]["S"][prefix_len:]] = item["embedding"]["B"]
+                    request = response.get("UnprocessedKeys") or {}
+                    if not request:
+                        break
+                    time.sleep(0.05 * (2 ** attempt))
+            except (ClientError, BotoCoreError) as e:
+                logger.warning(f"⚠️ Embedding cache lookup failed, treating as misses: {e}")
+        return results
+
+    def _batch_put(self, model_id: str, embeddings: Dict[str, Embedding]) -> None:
+        expires_at = str(int(time.time()) + self.ttl_days * 86400)
+        requests = [
+            {"PutRequest": {"Item": {
+                "cache_key": {"S": self.cache_key(model_id, text_hash)},
+                "model_id": {"S": model_id},
+                "embedding": {"B": embedding.to_bytes()},
+                "dim": {"N": str(len(embedding))},
+                "precision": {"S": embedding.precision.value},
+                "ttl": {"N": expires_at}
+            }}}
+            for text_hash, embedding in embeddings.items()
+        ]
+        for i in range(0, len(requests), BATCH_WRITE_LIMIT):
+            request = {self.table_name: requests[i:i + BATCH_WRITE_LIMIT]}
+            try:
+                for attempt in range(MAX_UNPROCESSED_RETRIES + 1):
+                    response = self.dynamodb.batch_write_item(RequestItems=request)
+                    request = response.get("UnprocessedItems") or {}
+                    if not request:
+                        break
+                    time.sleep(0.05 * (2 ** attempt))
+                if request:
+                    logger.warning(f"⚠️ {len(request.get(self.table_name, []))} embeddings not written to cache.")
+            except (ClientError, BotoCoreError) as e:
+                logger.warning(f"⚠️ Embedding cache write failed: {e}")
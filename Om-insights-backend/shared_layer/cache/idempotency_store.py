@@ -0,0 +1,128 @@
+import hashlib
+import os
+import time
+from typing import Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+DEFAULT_IN_PROGRESS_SECONDS = 290   # worker Lambda timeout (280s) + margin, below the queue visibility timeout (300s)
+CLAIM_MARGIN_SECONDS = 10           # a claim outlives its Lambda by this much, then a redelivery may take it
+LAMBDA_TIMEOUT_ENV = "LAMBDA_TIMEOUT_SECONDS"  # set by the CDK stacks from each function's timeout
+DEFAULT_TTL_DAYS = 7                # completed records are kept this long (S3 / SQS redelivery window)
+
+# begin() outcomes
+STARTED = "STARTED"
+DUPLICATE_COMPLETED = "DUPLICATE_COMPLETED"
+DUPLICATE_IN_PROGRESS = "DUPLICATE_IN_PROGRESS"
+
+
+class IdempotencyStore:
+    """
+    Claims units of work (an S3 object version, a shard) in a DynamoDB table.
+
+    `begin()` is one conditional PutItem: it creates an IN_PROGRESS claim if
+    no claim exists (or a previous attempt's claim has expired) and otherwise
+    reports the existing claim's state from the same round trip. `complete()`
+    marks the work done; `release()` removes a failed attempt's claim so a
+    redelivery can retry it. Records expire via the table's `ttl`. A
+    failing table never blocks processing: `begin()` then returns STARTED.
+
+    A claim left by an attempt that was killed (Lambda timeout) lasts just
+    longer than the consuming Lambda's timeout, by default derived from
+    LAMBDA_TIMEOUT_SECONDS. That is shorter than the queue's visibility
+    timeout, so the redelivery can take the claim over instead of seeing
+    DUPLICATE_IN_PROGRESS and ending up in the DLQ unprocessed.
+    """
+
+    def __init__(self, dynamodb_client=None, table_name: Optional[str] = None,
+                 in_progress_seconds: Optional[int] = None, ttl_days: int = DEFAULT_TTL_DAYS):
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+        self.in_progress_seconds = in_progress_seconds or self.claim_seconds_for_lambda()
+        self.ttl_days = ttl_days or DEFAULT_TTL_DAYS
+
+    @staticmethod
+    def claim_seconds_for_lambda(timeout_seconds: Optional[int] = None) -> int:
+        """Claim lifetime for a consumer with this Lambda timeout (default: this function's, from the env)."""
+        timeout_seconds = timeout_seconds or int(os.environ.get(LAMBDA_TIMEOUT_ENV, 0))
+        return timeout_seconds + CLAIM_MARGIN_SECONDS if timeout_seconds else DEFAULT_IN_PROGRESS_SECONDS
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.dynamodb and self.table_name)
+
+    @staticmethod
+    def key(scope: str, bucket: str, s3_key: str, etag: Optional[str], sequencer: Optional[str],
+            part: Optional[str] = None) -> Optional[str]:
+        """
+        `<scope>#sha256(bucket/key/eTag/sequencer[/part])`; the same upload event always maps to one key.
+        None when the event carries neither eTag nor sequencer (nothing safe to deduplicate on).
+        """
+        if etag is None and sequencer is None:
+            return None
+        identity = "/".join(str(value) for value in (bucket, s3_key, etag, sequencer, part) if value is not None)
+        return f"{scope}#{hashlib.sha256(identity.encode('utf-8')).hexdigest()}"
+
+    def begin(self, idempotency_key: Optional[str]) -> str:
+        if not self.enabled or not idempotency_key:
+            return STARTED
+        now = int(time.time())
+        try:
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item={
+                    "idempotency_key": {"S": idempotency_key},
+                    "status": {"S": IN_PROGRESS},
+                    "expires_at": {"N": str(now + self.in_progress_seconds)},
+                    "ttl": {"N": str(now + self.ttl_days * 86400)}
+                },
+                ConditionExpression="attribute_not_exists(idempotency_key) OR (#s = :in_progress AND expires_at < :now)",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":in_progress": {"S": IN_PROGRESS}, ":now": {"N": str(now)}},
+                ReturnValuesOnConditionCheckFailure="ALL_OLD"
+            )
+            return STARTED
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logger.warning(f"⚠️ Idempotency check failed, processing anyway: {e}")
+                return STARTED
+            status = e.response.get("Item", {}).get("status", {}).get("S")
+            return DUPLICATE_COMPLETED if status == COMPLETED else DUPLICATE_IN_PROGRESS
+        except BotoCoreError as e:
+            logger.warning(f"⚠️ Idempotency check failed, processing anyway: {e}")
+            return STARTED
+
+    def complete(self, idempotency_key: Optional[str]) -> None:
+        if not self.enabled or not idempotency_key:
+            return
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={"idempotency_key": {"S": idempotency_key}},
+                UpdateExpression="SET #s = :completed REMOVE expires_at",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":completed": {"S": COMPLETED}}
+            )
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"⚠️ Could not mark {idempotency_key} completed: {e}")
+
+    def release(self, idempotency_key: Optional[str]) -> None:
+        if not self.enabled or not idempotency_key:
+            return
+        try:
+            self.dynamodb.delete_item(
+                TableName=self.table_name,
+                Key={"idempotency_key": {"S": idempotency_key}},
+                ConditionExpression="#s = :in_progress",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":in_progress": {"S": IN_PROGRESS}}
+            )
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"⚠️ Could not release {idempotency_key}: {e}")
@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_TTL_SECONDS = 300          # serve from memory for this long
+DEFAULT_MAX_STALE_SECONDS = 3600   # past the TTL, serve the old value while refreshing in the background
+FAILURE_BACKOFF_SECONDS = 30       # after a failed fetch, don't retry SSM for this long
+GET_PARAMETERS_LIMIT = 10          # SSM GetParameters limit
+
+_MISSING = object()
+
+# ✅ Process-wide parameter values (kept across warm invocations): name -> (value, fetched_at)
+_values: Dict[str, Tuple[Any, float]] = {}
+_failed_at: Dict[str, float] = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+
+class ParameterCache:
+    """
+    SSM Parameter Store values held in memory, refreshed in the background.
+
+    A value younger than `ttl_seconds` is served directly. An older one is
+    still served (stale-while-revalidate) while one background thread per
+    parameter fetches the new value, so callers never wait on SSM once a
+    value is known. Only a missing value, or one older than
+    `max_stale_seconds`, is fetched inline. If SSM fails, the last known
+    value (or the caller's default) is used and SSM is left alone for a
+    short backoff, which keeps upload bursts away from SSM rate limits.
+    """
+
+    def __init__(self, ssm_client, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS):
+        self.ssm_client = ssm_client
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max(max_stale_seconds, ttl_seconds)
+
+    def get(self, name: str, default: Any = None, decrypt: bool = False) -> Any:
+        now = time.monotonic()
+        with _lock:
+            value, fetched_at = _values.get(name, (_MISSING, 0.0))
+            age = now - fetched_at
+            in_backoff = now - _failed_at.get(name, -FAILURE_BACKOFF_SECONDS) < FAILURE_BACKOFF_SECONDS
+            refresh_in_background = (value is not _MISSING and self.ttl_seconds <= age < self.max_stale_seconds
+                                     and not in_backoff and name not in _refreshing)
+            if refresh_in_background:
+                _refreshing.add(name)
+
+        if value is not _MISSING and (age < self.ttl_seconds or in_backoff):
+            return value
+        if refresh_in_background:
+            threading.Thread(target=self._refresh, args=(name, decrypt), daemon=True).start()
+            return value
+        if value is not _MISSING and name in _refreshing:
+            return value  # A refresh is already under way
+        if in_backoff:
+            return default
+
+        fetched = self._fetch(name, decrypt)
+        if fetched is _MISSING:
+            return default if value is _MISSING else value
+        return fetched
+
+    def get_int(self, name: str, default: int) -> int:
+        return self._cast(name, int, default)
+
+    def get_float(self, name: str, default: float) -> float:
+        return self._cast(name, float, default)
+
+    def _cast(self, name: str, cast: Callable, default):
+        value = self.get(name)
+        try:
+            return cast(value) if value is not None else default
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ SSM parameter {name}={value!r} is not a valid {cast.__name__}; using {default}")
+            return default
+
+    def prefetch(self, names: Iterable[str], decrypt: bool = False) -> None:
+        """Loads several parameters with GetParameters (10 per call), e.g. during the init phase."""
+        names = [name for name in dict.fromkeys(names) if name not in _values]
+        for i in range(0, len(names), GET_PARAMETERS_LIMIT):
+            chunk = names[i:i + GET_PARAMETERS_LIMIT]
+            try:
+                response = self.ssm_client.get_parameters(Names=chunk, WithDecryption=decrypt)
+            except (ClientError, BotoCoreError) as e:
+                logger.warning(f"⚠️ Failed to prefetch SSM parameters {chunk}: {e}")
+                continue
+            fetched_at = time.monotonic()
+            with _lock:
+                for parameter in response.get("Parameters", []):
+                    _values[parameter["Name"]] = (parameter["Value"], fetched_at)
+            for name in response.get("InvalidParameters", []):
+                logger.warning(f"⚠️ SSM parameter {name} does not exist")
+
+    def _refresh(self, name: str, decrypt: bool) -> None:
+        try:
+            self._fetch(name, decrypt)
+        finally:
+            with _lock:
+                _refreshing.discard(name)
+
+    def _fetch(self, name: str, decrypt: bool) -> Any:
+        try:
+            response = self.ssm_client.get_parameter(Name=name, WithDecryption=decrypt)
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"⚠️ Failed to fetch SSM parameter {name}: {e}")
+            with _lock:
+                _failed_at[name] = time.monotonic()
+            return _MISSING
+        value = response["Parameter"]["Value"]
+        with _lock:
+            _values[name] = (value, time.monotonic())
+            _failed_at.pop(name, None)
+        return value
+
+    @staticmethod
+    def clear() -> None:
+        with _lock:
+            _values.clear()
+            _failed_at.clear()
+            _refreshing.clear()
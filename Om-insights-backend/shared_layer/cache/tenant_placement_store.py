@@ -0,0 +1,124 @@
+import time
+from typing import List, Optional
+
+from botocore.exceptions import ClientError
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Tenant placement states (a missing record means SHARED)
+SHARED = "SHARED"
+MIGRATING = "MIGRATING"    # writers use the dedicated index, readers search both
+DEDICATED = "DEDICATED"    # readers and writers use the dedicated index
+
+
+class TenantPlacementStore:
+    """
+    Where each tenant's search documents live, shared by every Lambda instance.
+
+    One DynamoDB item per `<base index>#<business_id>` holds the tenant's
+    `state`, the dedicated `index`, and a `version` bumped on every change.
+    `transition()` is a conditional update on (state, version), so
+    concurrent promoters can repeat the idempotent index work, but only one
+    moves the tenant to the next state. A migrating tenant's item also
+    holds the id of its background copy task. Unlike the per-process caches, a
+    read here is never stale, which lets writers fence on it.
+    """
+
+    def __init__(self, dynamodb_client=None, table_name: Optional[str] = None):
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.dynamodb and self.table_name)
+
+    @staticmethod
+    def key(base_index: str, business_id: str) -> str:
+        return f"{base_index}#{business_id}"
+
+    def get(self, base_index: str, business_id: str) -> dict:
+        """The tenant's placement; `{"state": SHARED, "version": 0}` when it has never been promoted."""
+        if not self.enabled:
+            return {"state": SHARED, "version": 0}
+        response = self.dynamodb.get_item(
+            TableName=self.table_name,
+            Key={"tenant_key": {"S": self.key(base_index, business_id)}},
+            ConsistentRead=True
+        )
+        item = response.get("Item")
+        if not item:
+            return {"state": SHARED, "version": 0}
+        return {
+            "state": item["state"]["S"],
+            "version": int(item["version"]["N"]),
+            "index": item.get("index", {}).get("S"),
+            "changed_at": int(item.get("changed_at", {}).get("N", "0")),
+            "shared_copy_deleted": item.get("shared_copy_deleted", {}).get("BOOL", False),
+            "copy_task": item.get("copy_task", {}).get("S")
+        }
+
+    def in_progress(self, base_index: str) -> List[str]:
+        """Business ids whose promotion has not finished yet (MIGRATING, or shared copy not yet deleted)."""
+        if not self.enabled:
+            return []
+        business_ids, start_key = [], None
+        while True:
+            response = self.dynamodb.scan(
+                TableName=self.table_name,
+                FilterExpression="begins_with(tenant_key, :prefix) AND (#s = :migrating OR shared_copy_deleted = :no)",
+                ExpressionAttributeNames={"#s": "state"},
+                ExpressionAttributeValues={":prefix": {"S": f"{base_index}#"}, ":migrating": {"S": MIGRATING},
+                                           ":no": {"BOOL": False}},
+                **({"ExclusiveStartKey": start_key} if start_key else {})
+            )
+            business_ids += [item["tenant_key"]["S"].split("#", 1)[1] for item in response.get("Items", [])]
+            start_key = response.get("LastEvaluatedKey")
+            if not start_key:
+                return business_ids
+
+    def transition(self, base_index: str, business_id: str, expected_version: int, state: str,
+                   index: Optional[str] = None, shared_copy_deleted: bool = False,
+                   copy_task: Optional[str] = None) -> bool:
+        """
+        Moves the tenant to `state` if nobody changed it since `expected_version`; False if someone did.
+        `copy_task` records the background reindex of a migrating tenant (cleared when not given).
+        """
+        if not self.enabled:
+            return False
+        values = {
+            ":state": {"S": state},
+            ":version": {"N": str(expected_version + 1)},
+            ":changed_at": {"N": str(int(time.time()))},
+            ":deleted": {"BOOL": shared_copy_deleted}
+        }
+        update = "SET #s = :state, #v = :version, changed_at = :changed_at, shared_copy_deleted = :deleted"
+        if index:
+            values[":index"] = {"S": index}
+            update += ", #i = :index"
+        if copy_task:
+            values[":task"] = {"S": copy_task}
+            update += ", copy_task = :task"
+        else:
+            update += " REMOVE copy_task"
+        if expected_version == 0:
+            condition = "attribute_not_exists(tenant_key)"
+        else:
+            condition = "#v = :expected"
+            values[":expected"] = {"N": str(expected_version)}
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={"tenant_key": {"S": self.key(base_index, business_id)}},
+                UpdateExpression=update,
+                ConditionExpression=condition,
+                ExpressionAttributeNames={"#s": "state", "#v": "version", **({"#i": "index"} if index else {})},
+                ExpressionAttributeValues=values
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.info(f"ℹ️ Placement of {business_id} changed concurrently; leaving it to the other promoter")
+                return False
+            raise
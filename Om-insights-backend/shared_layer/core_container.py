@@ -3,6 +3,7 @@ from dependency_injector import containers, providers
 from shared_layer.logging.logger import Logger
 from shared_layer.aws.adapters.sqs_adapter import SQSAdapter
 from shared_layer.aws_clients import AWSClientProvider
+from shared_layer.cache.parameter_cache import ParameterCache
 from shared_layer.aws.adapters.dynamodb_adapter import DynamoDBAdapter# 🔹 NEW: Dedicated AWS Clients Module
 
 class CoreContainer(containers.DeclarativeContainer):
@@ -20,6 +21,12 @@ class CoreContainer(containers.DeclarativeContainer):
     # ✅ AWS Clients (Managed via `AWSClientProvider`)
     aws_clients = providers.Singleton(AWSClientProvider, config=common_config)
 
+    # ✅ SSM parameters served from memory (values are process-wide, refreshed in the background)
+    parameter_cache = providers.Singleton(
+        ParameterCache,
+        ssm_client=aws_clients.provided.ssm_client
+    )
+
     # ✅ SQS Adapter (For async messaging)
     sqs_adapter = providers.Singleton(
         SQSAdapter,
@@ -0,0 +1 @@
+# This file makes the lifecycle directory a Python package
@@ -0,0 +1,72 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Process-wide containers, one per container class (kept across warm invocations)
+_containers: Dict[type, object] = {}
+_lock = threading.Lock()
+
+
+def get_container(container_class, modules: Iterable[str] = (),
+                  on_create: Optional[Callable[[object], None]] = None):
+    """
+    Returns the container for `container_class`, building it once per execution environment.
+
+    The first call instantiates the container, wires `modules`, runs
+    `on_create(container)` (e.g. processor registration) and initialises its
+    resources; resources are shut down when the process exits. Later calls
+    return the same instance, so singleton clients and adapters survive warm
+    invocations.
+    """
+    container = _containers.get(container_class)
+    if container is not None:
+        return container
+
+    with _lock:
+        container = _containers.get(container_class)
+        if container is None:
+            start = time.perf_counter()
+            container = container_class()
+            if modules:
+                container.wire(modules=list(modules))
+            if on_create:
+                on_create(container)
+            container.init_resources()
+            atexit.register(container.shutdown_resources)
+            _containers[container_class] = container
+            logger.info(f"🧩 Built {container_class.__name__} in {round((time.perf_counter() - start) * 1000, 1)} ms")
+    return container
+
+
+@contextmanager
+def request_scope(container, reset: Iterable[str] = (), on_exit: Iterable[Callable[[], object]] = ()):
+    """
+    Scope of one invocation on a long-lived container.
+
+    On exit, each `on_exit` callback runs (flushes, discards of per-invocation
+    buffers) even if another one fails, then the providers named in `reset`
+    are reset so request-specific singletons are rebuilt for the next event.
+    Everything else stays cached.
+    """
+    try:
+        yield container
+    finally:
+        for callback in on_exit:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Request cleanup failed: {e}")
+        for name in reset:
+            getattr(container, name).reset()
+
+
+def reset_containers() -> None:
+    """Forgets all built containers (tests only; resources are not shut down)."""
+    with _lock:
+        _containers.clear()
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_MAX_WORKERS = 4
+
+
+class WarmStartInitializer:
+    """
+    Explicit initialization phase for one Lambda type.
+
+    Each handler module registers only the components its handler needs
+    (models, dictionaries, clients) and calls `run()` once. Independent
+    loaders run in parallel threads, and the per-component timings are logged
+    as a single cold-start report. Later calls to `run()` in the same
+    execution environment return immediately.
+    """
+
+    def __init__(self, lambda_name: str, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.lambda_name = lambda_name
+        self.max_workers = max_workers
+        self._components: List[dict] = []
+        self._timings: Dict[str, dict] = {}
+        self._completed = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], required: bool = True) -> "WarmStartInitializer":
+        """
+        Registers a loader for the initialization phase.
+
+        Args:
+            name: Component name used in the timing report.
+            loader: Zero-argument callable that loads and caches the component.
+            required: If True, a failure is raised from `run()`; otherwise it is only logged
+                      and the component falls back to loading lazily on first use.
+        """
+        self._components.append({"name": name, "loader": loader, "required": required})
+        return self
+
+    @contextmanager
+    def timed(self, name: str):
+        """Times a synchronous step (e.g. container wiring) and adds it to the report."""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            self._timings[name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "status": status}
+
+    @property
+    def completed(self) -> bool:
+        return self._completed
+
+    @property
+    def timings(self) -> Dict[str, dict]:
+        return dict(self._timings)
+
+    def run(self) -> Dict[str, dict]:
+        """Runs all registered loaders once per execution environment and logs the timing report."""
+        with self._lock:
+            if self._completed:
+                return self.timings
+
+            start = time.perf_counter()
+            errors = {}
+            workers = max(1, min(self.max_workers, len(self._components)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warm-start") as executor:
+                futures = {
+                    executor.submit(self._load, component): component for component in self._components
+                }
+                for future, component in futures.items():
+                    error = future.result()
+                    if error is not None:
+                        errors[component["name"]] = (error, component["required"])
+
+            self._completed = True
+            self._log_report(round((time.perf_counter() - start) * 1000, 1))
+
+            required_errors = [error for error, required in errors.values() if required]
+            if required_errors:
+                raise required_errors[0]
+            return self.timings
+
+    def _load(self, component: dict) -> Optional[Exception]:
+        name = component["name"]
+        start = time.perf_counter()
+        try:
+            component["loader"]()
+            self._timings[name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "status": "ok"}
+            return None
+        except Exception as e:
+            self._timings[name] = {"ms": round((time.perf_counter() - start) * 1000, 1), "status": "failed"}
+            logger.error(f"❌ Warm-start component '{name}' failed: {e}")
+            return e
+
+    def _log_report(self, parallel_ms: float) -> None:
+        logger.info({
+            "message": f"🧊 Cold-start report for {self.lambda_name}",
+            "lambda": self.lambda_name,
+            "in_lambda": bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME")),
+            "parallel_phase_ms": parallel_ms,
+            "components": self._timings
+        })
@@ -0,0 +1,151 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_NAMESPACE = "OmInsights/Pipeline"
+UNKNOWN = "unknown"
+# business_id is logged as a property, not a dimension: one metric series per tenant would be unbounded
+DIMENSIONS = ("Stage", "DataType", "Tier")
+
+# ✅ Tags of the message being processed (per thread / task, so concurrent records don't mix)
+_tags: ContextVar[Dict[str, str]] = ContextVar("metric_tags", default={})
+
+
+def namespace() -> str:
+    return os.environ.get("POWERTOOLS_METRICS_NAMESPACE", DEFAULT_NAMESPACE)
+
+
+@contextmanager
+def metric_tags(data_type: Optional[str] = None, business_id: Optional[str] = None, tier: Optional[str] = None,
+                **properties):
+    """Tags every metric emitted inside the block; nested blocks add to (and override) the outer tags."""
+    new_tags = {"data_type": data_type, "business_id": business_id, "tier": tier, **properties}
+    token = _tags.set({**_tags.get(), **{key: value for key, value in new_tags.items() if value is not None}})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def put_metrics(stage: str, values: Dict[str, Tuple[float, str]]) -> None:
+    """
+    Emits `{name: (value, unit)}` for one stage as a CloudWatch Embedded
+    Metric Format log line; CloudWatch extracts the metrics from the log
+    itself, so no PutMetricData call is made.
+    """
+    if not values:
+        return
+    tags = _tags.get()
+    dimensions = {
+        "Stage": stage,
+        "DataType": str(tags.get("data_type") or UNKNOWN).lower(),
+        "Tier": str(tags.get("tier") or UNKNOWN).lower()
+    }
+    properties = {key: value for key, value in tags.items() if key not in ("data_type", "tier")}
+    logger.info(f"📊 {stage}", extra={
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace(),
+                "Dimensions": [list(DIMENSIONS)],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in values.items()]
+            }]
+        },
+        **dimensions,
+        **properties,
+        **{name: round(value, 3) for name, (value, _) in values.items()}
+    })
+
+
+def count(stage: str, name: str, value: float = 1, unit: str = "Count") -> None:
+    """Emits one counter for a stage (e.g. invalid rows, failed items)."""
+    put_metrics(stage, {name: (value, unit)})
+
+
+class Span:
+    """
+    Times one pipeline stage.
+
+    A span can be started and stopped repeatedly and accumulates the time,
+    so work interleaved with other stages (a generator's work between
+    yields, a write loop that also marshals items) is measured on its own.
+    `emit()` reports Duration plus, when rows/bytes were added, the totals
+    and the rows/sec and bytes/sec throughput; p50/p99 come from the
+    Duration statistics in CloudWatch.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.elapsed = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+        self._started = None
+
+    def start(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self) -> "Span":
+        if self._started is not None:
+            self.elapsed += time.perf_counter() - self._started
+            self._started = None
+        return self
+
+    def add(self, rows: int = 0, bytes: int = 0) -> "Span":
+        self.rows += rows
+        self.bytes += bytes
+        return self
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.stop()
+        if exc_type:
+            self.errors += 1
+        return False
+
+    def emit(self) -> None:
+        values = {"Duration": (self.elapsed * 1000, "Milliseconds")}
+        if self.rows:
+            values["Rows"] = (self.rows, "Count")
+            if self.elapsed > 0:
+                values["RowsPerSecond"] = (self.rows / self.elapsed, "Count/Second")
+        if self.bytes:
+            values["Bytes"] = (self.bytes, "Bytes")
+            if self.elapsed > 0:
+                values["BytesPerSecond"] = (self.bytes / self.elapsed, "Bytes/Second")
+        if self.errors:
+            values["Errors"] = (self.errors, "Count")
+        put_metrics(self.stage, values)
+
+
+@contextmanager
+def span(stage: str, rows: int = 0, bytes: int = 0):
+    """Times the block as one stage and emits it on exit (also when it raises)."""
+    stage_span = Span(stage).add(rows, bytes)
+    try:
+        with stage_span:
+            yield stage_span
+    finally:
+        stage_span.emit()
+
+
+def instrument(stage: str):
+    """Decorator form of `span()`: times every call of the function as `stage`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,122 @@
+# shared_layer/model/embedding.py
+
+import base64
+import json
+import struct
+from enum import Enum
+from typing import Iterable, List, Union
+
+import numpy as np
+
+# ✅ Binary layout: magic, precision code, float32 scale, then the raw vector
+_MAGIC = b"EM"
+_HEADER = struct.Struct("<2sBf")
+
+
+class EmbeddingPrecision(str, Enum):
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
+    INT8 = "int8"
+
+
+_PRECISION_CODES = {EmbeddingPrecision.FLOAT32: 1, EmbeddingPrecision.FLOAT16: 2, EmbeddingPrecision.INT8: 3}
+_CODE_PRECISIONS = {code: precision for precision, code in _PRECISION_CODES.items()}
+_NUMPY_DTYPES = {EmbeddingPrecision.FLOAT32: np.float32, EmbeddingPrecision.FLOAT16: np.float16,
+                 EmbeddingPrecision.INT8: np.int8}
+# Significant digits written to JSON: enough to round-trip the stored precision, no more
+_JSON_DIGITS = {EmbeddingPrecision.FLOAT32: 8, EmbeddingPrecision.FLOAT16: 5, EmbeddingPrecision.INT8: 4}
+
+
+class Embedding:
+    """
+    Compact embedding vector held as a NumPy array of the configured precision.
+
+    INT8 uses symmetric scalar quantization (`value ≈ q * scale`, with
+    `scale = max(|v|) / 127`). Conversion to Python floats happens only at the
+    serialization boundary (`to_list`, `to_json`); caches store `to_bytes`.
+    """
+
+    __slots__ = ("data", "precision", "scale")
+
+    def __init__(self, data: np.ndarray, precision: EmbeddingPrecision = EmbeddingPrecision.FLOAT32,
+                 scale: float = 1.0):
+        self.data = data
+        self.precision = EmbeddingPrecision(precision)
+        self.scale = float(scale)
+
+    @classmethod
+    def from_floats(cls, values: Union[Iterable[float], np.ndarray],
+                    precision: Union[EmbeddingPrecision, str] = EmbeddingPrecision.FLOAT32) -> "Embedding":
+        precision = EmbeddingPrecision(precision)
+        vector = np.asarray(values, dtype=np.float32)
+        if precision == EmbeddingPrecision.INT8:
+            peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+            scale = peak / 127.0 if peak > 0 else 1.0
+            quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+            return cls(quantized, precision, scale)
+        return cls(vector.astype(_NUMPY_DTYPES[precision], copy=False), precision)
+
+    def with_precision(self, precision: Union[EmbeddingPrecision, str]) -> "Embedding":
+        precision = EmbeddingPrecision(precision)
+        if precision == self.precision:
+            return self
+        return Embedding.from_floats(self.to_numpy(), precision)
+
+    def to_numpy(self) -> np.ndarray:
+        """Returns the (dequantized) vector as float32."""
+        vector = self.data.astype(np.float32)
+        if self.precision == EmbeddingPrecision.INT8:
+            vector *= np.float32(self.scale)
+        return vector
+
+    def to_list(self) -> List[float]:
+        return self.to_numpy().tolist()
+
+    def to_json(self) -> str:
+        """JSON array with only as many digits as the precision carries (~3x smaller than float64 repr)."""
+        digits = _JSON_DIGITS[self.precision]
+        return "[" + ",".join(f"{value:.{digits}g}" for value in self.to_list()) + "]"
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, _PRECISION_CODES[self.precision], self.scale) + self.data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "Embedding":
+        if len(payload) < _HEADER.size:
+            raise ValueError("Not a serialized Embedding.")
+        magic, code, scale = _HEADER.unpack_from(payload)
+        if magic != _MAGIC or code not in _CODE_PRECISIONS:
+            raise ValueError("Not a serialized Embedding.")
+        precision = _CODE_PRECISIONS[code]
+        data = np.frombuffer(payload, dtype=_NUMPY_DTYPES[precision], offset=_HEADER.size)
+        return cls(data, precision, scale)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def from_base64(cls, payload: str) -> "Embedding":
+        return cls.from_bytes(base64.b64decode(payload))
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    def __repr__(self) -> str:
+        return f"Embedding(dim={len(self)}, precision={self.precision.value}, bytes={self.nbytes})"
+
+
+def dumps_document(document: dict) -> str:
+    """
+    json.dumps for documents that may hold `Embedding` values (e.g. OpenSearch bulk lines).
+    Embeddings are written with `Embedding.to_json`; everything else as usual.
+    """
+    embeddings = {key: value for key, value in document.items() if isinstance(value, Embedding)}
+    if not embeddings:
+        return json.dumps(document)
+    rest = json.dumps({key: value for key, value in document.items() if key not in embeddings})
+    fields = ",".join(f"{json.dumps(key)}:{value.to_json()}" for key, value in embeddings.items())
+    return f"{rest[:-1]},{fields}}}" if rest != "{}" else f"{{{fields}}}"
@@ -0,0 +1,67 @@
+# shared_layer/model/search_model.py
+
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, root_validator
+
+
+class SearchMode(str, Enum):
+    KNN = "knn"
+    HYBRID = "hybrid"   # BM25 over text + extracted metadata, fused with k-NN by reciprocal rank
+
+
+class SearchRequest(BaseModel):
+    """k-NN query over indexed chunks: either `query_text` (embedded on the fly) or a ready `query_vector`."""
+    query_text: Optional[str] = None
+    query_vector: Optional[List[float]] = None
+    business_id: Optional[str] = None
+    data_type: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    k: int = Field(10, gt=0, le=100)
+    mode: SearchMode = SearchMode.KNN
+
+    @root_validator
+    def check_query(cls, values):
+        if not values.get("query_text") and not values.get("query_vector"):
+            raise ValueError("Either query_text or query_vector is required.")
+        if values.get("mode") == SearchMode.HYBRID and not values.get("query_text"):
+            raise ValueError("Hybrid search needs query_text for its lexical leg.")
+        date_from, date_to = values.get("date_from"), values.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("date_from must not be after date_to.")
+        return values
+
+
+class SearchHit(BaseModel):
+    id: str
+    score: float
+    business_id: Optional[str] = None
+    data_type: Optional[str] = None
+    timestamp: Optional[str] = None
+    sentences: List[str] = []
+    sentiment: Optional[str] = None
+    keywords: List[str] = []
+
+    @classmethod
+    def from_source(cls, doc_id: str, score: float, source: dict) -> "SearchHit":
+        """Builds a hit from an indexed document (`sales_template_v1` fields)."""
+        metadata = source.get("indexed_metadata") or {}
+        return cls(
+            id=doc_id,
+            score=score or 0.0,
+            business_id=source.get("business_id"),
+            data_type=source.get("data_type"),
+            timestamp=source.get("timestamp"),
+            sentences=source.get("sentences") or [],
+            sentiment=(source.get("sentiment_analysis") or {}).get("sentiment"),
+            keywords=metadata.get("keywords") or []
+        )
+
+
+class SearchResponse(BaseModel):
+    hits: List[SearchHit] = []
+    took_ms: float = 0.0
+    cached: bool = False
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from shared_layer.model.search_model import SearchRequest, SearchResponse
+
 
 #TODO: Same thign here bring it to shread_layer and make these classes absolutly generic enough to be used in other parts of the project
 class AOSSRepository(ABC):
@@ -17,5 +19,5 @@ class AOSSRepository(ABC):
         pass
 
     @abstractmethod
-    def search(self, collection_id, query):
-        pass
\ No newline at end of file
+    def search(self, request: SearchRequest) -> SearchResponse:
+        pass
@@ -2,6 +2,8 @@
 from abc import ABC, abstractmethod
 from typing import List
 
+from shared_layer.model.embedding import Embedding
+
 
 class BedRockRepository(ABC):
     def __init__(self, bedrock_client, config):
@@ -10,4 +12,8 @@ class BedRockRepository(ABC):
 
     @abstractmethod
     def enrich_with_embeddings(self, spacy_batches: List[dict]) -> List[dict]:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def embed_query(self, text: str) -> Embedding:
+        pass
@@ -1,7 +1,7 @@
 # file_processor/repository/dynamodb/abc_dynamo_repository.py
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 #TODO: Bring this to shated_layer, since it can be used genrically from file_processor and context_engien etc..
@@ -35,3 +35,19 @@ class DynamoRepository(ABC):
     def update_metadata_status(self, business_id: str, event_time: str, new_status: str, table_name: str):
         """Update the `status` attribute for an item in DynamoDB."""
         pass
+
+    @abstractmethod
+    def start_shard_tracking(self, business_id: str, event_time: str, shard_count: int, table_name: str) -> None:
+        """Records how many shards a file was split into; counters reset only when the count changes."""
+        pass
+
+    @abstractmethod
+    def record_shard_result(self, business_id: str, event_time: str, shard_index: int, succeeded: bool,
+                            table_name: str) -> Optional[Dict]:
+        """Atomically adds a finished shard; returns the updated item (plain values) or None."""
+        pass
+
+    @abstractmethod
+    def complete_sharded_file(self, business_id: str, event_time: str, final_status: str, table_name: str) -> bool:
+        """Sets the final status once every shard has finished. True only for the one caller that set it."""
+        pass
@@ -0,0 +1 @@
+# This file makes the search directory a Python package
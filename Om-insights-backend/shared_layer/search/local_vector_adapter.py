@@ -0,0 +1,292 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote
+
+from shared_layer.logging.logger import Logger
+from shared_layer.model.embedding import Embedding
+from shared_layer.model.search_model import SearchHit, SearchMode, SearchRequest, SearchResponse
+from shared_layer.repository.aoss_repository import AOSSRepository
+from shared_layer.repository.bedrock_repository import BedRockRepository
+from shared_layer.search.vector_index import DEFAULT_HNSW_THRESHOLD, VectorIndex
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_DIMENSION = 1536  # Titan text embeddings v1
+DEFAULT_INDEX_NAME = "local_vectors"
+DEFAULT_MAX_SNAPSHOT_AGE_SECONDS = 3600
+DEFAULT_RELOAD_CHECK_SECONDS = 60
+SNAPSHOTS_KEPT = 2
+EXPORT_PAGE_SIZE = 500
+MIRROR_OVERLAP_SECONDS = 60  # AOSS refresh lag: writes this recent may be missing from a scan
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+
+def _as_utc(value) -> Optional[datetime]:
+    """Parses ISO timestamps (incl. a trailing 'Z') into aware UTC datetimes for comparison."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _date_predicate(date_from, date_to) -> Optional[Callable[[dict], bool]]:
+    """Metadata filter keeping documents timestamped within [date_from, date_to]; None when unbounded."""
+    if not (date_from or date_to):
+        return None
+    date_from, date_to = _as_utc(date_from), _as_utc(date_to)
+
+    def predicate(metadata: dict) -> bool:
+        timestamp = _as_utc(metadata.get("timestamp"))
+        return timestamp is not None and (not date_from or timestamp >= date_from) and \
+            (not date_to or timestamp <= date_to)
+
+    return predicate
+
+
+class LocalVectorAdapter(AOSSRepository):
+    """
+    `AOSSRepository` backed by an in-process `VectorIndex`.
+
+    Drop-in for `AOSSAdapter` in tests and benchmarks (no cluster needed), and
+    the local tier of `HotTenantVectorCache`. Documents are stored without
+    their embedding in the metadata; the vector lives in the index.
+    """
+
+    def __init__(self, aoss_client=None, config: Optional[dict] = None, embedder: Optional[BedRockRepository] = None,
+                 index: Optional[VectorIndex] = None):
+        super().__init__(aoss_client, config or {})
+        local_config = (config or {}).get("aoss", {}).get("local_index", {}) or {}
+        self.embedder = embedder
+        self.index_name = (config or {}).get("aoss", {}).get("index_name", DEFAULT_INDEX_NAME)
+        self.index = index or VectorIndex(
+            local_config.get("dimension", DEFAULT_DIMENSION),
+            hnsw_threshold=local_config.get("hnsw_threshold", DEFAULT_HNSW_THRESHOLD)
+        )
+
+    @classmethod
+    def from_snapshot(cls, directory: str, config: Optional[dict] = None,
+                      embedder: Optional[BedRockRepository] = None) -> "LocalVectorAdapter":
+        return cls(config=config, embedder=embedder, index=VectorIndex.load(directory, mmap=True))
+
+    def save(self, directory: str) -> None:
+        self.index.save(directory)
+
+    def index_unstructured_data(self, parsed_data):
+        """Indexes documents carrying an `embedding`; returns the same summary shape as the bulk indexer."""
+        items = []
+        timestamp = datetime.now().isoformat() + "Z"
+        for position, document in enumerate(parsed_data):
+            embedding = document.get("embedding")
+            doc_id = document.get("text_hash") or str(uuid.uuid4())
+            if embedding is None:
+                items.append({"position": position, "id": doc_id, "status": 400,
+                              "error": "Document has no embedding.", "attempts": 1})
+                continue
+            vector = embedding.to_numpy() if isinstance(embedding, Embedding) else embedding
+            metadata = {key: value for key, value in document.items() if key != "embedding"}
+            metadata.setdefault("timestamp", timestamp)
+            created = self.index.add(doc_id, vector, metadata)
+            items.append({"position": position, "id": doc_id, "status": 201 if created else 200,
+                          "error": None, "attempts": 1})
+
+        failed = sum(1 for item in items if item["error"])
+        logger.info(f"✅ Indexed {len(items) - failed} document(s) locally ({len(self.index)} total)")
+        return {"indexed": len(items) - failed, "failed": failed, "requests": 0, "bytes_sent": 0, "items": items}
+
+    def describe_collections(self):
+        return {"collectionSummaries": [{"name": self.index_name, "status": "ACTIVE", "documents": len(self.index)}]}
+
+    def search(self, request: SearchRequest) -> SearchResponse:
+        """k-NN only: hybrid requests are answered from the vector leg (there is no local BM25 index)."""
+        start = time.perf_counter()
+        if request.query_vector:
+            vector = request.query_vector
+        elif self.embedder:
+            vector = self.embedder.embed_query(request.query_text).to_numpy()
+        else:
+            raise ValueError("LocalVectorAdapter needs an embedder to search by query_text.")
+
+        results = self.index.search(
+            vector, request.k, filters={"business_id": request.business_id, "data_type": request.data_type},
+            predicate=_date_predicate(request.date_from, request.date_to)
+        )
+        hits = [SearchHit.from_source(doc_id, score, self.index.metadata_for(doc_id)) for doc_id, score in results]
+        return SearchResponse(hits=hits, took_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+class HotTenantVectorCache(AOSSRepository):
+    """
+    Serves k-NN searches for the busiest businesses from a local index, everything else from AOSS.
+
+    Each hot business has its own snapshot under `snapshot_dir` (e.g. on
+    EFS), built by `export_snapshots()` from a full scan of the remote
+    index. A snapshot is a versioned directory plus a manifest; the
+    tenant's `CURRENT` pointer is replaced last, so readers only ever see
+    complete snapshots. A business is served locally only once its full
+    snapshot is loaded and no older than `max_snapshot_age_seconds`;
+    before that, and for hybrid requests, AOSS answers. Writes always go to
+    AOSS first (the source of truth) and are mirrored into loaded snapshots,
+    so local results miss at most what other instances wrote since the export.
+    """
+
+    def __init__(self, remote: AOSSRepository, snapshot_dir: str, hot_business_ids: Iterable[str],
+                 embedder: Optional[BedRockRepository] = None,
+                 max_snapshot_age_seconds: int = DEFAULT_MAX_SNAPSHOT_AGE_SECONDS,
+                 reload_check_seconds: int = DEFAULT_RELOAD_CHECK_SECONDS):
+        super().__init__(remote.aoss_client, remote.config)
+        self.remote = remote
+        self.snapshot_dir = snapshot_dir
+        self.hot_business_ids = set(hot_business_ids or ())
+        self.embedder = embedder
+        self.max_snapshot_age_seconds = max_snapshot_age_seconds
+        self.reload_check_seconds = reload_check_seconds
+        # business_id -> loaded snapshot (adapter, manifest, when CURRENT was last checked, mirrored documents)
+        self.tenants: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, remote: AOSSRepository, config: dict,
+                    embedder: Optional[BedRockRepository] = None) -> AOSSRepository:
+        """Wraps `remote` when `aoss.local_index.hot_cache` is enabled; otherwise returns it unchanged."""
+        hot_config = config.get("aoss", {}).get("local_index", {}).get("hot_cache", {}) or {}
+        if not hot_config.get("enabled", False) or not hot_config.get("hot_business_ids"):
+            return remote
+        logger.info(f"⚡ Hot tenant cache enabled for {len(hot_config['hot_business_ids'])} business(es)")
+        return cls(
+            remote, hot_config["snapshot_dir"], hot_config["hot_business_ids"], embedder,
+            max_snapshot_age_seconds=hot_config.get("max_snapshot_age_seconds", DEFAULT_MAX_SNAPSHOT_AGE_SECONDS),
+            reload_check_seconds=hot_config.get("reload_check_seconds", DEFAULT_RELOAD_CHECK_SECONDS)
+        )
+
+    def tenant_dir(self, business_id: str) -> str:
+        return os.path.join(self.snapshot_dir, quote(business_id, safe=""))
+
+    def export_snapshots(self, business_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Builds a fresh snapshot per hot business from a full scan of the remote
+        index (run on a schedule). Returns the document count per business.
+        """
+        counts = {}
+        for business_id in sorted(business_ids or self.hot_business_ids):
+            exported_at = time.time()
+            local = LocalVectorAdapter(config=self.config, embedder=self.embedder)
+            for page in _pages(self.remote.scan_documents(business_id), EXPORT_PAGE_SIZE):
+                local.index_unstructured_data(page)
+
+            version = str(int(exported_at * 1000))
+            version_dir = os.path.join(self.tenant_dir(business_id), version)
+            local.save(version_dir)
+            manifest = {"business_id": business_id, "documents": len(local.index), "exported_at": exported_at}
+            _write_atomic(os.path.join(version_dir, MANIFEST_FILE), json.dumps(manifest))
+            _write_atomic(os.path.join(self.tenant_dir(business_id), CURRENT_FILE), version)  # ✅ Commit point
+            self._prune(business_id, keep=version)
+            counts[business_id] = len(local.index)
+            logger.info(f"💾 Exported {len(local.index)} vector(s) of {business_id} to {version_dir}")
+        return counts
+
+    def index_unstructured_data(self, parsed_data):
+        result = self.remote.index_unstructured_data(parsed_data)
+        for document in parsed_data:
+            tenant = self.tenants.get(document.get("business_id"))
+            if tenant:
+                # ✅ Only loaded snapshots are kept current; the rest load complete from the next export
+                with self._lock:
+                    tenant["mirrored"].append((time.time(), document))
+                tenant["adapter"].index_unstructured_data([document])
+        return result
+
+    def describe_collections(self):
+        return self.remote.describe_collections()
+
+    def search(self, request: SearchRequest) -> SearchResponse:
+        local = self._local_for(request.business_id) if request.mode == SearchMode.KNN else None
+        if local:
+            try:
+                response = local.search(request)
+                logger.info(f"⚡ Served search for hot business {request.business_id} locally")
+                return response
+            except Exception as e:
+                logger.warning(f"⚠️ Local vector search failed, falling back to AOSS: {e}")
+        return self.remote.search(request)
+
+    def _local_for(self, business_id: Optional[str]) -> Optional[LocalVectorAdapter]:
+        """The business's loaded snapshot if it may be served (complete and fresh enough), else None."""
+        if business_id not in self.hot_business_ids:
+            return None
+        now = time.time()
+        tenant = self.tenants.get(business_id)
+        if not tenant or now - tenant["checked_at"] >= self.reload_check_seconds:
+            try:
+                tenant = self._load(business_id, tenant)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load the snapshot of {business_id}: {e}")
+        if not tenant:
+            return None
+        if now - tenant["manifest"]["exported_at"] > self.max_snapshot_age_seconds:
+            logger.info(f"ℹ️ Snapshot of {business_id} is older than {self.max_snapshot_age_seconds}s, using AOSS")
+            return None
+        return tenant["adapter"]
+
+    def _load(self, business_id: str, tenant: Optional[dict]) -> Optional[dict]:
+        """(Re)loads the tenant's CURRENT snapshot if it changed; None while there is no complete one."""
+        current_path = os.path.join(self.tenant_dir(business_id), CURRENT_FILE)
+        if not os.path.exists(current_path):
+            return None
+        with open(current_path) as f:
+            version = f.read().strip()
+        if tenant and tenant["version"] == version:
+            tenant["checked_at"] = time.time()
+            return tenant
+
+        version_dir = os.path.join(self.tenant_dir(business_id), version)
+        with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        adapter = LocalVectorAdapter.from_snapshot(version_dir, self.config, self.embedder)
+        if len(adapter.index) != manifest["documents"]:
+            raise ValueError(f"snapshot {version} holds {len(adapter.index)} of {manifest['documents']} documents")
+
+        # ✅ Writes this instance mirrored around or after the new export may be missing from it
+        cutoff = manifest["exported_at"] - MIRROR_OVERLAP_SECONDS
+        mirrored = [(at, document) for at, document in (tenant["mirrored"] if tenant else []) if at >= cutoff]
+        if mirrored:
+            adapter.index_unstructured_data([document for _, document in mirrored])
+        tenant = {"adapter": adapter, "manifest": manifest, "version": version,
+                  "checked_at": time.time(), "mirrored": mirrored}
+        self.tenants[business_id] = tenant
+        logger.info(f"📥 Loaded snapshot {version} of {business_id} ({manifest['documents']} vectors)")
+        return tenant
+
+    def _prune(self, business_id: str, keep: str) -> None:
+        """Keeps the newest SNAPSHOTS_KEPT versions (readers may still be loading the previous one)."""
+        versions = sorted((name for name in os.listdir(self.tenant_dir(business_id)) if name.isdigit()),
+                          key=int, reverse=True)
+        for version in versions[SNAPSHOTS_KEPT:]:
+            if version != keep:
+                shutil.rmtree(os.path.join(self.tenant_dir(business_id), version), ignore_errors=True)
+
+
+def _pages(documents: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    page = []
+    for document in documents:
+        page.append(document)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,26 @@
+from typing import Dict, List
+
+from shared_layer.model.search_model import SearchHit
+
+# ✅ Constants
+DEFAULT_RRF_K = 60  # damping constant from the original RRF paper; flattens the advantage of rank 1
+
+
+def reciprocal_rank_fusion(rankings: List[List[SearchHit]], limit: int, rrf_k: int = DEFAULT_RRF_K) -> List[SearchHit]:
+    """
+    Fuses ranked hit lists by reciprocal rank: score(d) = Σ 1 / (rrf_k + rank_i(d)).
+
+    Only ranks are used, so BM25 and k-NN scores (different scales) never
+    need normalizing. A document found by several legs accumulates score;
+    ties keep the order of first appearance. Returned hits carry the fused
+    score and the source fields of their first occurrence.
+    """
+    scores: Dict[str, float] = {}
+    first_seen: Dict[str, SearchHit] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            scores[hit.id] = scores.get(hit.id, 0.0) + 1.0 / (rrf_k + rank)
+            first_seen.setdefault(hit.id, hit)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [first_seen[doc_id].copy(update={"score": round(scores[doc_id], 6)}) for doc_id in ordered]
@@ -0,0 +1,306 @@
+import heapq
+import json
+import math
+import os
+import random
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from shared_layer.logging.logger import Logger
+
+logger = Logger()
+
+# ✅ Constants
+DEFAULT_HNSW_THRESHOLD = 5000   # below this many vectors (or filtered candidates) search is exact
+DEFAULT_M = 16
+DEFAULT_EF_CONSTRUCTION = 100
+DEFAULT_EF_SEARCH = 64
+FILTER_FIELDS = ("business_id", "data_type")
+INDEX_FORMAT_VERSION = 1
+
+VECTORS_FILE = "vectors.npy"
+GRAPH_FILE = "graph.npz"
+META_FILE = "meta.json"
+
+
+class VectorIndex:
+    """
+    In-process vector index scored by inner product (the `sales_template_v1` space).
+
+    Up to `hnsw_threshold` vectors, queries are exact NumPy brute force. Past
+    it, an HNSW graph is built and kept up to date on insert. Filters on
+    `business_id`/`data_type` use posting lists: a filtered candidate set
+    small enough for brute force is scored exactly, otherwise the graph is
+    searched and only matching nodes are admitted as results.
+
+    `save()` writes the vectors as a plain `.npy` file, so `load()` can
+    memory-map them instead of reading the whole matrix into memory.
+    """
+
+    def __init__(self, dim: int, hnsw_threshold: int = DEFAULT_HNSW_THRESHOLD, m: int = DEFAULT_M,
+                 ef_construction: int = DEFAULT_EF_CONSTRUCTION, ef_search: int = DEFAULT_EF_SEARCH, seed: int = 42):
+        self.dim = dim
+        self.hnsw_threshold = hnsw_threshold
+        self.m = m
+        self.m0 = 2 * m  # the base layer keeps denser links
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.ids: List[str] = []
+        self.metadata: List[dict] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+        self._layers: List[Dict[int, List[int]]] = []
+        self._levels: List[int] = []
+        self._entry_point: Optional[int] = None
+        self._level_factor = 1 / math.log(m)
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    @property
+    def uses_graph(self) -> bool:
+        return self._entry_point is not None
+
+    def metadata_for(self, doc_id: str) -> dict:
+        return self.metadata[self._positions[doc_id]]
+
+    def count(self, field: str, value: str) -> int:
+        return len(self._postings.get((field, value), ()))
+
+    def add(self, doc_id: str, vector: Iterable[float], metadata: Optional[dict] = None) -> bool:
+        """Adds a vector; returns False if `doc_id` is already indexed."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-dimensional vector, got {vector.shape[0]}.")
+        with self._lock:
+            if doc_id in self._positions:
+                return False
+            self._ensure_capacity(self._size + 1)
+            position = self._size
+            self._vectors[position] = vector
+            self._size += 1
+            self.ids.append(doc_id)
+            self.metadata.append(metadata or {})
+            self._positions[doc_id] = position
+            self._index_metadata(position, metadata or {})
+
+            if self.uses_graph:
+                self._insert(position)
+            elif self._size >= self.hnsw_threshold:
+                self._build_graph()
+            return True
+
+    def search(self, query: Iterable[float], k: int, filters: Optional[Dict[str, str]] = None,
+               predicate: Optional[Callable[[dict], bool]] = None) -> List[Tuple[str, float]]:
+        """
+        Returns up to `k` (doc_id, score) pairs, best first.
+
+        Args:
+            filters: Exact matches on `business_id` / `data_type`.
+            predicate: Extra check on a document's metadata (e.g. a date range).
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if not self._size or k <= 0:
+                return []
+            candidates = self._candidates(filters, predicate)
+            if candidates is not None and not len(candidates):
+                return []
+
+            if not self.uses_graph or (candidates is not None and len(candidates) <= self.hnsw_threshold):
+                return self._exact_search(query, k, candidates)
+
+            allowed = None
+            if candidates is not None:
+                allowed = np.zeros(self._size, dtype=bool)
+                allowed[candidates] = True
+            entry = [self._entry_point]
+            for layer in range(self._levels[self._entry_point], 0, -1):
+                entry = [max(self._search_layer(query, entry, 1, layer))[1]]
+            found = self._search_layer(query, entry, max(self.ef_search, k), 0, allowed)
+            return [(self.ids[position], score) for score, position in heapq.nlargest(k, found)]
+
+    def _candidates(self, filters: Optional[Dict[str, str]],
+                    predicate: Optional[Callable[[dict], bool]]) -> Optional[np.ndarray]:
+        """Positions allowed by the filters, or None when nothing is filtered."""
+        candidates = None
+        for field, value in (filters or {}).items():
+            if value is None:
+                continue
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unsupported filter field '{field}'.")
+            postings = np.asarray(self._postings.get((field, value), ()), dtype=np.int64)
+            candidates = postings if candidates is None else np.intersect1d(candidates, postings)
+        if predicate:
+            pool = range(self._size) if candidates is None else candidates.tolist()
+            candidates = np.asarray([p for p in pool if predicate(self.metadata[p])], dtype=np.int64)
+        return candidates
+
+    def _exact_search(self, query: np.ndarray, k: int, candidates: Optional[np.ndarray]) -> List[Tuple[str, float]]:
+        vectors = self.vectors if candidates is None else self._vectors[candidates]
+        scores = vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        positions = top if candidates is None else candidates[top]
+        return [(self.ids[int(position)], float(scores[i])) for position, i in zip(positions, top)]
+
+    # ---------------------------------------------
+    # HNSW graph
+    # ---------------------------------------------
+    def _build_graph(self) -> None:
+        logger.info(f"🕸️ Building HNSW graph over {self._size} vectors (M={self.m}, ef={self.ef_construction})")
+        self._layers, self._levels, self._entry_point = [], [], None
+        for position in range(self._size):
+            self._insert(position)
+
+    def _insert(self, node: int) -> None:
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_factor)
+        self._levels.append(level)
+        while len(self._layers) <= level:
+            self._layers.append({})
+        for layer in range(level + 1):
+            self._layers[layer][node] = []
+        if self._entry_point is None:
+            self._entry_point = node
+            return
+
+        query = self._vectors[node]
+        top_level = self._levels[self._entry_point]
+        entry = [self._entry_point]
+        for layer in range(top_level, level, -1):
+            entry = [max(self._search_layer(query, entry, 1, layer))[1]]
+
+        for layer in range(min(level, top_level), -1, -1):
+            found = self._search_layer(query, entry, self.ef_construction, layer)
+            max_links = self.m0 if layer == 0 else self.m
+            graph = self._layers[layer]
+            graph[node] = [position for _, position in heapq.nlargest(self.m, found)]
+            for neighbor in graph[node]:
+                links = graph[neighbor]
+                links.append(node)
+                if len(links) > max_links:
+                    scores = self._vectors[links] @ self._vectors[neighbor]
+                    graph[neighbor] = [links[i] for i in np.argsort(-scores)[:max_links]]
+            entry = [position for _, position in found]
+
+        if level > top_level:
+            self._entry_point = node
+
+    def _search_layer(self, query: np.ndarray, entry: List[int], ef: int, layer: int,
+                      allowed: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        """Best-first search of one layer. Returns up to `ef` (score, position) pairs (a min-heap)."""
+        graph = self._layers[layer]
+        visited = set(entry)
+        entry_scores = (self._vectors[entry] @ query).tolist()
+        candidates = [(-score, position) for score, position in zip(entry_scores, entry)]
+        heapq.heapify(candidates)
+        results = [(score, position) for score, position in zip(entry_scores, entry)
+                   if allowed is None or allowed[position]]
+        heapq.heapify(results)
+
+        while candidates:
+            negative_score, position = heapq.heappop(candidates)
+            if len(results) >= ef and -negative_score < results[0][0]:
+                break
+            neighbors = [n for n in graph.get(position, ()) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for score, neighbor in zip((self._vectors[neighbors] @ query).tolist(), neighbors):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    if allowed is None or allowed[neighbor]:
+                        heapq.heappush(results, (score, neighbor))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+        return results
+
+    # ---------------------------------------------
+    # Bookkeeping & persistence
+    # ---------------------------------------------
+    def _ensure_capacity(self, size: int) -> None:
+        if size <= self._vectors.shape[0]:
+            return
+        # Amortized growth; also copies a read-only memory-mapped matrix on first write
+        grown = np.zeros((max(size, 2 * self._vectors.shape[0], 64), self.dim), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def _index_metadata(self, position: int, metadata: dict) -> None:
+        for field in FILTER_FIELDS:
+            value = metadata.get(field)
+            if value is not None:
+                self._postings.setdefault((field, value), []).append(position)
+
+    def save(self, directory: str) -> None:
+        """Writes the index to `directory` (vectors, graph, then metadata last as the commit point)."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._atomic_write(directory, VECTORS_FILE, lambda f: np.save(f, self.vectors))
+            graph = {}
+            for layer, links in enumerate(self._layers):
+                nodes = sorted(links)
+                graph[f"nodes_{layer}"] = np.asarray(nodes, dtype=np.int32)
+                graph[f"offsets_{layer}"] = np.cumsum([0] + [len(links[n]) for n in nodes], dtype=np.int64)
+                graph[f"links_{layer}"] = np.asarray([x for n in nodes for x in links[n]], dtype=np.int32)
+            self._atomic_write(directory, GRAPH_FILE, lambda f: np.savez(f, **graph))
+            meta = {
+                "version": INDEX_FORMAT_VERSION,
+                "dim": self.dim,
+                "params": {"hnsw_threshold": self.hnsw_threshold, "m": self.m,
+                           "ef_construction": self.ef_construction, "ef_search": self.ef_search},
+                "ids": self.ids,
+                "metadata": self.metadata,
+                "levels": self._levels,
+                "entry_point": self._entry_point,
+                "layers": len(self._layers)
+            }
+            self._atomic_write(directory, META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+        logger.info(f"💾 Saved vector index ({self._size} vectors) to {directory}")
+
+    @staticmethod
+    def _atomic_write(directory: str, name: str, writer: Callable) -> None:
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            writer(f)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "VectorIndex":
+        """Loads a saved index; with `mmap`, vectors are paged in from disk on demand."""
+        with open(os.path.join(directory, META_FILE), "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector index format: {meta.get('version')}")
+
+        index = cls(meta["dim"], **meta["params"])
+        index._vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r" if mmap else None)
+        index._size = len(meta["ids"])
+        index.ids = meta["ids"]
+        index.metadata = meta["metadata"]
+        index._positions = {doc_id: position for position, doc_id in enumerate(index.ids)}
+        for position, metadata in enumerate(index.metadata):
+            index._index_metadata(position, metadata)
+
+        with np.load(os.path.join(directory, GRAPH_FILE)) as graph:
+            for layer in range(meta["layers"]):
+                nodes, offsets = graph[f"nodes_{layer}"], graph[f"offsets_{layer}"]
+                links = graph[f"links_{layer}"].tolist()
+                index._layers.append({
+                    int(node): links[offsets[i]:offsets[i + 1]] for i, node in enumerate(nodes.tolist())
+                })
+        index._levels = meta["levels"]
+        index._entry_point = meta["entry_point"]
+        logger.info(f"📂 Loaded vector index ({index._size} vectors, graph={index.uses_graph}) from {directory}")
+        return index